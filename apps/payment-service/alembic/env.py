@@ -6,6 +6,10 @@ from sqlalchemy.ext.asyncio import async_engine_from_config, AsyncEngine
 from alembic import context
 
 from src.infrastructure.payments.orm import Base
+from src.infrastructure.outbox import orm as outbox_orm  # noqa: F401
+from src.infrastructure.balances import orm as balances_orm  # noqa: F401
+from src.infrastructure.rollups import orm as rollups_orm  # noqa: F401
+from src.infrastructure.payments.partitions import is_partition
 from src.config import settings
 
 config = context.config
@@ -15,6 +19,11 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_name(name, type_, parent_names) -> bool:
+    # payments partitions are managed by src.cli.partitions, not by autogenerate
+    return not (type_ == "table" and is_partition(name))
+
+
 def get_url() -> str:
     return settings.DATABASE_URL
 
@@ -27,6 +36,7 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         version_table='alembic_version_payments',
         compare_type=True,
+        include_name=include_name,
         dialect_opts={"paramstyle": "named"},
     )
     with context.begin_transaction():
@@ -38,6 +48,7 @@ def do_run_migrations(connection):
         target_metadata=target_metadata,
         version_table='alembic_version_payments',
         compare_type=True,
+        include_name=include_name,
         render_as_batch=False,  
     )
     with context.begin_transaction():
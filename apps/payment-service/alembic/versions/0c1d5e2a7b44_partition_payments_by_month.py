@@ -0,0 +1,86 @@
+"""partition payments by month
+
+Revision ID: 0c1d5e2a7b44
+Revises: 5817f54861fb
+Create Date: 2026-10-17 01:12:40.221905
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c1d5e2a7b44'
+down_revision: Union[str, None] = '5817f54861fb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# PostgreSQL only: payments becomes RANGE-partitioned by created_at with one partition per
+# UTC month (payments_pYYYY_MM) and a default partition. A partitioned table's primary key
+# has to contain the partition key, so it turns into (id, created_at) and id alone is no longer
+# unique in the database: the application generates ids (uuid4) and ingest refuses an id that
+# is stored under another created_at. Partitions for the months ahead are created by
+# `python -m src.cli.partitions maintain`.
+# The existing rows are copied once, so on a large table run this in a maintenance window.
+INDEXES = {
+    'ix_payments_created': ['created_at', 'id'],
+    'ix_payments_updated': ['updated_at', 'id'],
+    'ix_payments_payer_created': ['payer_id', 'created_at', 'id'],
+    'ix_payments_payee_created': ['payee_id', 'created_at', 'id'],
+    'ix_payments_status': ['status'],
+    'ix_payments_dst_ccy': ['dst_currency'],
+}
+MONTHS_AHEAD = 3
+
+
+def _month(value: date, shift: int = 0) -> date:
+    index = value.year * 12 + value.month - 1 + shift
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _swap_table(partitioned: bool) -> None:
+    op.execute("ALTER TABLE payments RENAME TO payments_old")
+    op.execute("ALTER TABLE payments_old RENAME CONSTRAINT payments_pkey TO payments_old_pkey")
+    for name in INDEXES:
+        op.drop_index(name, table_name='payments_old')
+    suffix = " PARTITION BY RANGE (created_at)" if partitioned else ""
+    op.execute(f"CREATE TABLE payments (LIKE payments_old INCLUDING DEFAULTS INCLUDING CONSTRAINTS){suffix}")
+    op.create_primary_key('payments_pkey', 'payments', ['id', 'created_at'] if partitioned else ['id'])
+
+
+def _copy_and_index() -> None:
+    op.execute("INSERT INTO payments SELECT * FROM payments_old")
+    op.drop_table('payments_old')
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'payments', columns, unique=False)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    _swap_table(partitioned=True)
+    op.execute("CREATE TABLE payments_default PARTITION OF payments DEFAULT")
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM payments_old")).scalar()
+    today = datetime.now(timezone.utc).date()
+    month, last = _month((oldest or datetime.now(timezone.utc)).astimezone(timezone.utc).date()), _month(today, MONTHS_AHEAD)
+    while month <= last:
+        nxt = _month(month, 1)
+        op.execute(
+            f"CREATE TABLE payments_p{month.year:04d}_{month.month:02d} PARTITION OF payments "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{nxt.isoformat()} 00:00:00+00')"
+        )
+        month = nxt
+    _copy_and_index()
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # partitions (attached ones, and the default) go away with the partitioned table;
+    # detached ones are plain tables and are left alone
+    _swap_table(partitioned=False)
+    _copy_and_index()
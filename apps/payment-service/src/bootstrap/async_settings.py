@@ -1,25 +1,24 @@
 from typing import Mapping, Sequence, Type
 from patterns.message import Command, Event
 from patterns.message_bus import AsyncMessageBus
-from patterns.unit_of_work import AsyncAbstractUnitOfWork
-from patterns.observability import ObservabilityHook
+from patterns.observability import ObservabilityHook, OutboxHook
+from patterns.outbox import OutboxRelay
 
 from src.dto.commands import (
     CreatePayment, MarkProcessing, CompletePayment, FailPayment, RefundPayment, 
         PaymentCreated, PaymentStatusChanged, PaymentRefunded
 )
+from src.config import settings
+from src.infrastructure.async_unit_of_work import AsyncUnitOfWork
 from src.gateway.handlers.async_payment import (
     handle_create_payment, handle_mark_processing, handle_complete, handle_fail, handle_refund,
     on_payment_created, on_payment_status_changed, on_payment_refunded
 )
 
 def bootstrap_async(
-    uow: AsyncAbstractUnitOfWork,
     hook: ObservabilityHook | None = None,
     **deps,
 ) -> AsyncMessageBus:
-    if hook is not None:
-        uow.set_observability_hook(hook)
     event_handlers: Mapping[Type[Event], Sequence] = {
         PaymentCreated: [on_payment_created],
         PaymentStatusChanged: [on_payment_status_changed],
@@ -33,10 +32,22 @@ def bootstrap_async(
         RefundPayment: handle_refund,
     }
     return AsyncMessageBus(
-        uow=uow,
         event_handlers=event_handlers,
         command_handlers=command_handlers,
         dependencies=deps,
         raise_on_error=True,
         hook=hook,
     )
+
+
+def bootstrap_outbox_relay(bus: AsyncMessageBus, hook: OutboxHook | None = None) -> OutboxRelay:
+    return OutboxRelay(
+        uow_factory=AsyncUnitOfWork,
+        bus=bus,
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        poll_interval=settings.OUTBOX_POLL_INTERVAL_SEC,
+        max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+        retry_base_sec=settings.OUTBOX_RETRY_BASE_SEC,
+        retry_max_sec=settings.OUTBOX_RETRY_MAX_SEC,
+        hook=hook,
+    )
@@ -0,0 +1,31 @@
+import argparse
+import asyncio
+from src.config import settings
+from src.infrastructure.db_async import ASYNC_ENGINE
+from src.infrastructure.payments.archive import PaymentArchive, archive_payments
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Move old completed/failed/refunded payments into archive segments")
+    parser.add_argument("-d", "--dir", default=settings.PAYMENTS_ARCHIVE_DIR, help="archive root directory")
+    parser.add_argument("--older-than-days", type=int, default=settings.PAYMENTS_ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--block-rows", type=int, default=settings.PAYMENTS_ARCHIVE_BLOCK_ROWS)
+    parser.add_argument("--segment-rows", type=int, default=settings.PAYMENTS_ARCHIVE_SEGMENT_ROWS)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> None:
+    try:
+        archived, deleted, segments = await archive_payments(
+            PaymentArchive(args.dir), older_than_days=args.older_than_days,
+            block_rows=args.block_rows, segment_rows=args.segment_rows, batch_size=args.batch_size,
+        )
+    finally:
+        await ASYNC_ENGINE.dispose()
+    print(f"archived {archived} payments into {len(segments)} segments under {args.dir}, "
+          f"{deleted} removed from payments ({archived - deleted} changed meanwhile and stay hot)")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
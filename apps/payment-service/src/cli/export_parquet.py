@@ -0,0 +1,26 @@
+import argparse
+import asyncio
+from src.config import settings
+from src.infrastructure.db_async import ASYNC_ENGINE
+from src.infrastructure.payments.parquet import export_parquet
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export payments to Parquet partitioned by date and currency")
+    parser.add_argument("-o", "--output", default=settings.EXPORT_PARQUET_DIR, help="dataset root directory")
+    parser.add_argument("--full", action="store_true", help="ignore the stored updated_at watermark")
+    parser.add_argument("--batch-size", type=int, default=settings.EXPORT_PARQUET_BATCH_SIZE)
+    parser.add_argument("--lag-sec", type=float, default=settings.EXPORT_PARQUET_LAG_SEC)
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> None:
+    try:
+        rows, files = await export_parquet(args.output, batch_size=args.batch_size, lag_sec=args.lag_sec, full=args.full)
+    finally:
+        await ASYNC_ENGINE.dispose()
+    print(f"exported {rows} payments into {len(files)} files under {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from uuid import UUID
+from src.config import settings
+from src.infrastructure.db_async import ASYNC_ENGINE
+from src.infrastructure.payments.export import stream_payments
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stream payments to NDJSON or CSV")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--payer-id", type=UUID)
+    parser.add_argument("--payee-id", type=UUID)
+    parser.add_argument("--status", choices=("created", "processing", "completed", "failed", "refunded"))
+    parser.add_argument("--from", dest="created_from", type=datetime.fromisoformat, help="created_at >= (ISO 8601)")
+    parser.add_argument("--to", dest="created_to", type=datetime.fromisoformat, help="created_at < (ISO 8601)")
+    parser.add_argument("--batch-size", type=int, default=settings.EXPORT_BATCH_SIZE)
+    parser.add_argument("-o", "--output", help="file to write, stdout by default")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> None:
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        async for chunk in stream_payments(
+            args.format, batch_size=args.batch_size,
+            payer_id=args.payer_id, payee_id=args.payee_id, status=args.status,
+            created_from=args.created_from, created_to=args.created_to,
+        ):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+        await ASYNC_ENGINE.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
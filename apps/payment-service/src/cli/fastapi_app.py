@@ -1,21 +1,35 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from logstash_async.handler import AsynchronousLogstashHandler
 from logstash_async.formatter import LogstashFormatter
 from typing import Annotated
 from uuid import UUID
 
 from fastapi import FastAPI, Depends, HTTPException, status, Query, Request, Response
-from src.bootstrap.async_settings import bootstrap_async
-from src.infrastructure.async_unit_of_work import AsyncUnitOfWork
-from src.infrastructure.hooks import PromAuditHook
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from patterns.message_bus import AsyncMessageBus
+from patterns.pagination import Cursor
+from src.bootstrap.async_settings import bootstrap_async, bootstrap_outbox_relay
+from src.infrastructure.async_unit_of_work import AsyncUnitOfWork, ReadOnlyAsyncUnitOfWork
+from src.infrastructure.db_async import warm_up_pools
+from src.infrastructure.hooks import PromAuditHook, PromOutboxHook
+from src.infrastructure.notifier import Notifier
 from src.infrastructure.middleware import IdempotencyMiddleware, MetricsMiddleware, prom_endpoint
 from src.cli.error import install_exception_handlers
 from src.config import settings
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 
 from src.dto.commands import CreatePayment, CompletePayment, FailPayment, RefundPayment, MarkProcessing
-from src.gateway.schemas.payments import PaymentCreateDTO, PaymentReadDTO, FxQuoteDTO
+from src.gateway.schemas.payments import (
+    PaymentCreateDTO, PaymentReadDTO, FxQuoteDTO, PaymentStatsDTO,
+    FxQuotesRequestDTO, FxQuotesDTO, FxQuotesLineDTO,
+)
+from src.gateway.schemas.balances import BalanceReadDTO
 from src.infrastructure.clients import UsersClient, FxClient
+from src.infrastructure.fx.refresher import FxRefresher
+from src.infrastructure.payments.export import MEDIA_TYPES, stream_payments
 
 logstash_handler = AsynchronousLogstashHandler(
     host=settings.LOGSTASH_HOST,
@@ -31,41 +45,107 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Payment Service (async with FX)")
+users_client = UsersClient()
+fx_client = FxClient(upstream_on_miss=not settings.FX_REFRESHER_ENABLED)
+fx_refresher = FxRefresher(fx_client, interval_sec=settings.FX_REFRESH_INTERVAL_SEC)
+bus = bootstrap_async(hook=PromAuditHook(), fx=fx_client, users=users_client, notifier=Notifier())
+outbox_relay = bootstrap_outbox_relay(bus, hook=PromOutboxHook())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up_pools()
+    fx_client.restore()
+    stop = asyncio.Event()
+    relay_task = asyncio.create_task(outbox_relay.run(stop)) if settings.OUTBOX_RELAY_ENABLED else None
+    fx_task = asyncio.create_task(fx_refresher.run(stop)) if settings.FX_REFRESHER_ENABLED else None
+    try:
+        yield
+    finally:
+        stop.set()
+        if relay_task:
+            await relay_task
+        if fx_task:
+            await fx_task
+
+
+app = FastAPI(title="Payment Service (async with FX)", lifespan=lifespan)
 
 app.add_middleware(IdempotencyMiddleware)
 if settings.PROM_ENABLED:
     app.add_middleware(MetricsMiddleware)
 install_exception_handlers(app)
-users_client = UsersClient()
-fx_client = FxClient()
 
 async def get_uow():
     async with AsyncUnitOfWork() as uow:
         yield uow
 
+async def get_read_uow():
+    async with ReadOnlyAsyncUnitOfWork() as uow:
+        yield uow
+
+async def get_bus(uow: Annotated[AsyncUnitOfWork, Depends(get_uow)]) -> AsyncMessageBus:
+    return bus.scope(uow)
+
+def parse_cursor(cursor: str | None, skip: int) -> Cursor | None:
+    if cursor is None:
+        return None
+    if skip:
+        raise HTTPException(400, "cursor and skip cannot be combined")
+    try:
+        return Cursor.decode(cursor)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+
+def set_next_cursor(response: Response, items: list, limit: int) -> list:
+    if len(items) > limit:
+        items = items[:limit]
+        response.headers["X-Next-Cursor"] = Cursor.after(items[-1]).encode()
+    return items
+
 @app.get("/metrics")
 def metrics():
     data, content_type = prom_endpoint()
     return Response(content=data, media_type=content_type)
 
 @app.get("/fx/quote", response_model=FxQuoteDTO)
-async def fx_quote(base: str, quote: str, amount: str):
-    q = await fx_client.convert(base=base, quote=quote, amount=Decimal(amount))
+async def fx_quote(base: str, quote: str, amount: str, at: datetime | None = None):
+    if at is not None:
+        q = await fx_client.historical_quote(base=base, quote=quote, amount=Decimal(amount), at=at)
+        if q is None:
+            raise HTTPException(404, f"No {base}/{quote} rate as of {at.isoformat()}")
+    else:
+        q = await fx_client.convert(base=base, quote=quote, amount=Decimal(amount))
     return FxQuoteDTO(
         base=q.base, quote=q.quote, rate=str(q.rate),
         amount_in=str(q.amount_in), amount_out=str(q.amount_out),
         provider=q.provider, as_of=q.as_of.isoformat()
     )
 
+@app.post("/fx/quotes", response_model=FxQuotesDTO)
+async def fx_quotes(dto: FxQuotesRequestDTO):
+    try:
+        items = [(i.base, i.quote, Decimal(i.amount)) for i in dto.items]
+    except InvalidOperation:
+        raise HTTPException(400, "Invalid amount")
+    if not all(amount.is_finite() for _, _, amount in items):
+        raise HTTPException(400, "Invalid amount")
+    # every line comes from the same snapshot
+    snap, quotes = await fx_client.convert_many(items)
+    return FxQuotesDTO(
+        provider=snap.provider, as_of=snap.as_of.isoformat(),
+        items=[FxQuotesLineDTO(
+            base=q.base, quote=q.quote, rate=str(q.rate),
+            amount_in=str(q.amount_in), amount_out=str(q.amount_out),
+        ) for q in quotes],
+    )
+
 @app.post("/payments", response_model=PaymentReadDTO, status_code=status.HTTP_201_CREATED)
 async def create_payment(
     dto: PaymentCreateDTO,
-    uow: Annotated[AsyncUnitOfWork, Depends(get_uow)],
+    bus: Annotated[AsyncMessageBus, Depends(get_bus)],
 ):
-    hook = PromAuditHook()
-    bus = bootstrap_async(uow, hook=hook, fx=fx_client, users=users_client)
-    [payment_id] = await bus.handle(CreatePayment(
+    [p] = await bus.handle(CreatePayment(
         payer_id=dto.payer_id,
         payee_id=dto.payee_id,
         src_amount=dto.src_amount,
@@ -73,8 +153,6 @@ async def create_payment(
         dst_currency=dto.dst_currency,
         description=dto.description,
     ))
-    p = await uow.payments.get_async(payment_id)
-    if not p: raise HTTPException(500, "Payment not persisted")
     return PaymentReadDTO(
         id=p.id, payer_id=p.payer_id, payee_id=p.payee_id,
         src_amount=str(p.src_amount), src_currency=p.src_currency,
@@ -84,8 +162,54 @@ async def create_payment(
     )
 
 
+@app.get("/payments/export")
+async def export_payments(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    payer_id: UUID | None = Query(None),
+    payee_id: UUID | None = Query(None),
+    status_: str | None = Query(None, alias="status", pattern="^(created|processing|completed|failed|refunded)$"),
+    created_from: datetime | None = Query(None),
+    created_to: datetime | None = Query(None),
+):
+    chunks = stream_payments(
+        format, batch_size=settings.EXPORT_BATCH_SIZE,
+        payer_id=payer_id, payee_id=payee_id, status=status_,
+        created_from=created_from, created_to=created_to,
+    )
+    return StreamingResponse(
+        chunks, media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="payments.{format}"'},
+    )
+
+
+@app.get("/payments/stats", response_model=list[PaymentStatsDTO])
+async def payment_stats(
+    uow: Annotated[ReadOnlyAsyncUnitOfWork, Depends(get_read_uow)],
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    created_from: datetime | None = Query(None),
+    created_to: datetime | None = Query(None),
+    src_currency: str | None = Query(None, min_length=3, max_length=3),
+    dst_currency: str | None = Query(None, min_length=3, max_length=3),
+    status_: str | None = Query(None, alias="status", pattern="^(created|processing|completed|failed|refunded)$"),
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    rows = await uow.rollups.stats(
+        granularity, start=created_from, end=created_to,
+        src_currency=src_currency.upper() if src_currency else None,
+        dst_currency=dst_currency.upper() if dst_currency else None,
+        status=status_, limit=limit,
+    )
+    return [
+        PaymentStatsDTO(
+            bucket=r.bucket.isoformat(), src_currency=r.src_currency, dst_currency=r.dst_currency, status=r.status,
+            count=r.count, src_volume=str(r.src_volume), dst_volume=str(r.dst_volume),
+        )
+        for r in rows
+    ]
+
+
 @app.get("/payments/{payment_id}", response_model=PaymentReadDTO)
-async def get_payment(payment_id: UUID, uow: Annotated[AsyncUnitOfWork, Depends(get_uow)]):
+async def get_payment(payment_id: UUID, uow: Annotated[ReadOnlyAsyncUnitOfWork, Depends(get_read_uow)]):
     p = await uow.payments.get_async(payment_id)
     if not p: raise HTTPException(404, "Payment not found")
     return PaymentReadDTO(
@@ -106,13 +230,22 @@ async def get_payment(payment_id: UUID, uow: Annotated[AsyncUnitOfWork, Depends(
 
 @app.get("/payments", response_model=list[PaymentReadDTO])
 async def list_payments(
-    uow: Annotated[AsyncUnitOfWork, Depends(get_uow)],
+    response: Response,
+    uow: Annotated[ReadOnlyAsyncUnitOfWork, Depends(get_read_uow)],
     payer_id: UUID | None = Query(None),
     payee_id: UUID | None = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None),
+    created_from: datetime | None = Query(None),
+    created_to: datetime | None = Query(None),
 ):
-    items = await uow.payments.list_payments(payer_id=payer_id, payee_id=payee_id, skip=skip, limit=limit)
+    after = parse_cursor(cursor, skip)
+    items = await uow.payments.list_payments(
+        payer_id=payer_id, payee_id=payee_id, skip=skip, limit=limit + 1, after=after,
+        created_from=created_from, created_to=created_to,
+    )
+    items = set_next_cursor(response, items, limit)
     return [
         PaymentReadDTO(
             id=p.id,
@@ -131,30 +264,29 @@ async def list_payments(
         for p in items
     ]
 
+@app.get("/balances/{user_id}", response_model=list[BalanceReadDTO])
+async def get_balances(user_id: UUID, uow: Annotated[ReadOnlyAsyncUnitOfWork, Depends(get_read_uow)]):
+    return [
+        BalanceReadDTO(currency=b.currency, available=str(b.available), pending=str(b.pending))
+        for b in await uow.balances.for_user(user_id)
+    ]
+
 @app.post("/payments/{payment_id}/processing", status_code=204)
-async def mark_processing(payment_id: UUID, uow: Annotated[AsyncUnitOfWork, Depends(get_uow)]):
-    hook = PromAuditHook()
-    bus = bootstrap_async(uow, hook=hook)
+async def mark_processing(payment_id: UUID, bus: Annotated[AsyncMessageBus, Depends(get_bus)]):
     await bus.handle(MarkProcessing(payment_id=payment_id))
     return Response(status_code=204)
 
 @app.post("/payments/{payment_id}/complete", status_code=204)
-async def complete_payment(payment_id: UUID, uow: Annotated[AsyncUnitOfWork, Depends(get_uow)]):
-    hook = PromAuditHook()
-    bus = bootstrap_async(uow, hook=hook)
+async def complete_payment(payment_id: UUID, bus: Annotated[AsyncMessageBus, Depends(get_bus)]):
     await bus.handle(CompletePayment(payment_id=payment_id))
     return Response(status_code=204)
 
 @app.post("/payments/{payment_id}/fail", status_code=204)
-async def fail_payment(payment_id: UUID, uow: Annotated[AsyncUnitOfWork, Depends(get_uow)]):
-    hook = PromAuditHook()
-    bus = bootstrap_async(uow, hook=hook)
+async def fail_payment(payment_id: UUID, bus: Annotated[AsyncMessageBus, Depends(get_bus)]):
     await bus.handle(FailPayment(payment_id=payment_id))
     return Response(status_code=204)
 
 @app.post("/payments/{payment_id}/refund", status_code=204)
-async def refund_payment(payment_id: UUID, original_payment_id: UUID, uow: Annotated[AsyncUnitOfWork, Depends(get_uow)]):
-    hook = PromAuditHook()
-    bus = bootstrap_async(uow, hook=hook)
+async def refund_payment(payment_id: UUID, original_payment_id: UUID, bus: Annotated[AsyncMessageBus, Depends(get_bus)]):
     await bus.handle(RefundPayment(payment_id=payment_id, original_payment_id=original_payment_id))
     return Response(status_code=204)
@@ -0,0 +1,71 @@
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+from src.config import settings
+from src.infrastructure.fx.history import RateHistory
+from src.infrastructure.fx.rates import RateSnapshot
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Maintain the local FX rate history")
+    parser.add_argument("--history", default=settings.FX_HISTORY_PATH, help="history file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill = sub.add_parser("backfill", help="import fixer payloads (latest or historical endpoint responses)")
+    backfill.add_argument("paths", nargs="+", help=".json files with one payload, .ndjson files with one per line, or directories of them")
+    backfill.add_argument("--provider", default="fixer.io")
+    backfill.add_argument("--batch-size", type=int, default=1000, help="versions written per fsync")
+    rate = sub.add_parser("rate", help="print the rate in force at a moment")
+    rate.add_argument("base")
+    rate.add_argument("quote")
+    rate.add_argument("--at", type=datetime.fromisoformat, required=True, help="ISO 8601 timestamp, UTC if naive")
+    return parser.parse_args(argv)
+
+
+def read_payloads(paths: list[str]) -> Iterator[tuple[str, dict]]:
+    for raw in paths:
+        path = Path(raw)
+        files = sorted(p for p in path.rglob("*") if p.suffix in (".json", ".ndjson")) if path.is_dir() else [path]
+        for file in files:
+            with open(file, encoding="utf-8") as f:
+                if file.suffix == ".ndjson":
+                    for lineno, line in enumerate(f, start=1):
+                        if line.strip():
+                            yield f"{file}:{lineno}", json.loads(line)
+                else:
+                    yield str(file), json.load(f)
+
+
+def run(args: argparse.Namespace) -> int:
+    if not args.history:
+        print("FX_HISTORY_PATH is empty, the rate history is disabled", file=sys.stderr)
+        return 2
+    history = RateHistory(args.history)
+    if args.command == "rate":
+        rate = history.rate(args.base.upper(), args.quote.upper(), args.at)
+        if rate is None:
+            print(f"no {args.base}/{args.quote} rate as of {args.at.isoformat()}", file=sys.stderr)
+            return 1
+        print(rate)
+        return 0
+    snaps, rejected = [], 0
+    for source, payload in read_payloads(args.paths):
+        if payload.get("success") is False or "rates" not in payload:
+            print(f"{source}: not a rates payload, skipped", file=sys.stderr)
+            rejected += 1
+            continue
+        try:
+            snaps.append(RateSnapshot.from_payload(payload, provider=args.provider))
+        except (KeyError, ValueError, ArithmeticError) as e:
+            print(f"{source}: {e!r}, skipped", file=sys.stderr)
+            rejected += 1
+    added = sum(history.extend(snaps[i:i + args.batch_size]) for i in range(0, len(snaps), args.batch_size))
+    skipped = len(snaps) - added
+    print(f"added {added} versions, {skipped} already present, {rejected} rejected; {len(history)} in {args.history}")
+    return 1 if rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(parse_args()))
@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import json
+import sys
+from sqlalchemy.exc import IntegrityError
+from src.config import settings
+from src.infrastructure.db_async import ASYNC_ENGINE
+from src.infrastructure.payments.ingest import CONFLICT_MODES, IngestStats, RowError, ingest_payments, read_records
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk-load payments from CSV or NDJSON (the export_payments format)")
+    parser.add_argument("input", help="file to load")
+    parser.add_argument("--format", choices=("ndjson", "csv"), help="guessed from the file extension by default")
+    parser.add_argument("--on-conflict", choices=CONFLICT_MODES, default="error",
+                        help="existing id: fail the batch, keep the stored row or overwrite it")
+    parser.add_argument("--batch-size", type=int, default=settings.INGEST_BATCH_SIZE)
+    parser.add_argument("--max-errors", type=int, default=0, help="invalid rows tolerated before the run stops")
+    parser.add_argument("--rejects", help="NDJSON file collecting invalid rows with the reason")
+    args = parser.parse_args(argv)
+    if args.format is None:
+        args.format = "csv" if args.input.endswith(".csv") else "ndjson"
+    return args
+
+
+def _progress(stats: IngestStats) -> None:
+    print(f"read {stats.read} loaded {stats.loaded} skipped {stats.skipped} rejected {stats.rejected} "
+          f"{stats.rate:.0f} rows/s", file=sys.stderr)
+
+
+async def run(args: argparse.Namespace) -> int:
+    rejects = open(args.rejects, "w") if args.rejects else None
+
+    def reject(lineno: int, raw: dict, error: str) -> None:
+        if rejects:
+            rejects.write(json.dumps({"line": lineno, "error": error, "row": raw}) + "\n")
+
+    try:
+        stats = await ingest_payments(
+            read_records(args.input, args.format),
+            on_conflict=args.on_conflict, batch_size=args.batch_size, max_errors=args.max_errors,
+            on_reject=reject, on_progress=_progress,
+        )
+    except RowError as e:
+        print(f"stopped: {e}", file=sys.stderr)
+        return 1
+    except IntegrityError as e:
+        print(f"stopped: batch rejected by the database, rerun with --on-conflict skip to resume: {e.orig}", file=sys.stderr)
+        return 1
+    finally:
+        if rejects:
+            rejects.close()
+        await ASYNC_ENGINE.dispose()
+    print(f"loaded {stats.loaded} of {stats.read} payments ({stats.skipped} skipped, {stats.rejected} rejected) "
+          f"in {stats.elapsed:.1f}s, {stats.rate:.0f} rows/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
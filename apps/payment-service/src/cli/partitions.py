@@ -0,0 +1,50 @@
+import argparse
+import asyncio
+import sys
+from src.config import settings
+from src.infrastructure.db_async import ASYNC_ENGINE
+from src.infrastructure.payments.partitions import detach_partitions, ensure_partitions, is_partitioned, list_partitions
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Maintain the monthly partitions of payments (PostgreSQL)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="show the month partitions")
+    ensure = argparse.ArgumentParser(add_help=False)
+    ensure.add_argument("--months-ahead", type=int, default=settings.PAYMENTS_PARTITION_MONTHS_AHEAD)
+    detach = argparse.ArgumentParser(add_help=False)
+    detach.add_argument("--retain-months", type=int, default=settings.PAYMENTS_PARTITION_RETAIN_MONTHS,
+                        help="past months kept attached besides the current one; 0 detaches nothing")
+    detach.add_argument("--drop", action="store_true", help="drop detached partitions instead of keeping them as tables")
+    sub.add_parser("ensure", parents=[ensure], help="create partitions up to --months-ahead")
+    sub.add_parser("detach", parents=[detach], help="detach partitions older than --retain-months")
+    sub.add_parser("maintain", parents=[ensure, detach], help="ensure, then detach; meant for a daily cron")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> int:
+    try:
+        async with ASYNC_ENGINE.connect() as conn:
+            async with conn.begin():
+                partitioned = await is_partitioned(conn)
+            if not partitioned:
+                print("payments is not partitioned on this database, nothing to do", file=sys.stderr)
+                return 0
+            if args.command == "list":
+                async with conn.begin():
+                    for month, name in (await list_partitions(conn)).items():
+                        print(f"{month:%Y-%m} {name}")
+                return 0
+            if args.command in ("ensure", "maintain"):
+                created = await ensure_partitions(conn, args.months_ahead)
+                print(f"created {len(created)} partitions: {', '.join(created) or '-'}")
+            if args.command in ("detach", "maintain") and args.retain_months > 0:
+                detached = await detach_partitions(conn, args.retain_months, drop=args.drop)
+                print(f"{'dropped' if args.drop else 'detached'} {len(detached)} partitions: {', '.join(detached) or '-'}")
+        return 0
+    finally:
+        await ASYNC_ENGINE.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -0,0 +1,49 @@
+import argparse
+import asyncio
+import sys
+from src.infrastructure.async_unit_of_work import AsyncUnitOfWork
+from src.infrastructure.balances.rebuild import rebuild_balances
+from src.infrastructure.db_async import ASYNC_ENGINE
+from src.infrastructure.rollups.rebuild import rebuild_rollups
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Maintain read-side projections")
+    rebuild = argparse.ArgumentParser(add_help=False)
+    rebuild.add_argument("--chunks", type=int, default=8, help="created_at windows aggregated separately")
+    rebuild.add_argument("--workers", type=int, default=4, help="windows aggregated concurrently")
+    rebuild.add_argument("--force", action="store_true", help="rebuild even if the outbox has undelivered events")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild-balances", parents=[rebuild], help="recompute balances from the payments history")
+    sub.add_parser("rebuild-rollups", parents=[rebuild], help="recompute hourly and daily payment rollups from the payments history")
+    return parser.parse_args(argv)
+
+
+async def _outbox_pending() -> int:
+    async with AsyncUnitOfWork() as uow:
+        pending, _ = await uow.outbox.backlog()
+    return pending
+
+
+async def run(args: argparse.Namespace) -> int:
+    try:
+        # undelivered events would be applied on top of a history that already contains them;
+        # stop the relays and let the outbox drain before rebuilding. Archived payments are read
+        # from the segments, so archive_payments must not run at the same time either
+        pending = await _outbox_pending()
+        if pending and not args.force:
+            print(f"outbox has {pending} undelivered events, drain it first or pass --force", file=sys.stderr)
+            return 1
+        if args.command == "rebuild-balances":
+            rows = await rebuild_balances(chunks=args.chunks, workers=args.workers)
+            print(f"rebuilt {rows} balances")
+        elif args.command == "rebuild-rollups":
+            counts = await rebuild_rollups(chunks=args.chunks, workers=args.workers)
+            print(f"rebuilt {counts['hour']} hourly and {counts['day']} daily rollups")
+        return 0
+    finally:
+        await ASYNC_ENGINE.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -10,6 +10,15 @@ class Settings(BaseModel):
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./payment_service.db")
     DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
     DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+    DB_POOL_RECYCLE_SEC: int = int(os.getenv("DB_POOL_RECYCLE_SEC", "1800"))
+    DB_POOL_WARMUP: int = int(os.getenv("DB_POOL_WARMUP", os.getenv("DB_POOL_SIZE", "10")))
+    DB_QUERY_CACHE_SIZE: int = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "500"))
+    DATABASE_REPLICA_URLS: list[str] = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+    DB_REPLICA_STRATEGY: str = os.getenv("DB_REPLICA_STRATEGY", "round_robin")
+    DB_REPLICA_EJECT_SEC: float = float(os.getenv("DB_REPLICA_EJECT_SEC", "30"))
 
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOGSTASH_HOST: str | None = os.getenv("LOGSTASH_HOST")
@@ -21,11 +30,64 @@ class Settings(BaseModel):
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://redis:6379/0")
     IDEMPOTENCY_TTL_SEC: int = int(os.getenv("IDEMPOTENCY_TTL_SEC", "600"))
 
+    OUTBOX_RELAY_ENABLED: bool = os.getenv("OUTBOX_RELAY_ENABLED", "1") == "1"
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_POLL_INTERVAL_SEC: float = float(os.getenv("OUTBOX_POLL_INTERVAL_SEC", "1.0"))
+    # a failed event is retried after RETRY_BASE_SEC * 2^(attempts-1), at most RETRY_MAX_SEC,
+    # and dead-lettered after MAX_ATTEMPTS failures
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+    OUTBOX_RETRY_BASE_SEC: float = float(os.getenv("OUTBOX_RETRY_BASE_SEC", "1.0"))
+    OUTBOX_RETRY_MAX_SEC: float = float(os.getenv("OUTBOX_RETRY_MAX_SEC", "300"))
+
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+    EXPORT_PARQUET_DIR: str = os.getenv("EXPORT_PARQUET_DIR", "./exports/payments")
+    EXPORT_PARQUET_BATCH_SIZE: int = int(os.getenv("EXPORT_PARQUET_BATCH_SIZE", "50000"))
+    EXPORT_PARQUET_LAG_SEC: float = float(os.getenv("EXPORT_PARQUET_LAG_SEC", "60"))
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", "10000"))
+    PAYMENTS_PARTITION_MONTHS_AHEAD: int = int(os.getenv("PAYMENTS_PARTITION_MONTHS_AHEAD", "3"))
+    # 0 keeps every month attached
+    PAYMENTS_PARTITION_RETAIN_MONTHS: int = int(os.getenv("PAYMENTS_PARTITION_RETAIN_MONTHS", "0"))
+    # empty disables the archive fallback in the repository
+    PAYMENTS_ARCHIVE_DIR: str = os.getenv("PAYMENTS_ARCHIVE_DIR", "./archive/payments")
+    PAYMENTS_ARCHIVE_AFTER_DAYS: int = int(os.getenv("PAYMENTS_ARCHIVE_AFTER_DAYS", "365"))
+    PAYMENTS_ARCHIVE_BLOCK_ROWS: int = int(os.getenv("PAYMENTS_ARCHIVE_BLOCK_ROWS", "512"))
+    PAYMENTS_ARCHIVE_SEGMENT_ROWS: int = int(os.getenv("PAYMENTS_ARCHIVE_SEGMENT_ROWS", "500000"))
+
     USER_SERVICE_URL: str = os.getenv("USER_SERVICE_URL", "http://user-service:8001")
 
     FX_BASE_URL: str = os.getenv("FX_BASE_URL", "http://data.fixer.io/api/")
     FX_API_TOKEN: str = os.getenv("FX_API_TOKEN", "822e347d43055ae0e7bba93275a1d090")
     FX_TIMEOUT_SEC: float = float(os.getenv("FX_TIMEOUT_SEC", "3.0"))
+    # rate providers in the order they are asked: fixer, openexchangerates
+    FX_PROVIDERS: str = os.getenv("FX_PROVIDERS", "fixer")
+    FX_OXR_BASE_URL: str = os.getenv("FX_OXR_BASE_URL", "https://openexchangerates.org/api")
+    FX_OXR_APP_ID: str = os.getenv("FX_OXR_APP_ID", "")
+    # the next provider is asked when the current one has not answered within this percentile
+    # of its own recent latency (clamped to MIN..MAX); a provider at ERROR_RATE over its last
+    # WINDOW requests (at least MIN_REQUESTS) is skipped for EJECT_SEC
+    FX_HEDGE_PERCENTILE: float = float(os.getenv("FX_HEDGE_PERCENTILE", "0.95"))
+    FX_HEDGE_MIN_DELAY_SEC: float = float(os.getenv("FX_HEDGE_MIN_DELAY_SEC", "0.05"))
+    FX_HEDGE_MAX_DELAY_SEC: float = float(os.getenv("FX_HEDGE_MAX_DELAY_SEC", "1.0"))
+    FX_EJECT_ERROR_RATE: float = float(os.getenv("FX_EJECT_ERROR_RATE", "0.5"))
+    FX_EJECT_WINDOW: int = int(os.getenv("FX_EJECT_WINDOW", "50"))
+    FX_EJECT_MIN_REQUESTS: int = int(os.getenv("FX_EJECT_MIN_REQUESTS", "5"))
+    FX_EJECT_SEC: float = float(os.getenv("FX_EJECT_SEC", "30"))
+    # shared Redis copy of the last upstream payload
+    FX_CACHE_TTL_SEC: int = int(os.getenv("FX_CACHE_TTL_SEC", "10"))
+    # in-process rate table: served as is for FRESH, then up to STALE more while refreshing
+    FX_RATES_FRESH_SEC: float = float(os.getenv("FX_RATES_FRESH_SEC", "10"))
+    FX_RATES_STALE_SEC: float = float(os.getenv("FX_RATES_STALE_SEC", "300"))
+    # on-disk copies of the last rate versions, restored at startup ("" disables)
+    FX_SNAPSHOT_DIR: str = os.getenv("FX_SNAPSHOT_DIR", "./data/fx")
+    FX_SNAPSHOT_KEEP: int = int(os.getenv("FX_SNAPSHOT_KEEP", "48"))
+    # append-only history of every rate version, for refunds and backdated quotes ("" disables)
+    FX_HISTORY_PATH: str = os.getenv("FX_HISTORY_PATH", "./data/fx/history.fxh")
+    # background refresher (API process): one instance per interval fetches upstream under a
+    # Redis lease and publishes the payload; keep the interval below FX_CACHE_TTL_SEC and FRESH
+    FX_REFRESHER_ENABLED: bool = os.getenv("FX_REFRESHER_ENABLED", "1") == "1"
+    FX_REFRESH_INTERVAL_SEC: float = float(os.getenv("FX_REFRESH_INTERVAL_SEC", "5"))
+    # max items per POST /fx/quotes request
+    FX_QUOTES_MAX_ITEMS: int = int(os.getenv("FX_QUOTES_MAX_ITEMS", "10000"))
 
     DEFAULT_FEE_PERCENT: float = float(os.getenv("DEFAULT_FEE_PERCENT", "0.0"))
     DEFAULT_FEE_FIXED: str = os.getenv("DEFAULT_FEE_FIXED", "0.00")
@@ -3,10 +3,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
-from typing import Protocol, Optional
+from typing import Mapping, Protocol, Optional
 from uuid import UUID
 
+from patterns.pagination import Cursor
+from src.domains.payments.balances import Balance, BalanceDelta, BalanceKey
 from src.domains.payments.model import Payment
+from src.domains.payments.rollups import Rollup, RollupDelta, RollupKey
 
 
 class IPaymentRepository(Protocol):
@@ -19,10 +22,33 @@ class IPaymentRepository(Protocol):
         payee_id: UUID | None = None,
         skip: int = 0,
         limit: int = 50,
+        after: Cursor | None = None,
+        created_from: datetime | None = None,
+        created_to: datetime | None = None,
     ) -> list[Payment]: ...
     async def remove(self, payment_id: UUID) -> None: ...
 
 
+class IBalanceProjection(Protocol):
+    async def apply(self, deltas: Mapping[BalanceKey, BalanceDelta]) -> None: ...
+    async def for_user(self, user_id: UUID) -> list[Balance]: ...
+
+
+class IRollupProjection(Protocol):
+    async def apply(self, granularity: str, deltas: Mapping[RollupKey, RollupDelta]) -> None: ...
+    async def stats(
+        self,
+        granularity: str,
+        *,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        src_currency: str | None = None,
+        dst_currency: str | None = None,
+        status: str | None = None,
+        limit: int = 1000,
+    ) -> list[Rollup]: ...
+
+
 class IUsersClient(Protocol):
     async def user_exists(self, user_id: UUID) -> bool: ...
 
@@ -38,6 +64,7 @@ class FxQuote:
 
 class IFxClient(Protocol):
     async def convert(self, *, base: str, quote: str, amount: Decimal) -> FxQuote: ...
+    async def historical_rate(self, *, base: str, quote: str, at: datetime) -> Optional[Decimal]: ...
 
 class INotifier(Protocol):
     async def transaction_status(self, *, tx_id: str, status: str, amount: str, from_acc: str, to_acc: str) -> None: ...
@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from uuid import UUID
+
+from src.domains.payments.model import Status
+
+# share of a payment's amount counted as (available, pending) while it sits in each status.
+# A refunded payment stays settled: the reversal payment created for it moves the money back.
+BALANCE_WEIGHTS: dict[Status, tuple[int, int]] = {
+    Status.CREATED: (0, 1),
+    Status.PROCESSING: (0, 1),
+    Status.COMPLETED: (1, 0),
+    Status.REFUNDED: (1, 0),
+    Status.FAILED: (0, 0),
+}
+
+BalanceKey = tuple[UUID, str]
+BalanceDelta = tuple[Decimal, Decimal]
+
+
+@dataclass(frozen=True, slots=True)
+class Balance:
+    user_id: UUID
+    currency: str
+    available: Decimal
+    pending: Decimal
+
+
+def balance_deltas(
+    *,
+    payer_id: UUID | None,
+    payee_id: UUID | None,
+    src_amount: Decimal,
+    src_currency: str,
+    dst_amount: Decimal,
+    dst_currency: str,
+    old_status: Status | None,
+    new_status: Status,
+) -> dict[BalanceKey, BalanceDelta]:
+    old = BALANCE_WEIGHTS[old_status] if old_status else (0, 0)
+    new = BALANCE_WEIGHTS[new_status]
+    d_available, d_pending = new[0] - old[0], new[1] - old[1]
+    deltas: dict[BalanceKey, BalanceDelta] = {}
+    if not d_available and not d_pending:
+        return deltas
+    for user_id, currency, amount in ((payer_id, src_currency, -src_amount), (payee_id, dst_currency, dst_amount)):
+        if user_id is None:
+            continue
+        available, pending = deltas.get((user_id, currency), (Decimal(0), Decimal(0)))
+        deltas[(user_id, currency)] = (available + amount * d_available, pending + amount * d_pending)
+    return deltas
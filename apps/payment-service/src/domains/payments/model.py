@@ -8,9 +8,6 @@ from patterns.aggregator import AbstractAggregate
 from patterns.message import Event
 
 from src.dto.commands import (
-    CompletePayment,
-    FailPayment,
-    MarkProcessing,
     PaymentCreated,
     PaymentRefunded,
     PaymentStatusChanged
@@ -81,11 +78,13 @@ class Payment(AbstractAggregate):
         fx_provider: str,
         fx_at: datetime,
         description: str | None = None,
+        payment_id: UUID | None = None,
     ) -> "Payment":
         if src_amount <= 0:
             raise ValueError("Amount must be positive")
 
         obj = cls(
+            payment_id=payment_id,
             payer_id=payer_id,
             payee_id=payee_id,
             src_amount=src_amount,
@@ -148,31 +147,29 @@ class Payment(AbstractAggregate):
 
     def mark_processing(self) -> None:
         self.transition(Status.PROCESSING)
-        self._touch()
-        self._record_event(MarkProcessing(payment_id=self.id))
 
     def complete(self) -> None:
         self.transition(Status.COMPLETED)
-        self._touch()
-        self._record_event(CompletePayment(payment_id=self.id))
 
     def fail(self) -> None:
         self.transition(Status.FAILED)
-        self._touch()
-        self._record_event(FailPayment(payment_id=self.id))
 
     def refund(self, *, original_payment_id: UUID) -> None:
         if self._status != Status.COMPLETED:
             raise ValueError("Only completed payments can be refunded")
         self._is_reversal = True
+        self._mark_dirty("is_reversal")
         self.transition(Status.REFUNDED)
         self._record_event(PaymentRefunded(payment_id=self.id, original_payment_id=original_payment_id))
 
     def transition(self, new_status: Status) -> None:
         if self._status == new_status:
             return
+        old_status = self._status
         self._status = new_status
-        self._touch()
+        self._touch("status")
+        self._record_event(PaymentStatusChanged(payment_id=self.id, old_status=old_status.value, new_status=new_status.value))
 
-    def _touch(self) -> None:
+    def _touch(self, *fields: str) -> None:
         self._updated_at = datetime.now(timezone.utc)
+        self._mark_dirty("updated_at", *fields)
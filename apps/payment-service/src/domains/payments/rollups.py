@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from src.domains.payments.model import Status
+
+GRANULARITIES = ("hour", "day")
+
+RollupKey = tuple[datetime, str, str, str]
+RollupDelta = tuple[int, Decimal, Decimal]
+
+
+@dataclass(frozen=True, slots=True)
+class Rollup:
+    bucket: datetime
+    src_currency: str
+    dst_currency: str
+    status: str
+    count: int
+    src_volume: Decimal
+    dst_volume: Decimal
+
+
+def bucket(ts: datetime, granularity: str) -> datetime:
+    ts = ts.astimezone(timezone.utc) if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+    if granularity == "day":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_deltas(
+    *,
+    granularity: str,
+    created_at: datetime,
+    src_amount: Decimal,
+    src_currency: str,
+    dst_amount: Decimal,
+    dst_currency: str,
+    old_status: Status | None,
+    new_status: Status,
+) -> dict[RollupKey, RollupDelta]:
+    # a payment is counted once, in the bucket of its created_at under its current status,
+    # so a status change moves it from one row of that bucket to another
+    at = bucket(created_at, granularity)
+    deltas: dict[RollupKey, RollupDelta] = {
+        (at, src_currency, dst_currency, new_status.value): (1, src_amount, dst_amount)
+    }
+    if old_status is not None and old_status != new_status:
+        deltas[(at, src_currency, dst_currency, old_status.value)] = (-1, -src_amount, -dst_amount)
+    return deltas
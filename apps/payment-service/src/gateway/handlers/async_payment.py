@@ -1,8 +1,10 @@
-from decimal import Decimal, InvalidOperation
-from uuid import UUID
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from uuid import UUID, uuid5
 
 from patterns.unit_of_work import AsyncAbstractUnitOfWork
 
+from src.domains.payments.balances import balance_deltas
+from src.domains.payments.rollups import GRANULARITIES, rollup_deltas
 from src.domains.payments.model import Payment, Status
 from src.dto.commands import (
     CreatePayment,
@@ -27,8 +29,7 @@ async def handle_create_payment(
     uow: AsyncAbstractUnitOfWork,
     users: IUsersClient,
     fx: IFxClient,
-    notifier: INotifier | None = None,
-) -> UUID:
+) -> Payment:
     if not await users.user_exists(cmd.payer_id):
         raise NotFound("Payer not found")
     if not await users.user_exists(cmd.payee_id):
@@ -50,19 +51,9 @@ async def handle_create_payment(
         description=cmd.description,
     )
 
-    await uow.payments.add(payment)
+    uow.payments.add(payment)
     await uow.commit()
-
-    if notifier:
-        await notifier.transaction_status(
-            tx_id=str(payment.id),
-            status="created",
-            amount=f"{payment.src_amount} {payment.src_currency} → {payment.dst_amount} {payment.dst_currency} @ {payment.fx_rate}",
-            from_acc=str(payment.payer_id),
-            to_acc=str(payment.payee_id),
-        )
-
-    return payment.id
+    return payment
 
 
 async def handle_mark_processing(cmd: MarkProcessing, uow: AsyncAbstractUnitOfWork) -> None:
@@ -74,76 +65,98 @@ async def handle_mark_processing(cmd: MarkProcessing, uow: AsyncAbstractUnitOfWo
     await uow.commit()
 
 
-async def handle_complete(cmd: CompletePayment, uow: AsyncAbstractUnitOfWork, notifier: INotifier | None = None) -> None:
+async def handle_complete(cmd: CompletePayment, uow: AsyncAbstractUnitOfWork) -> None:
     p = await uow.payments.get_async(cmd.payment_id)
     if not p:
         raise NotFound("Payment not found")
     p.complete()
     await uow.payments.save(p)
     await uow.commit()
-    if notifier:
-        await notifier.transaction_status(
-            tx_id=str(p.id),
-            status="completed",
-            amount=f"{p.src_amount} {p.src_currency} → {p.dst_amount} {p.dst_currency} @ {p.fx_rate}",
-            from_acc=str(p.payer_id),
-            to_acc=str(p.payee_id),
-        )
 
 
-async def handle_fail(cmd: FailPayment, uow: AsyncAbstractUnitOfWork, notifier: INotifier | None = None) -> None:
+async def handle_fail(cmd: FailPayment, uow: AsyncAbstractUnitOfWork) -> None:
     p = await uow.payments.get_async(cmd.payment_id)
     if not p:
         raise NotFound("Payment not found")
     p.fail()
     await uow.payments.save(p)
     await uow.commit()
-    if notifier:
-        await notifier.transaction_status(
-            tx_id=str(p.id),
-            status="failed",
-            amount=f"{p.src_amount} {p.src_currency} → {p.dst_amount} {p.dst_currency} @ {p.fx_rate}",
-            from_acc=str(p.payer_id),
-            to_acc=str(p.payee_id),
-        )
 
 
-async def handle_refund(cmd: RefundPayment, uow: AsyncAbstractUnitOfWork, notifier: INotifier | None = None) -> None:
+async def handle_refund(cmd: RefundPayment, uow: AsyncAbstractUnitOfWork) -> None:
     p = await uow.payments.get_async(cmd.payment_id)
     if not p:
         raise NotFound("Payment not found")
     p.refund(original_payment_id=cmd.original_payment_id)
     await uow.payments.save(p)
     await uow.commit()
+
+async def _project(uow: AsyncAbstractUnitOfWork, p: Payment, old_status: Status | None, new_status: Status) -> None:
+    await uow.balances.apply(balance_deltas(
+        payer_id=p.payer_id,
+        payee_id=p.payee_id,
+        src_amount=p.src_amount,
+        src_currency=p.src_currency,
+        dst_amount=p.dst_amount,
+        dst_currency=p.dst_currency,
+        old_status=old_status,
+        new_status=new_status,
+    ))
+    for granularity in GRANULARITIES:
+        await uow.rollups.apply(granularity, rollup_deltas(
+            granularity=granularity,
+            created_at=p.created_at,
+            src_amount=p.src_amount,
+            src_currency=p.src_currency,
+            dst_amount=p.dst_amount,
+            dst_currency=p.dst_currency,
+            old_status=old_status,
+            new_status=new_status,
+        ))
+
+async def on_payment_created(evt: PaymentCreated, uow: AsyncAbstractUnitOfWork, notifier: INotifier | None = None) -> None:
+    p = await uow.payments.get_async(evt.payment_id)
+    if not p:
+        raise NotFound("Payment not found")
+    await _project(uow, p, None, Status.CREATED)
     if notifier:
         await notifier.transaction_status(
-            tx_id=str(p.id),
-            status="refunded",
-            amount=f"{p.src_amount} {p.src_currency} → {p.dst_amount} {p.dst_currency} @ {p.fx_rate}",
-            from_acc=str(p.payer_id),
-            to_acc=str(p.payee_id),
+            tx_id=str(evt.payment_id),
+            status="created",
+            amount=f"{evt.src_amount} {evt.src_currency} → {evt.dst_amount} {evt.dst_currency} @ {evt.fx_rate}",
+            from_acc=str(evt.payer_id),
+            to_acc=str(evt.payee_id),
         )
 
-async def on_payment_created(evt: PaymentCreated) -> None: ... # в будущем: обновление баланса
-
-async def on_payment_status_changed(evt: PaymentStatusChanged, uow: AsyncAbstractUnitOfWork) -> None:
+async def on_payment_status_changed(evt: PaymentStatusChanged, uow: AsyncAbstractUnitOfWork, notifier: INotifier | None = None) -> None:
     p = await uow.payments.get_async(evt.payment_id)
     if not p:
+        raise NotFound("Payment not found")
+    await _project(uow, p, Status(evt.old_status), Status(evt.new_status))
+    if not notifier:
         return
-    try:
-        new_status = Status(evt.new_status)
-    except ValueError:
-        raise NotFound("Status not found")
-    p.trasition(new_status)
-    await uow.payments.save(p)
-    await uow.commit()
+    await notifier.transaction_status(
+        tx_id=str(p.id),
+        status=evt.new_status,
+        amount=f"{p.src_amount} {p.src_currency} → {p.dst_amount} {p.dst_currency} @ {p.fx_rate}",
+        from_acc=str(p.payer_id),
+        to_acc=str(p.payee_id),
+    )
 
-async def on_payment_refunded(evt: PaymentRefunded, uow: AsyncAbstractUnitOfWork) -> None:
+async def on_payment_refunded(evt: PaymentRefunded, uow: AsyncAbstractUnitOfWork, fx: IFxClient) -> None:
     original = await uow.payments.get_async(evt.payment_id)
     if not original:
         raise NotFound("Payment not found")
+    # the reversal id is derived from the original, so a redelivered event finds it instead
+    # of paying the refund out twice
+    reversal_id = uuid5(original.id, "reversal")
+    if await uow.payments.get_async(reversal_id) is not None:
+        return
+    # the reverse rate of the version the payment was quoted at; 1 / fx_rate only when the
+    # rate history does not cover fx_at (fx_rate is rounded to 8 places, its inverse drifts)
+    rate = await fx.historical_rate(base=original.dst_currency, quote=original.src_currency, at=original.fx_at)
     try:
-        inv_rate = (Decimal("1") / original.fx_rate).quantize(Decimal("0.00000001"), rounding=ROUND_HALF_UP)
+        inv_rate = (rate or Decimal("1") / original.fx_rate).quantize(Decimal("0.00000001"), rounding=ROUND_HALF_UP)
     except (InvalidOperation, ZeroDivisionError):
         inv_rate = Decimal("1.0")
 
@@ -158,15 +171,15 @@ async def on_payment_refunded(evt: PaymentRefunded, uow: AsyncAbstractUnitOfWork
         fx_provider=original.fx_provider,
         fx_at=original.fx_at,
         description=f"Refund of {original.id}",
+        payment_id=reversal_id,
     )
     reversal._is_reversal = True
 
     reversal.mark_processing()
     reversal.complete()
 
-    original._status = Status.REFUNDED
-    original._updated_at = datetime.now(timezone.utc)
+    original.transition(Status.REFUNDED)
 
+    # no commit here: the relay commits these writes together with marking the event published
     await uow.payments.save(reversal)
     await uow.payments.save(original)
-    await uow.commit()
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+class BalanceReadDTO(BaseModel):
+    currency: str
+    available: str
+    pending: str
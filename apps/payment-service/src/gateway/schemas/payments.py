@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from uuid import UUID
+from src.config import settings
 
 class PaymentCreateDTO(BaseModel):
     payer_id: UUID
@@ -31,3 +32,32 @@ class FxQuoteDTO(BaseModel):
     amount_out: str
     provider: str
     as_of: str
+
+class FxQuotesItemDTO(BaseModel):
+    base: str = Field(min_length=3, max_length=3)
+    quote: str = Field(min_length=3, max_length=3)
+    amount: str
+
+class FxQuotesRequestDTO(BaseModel):
+    items: list[FxQuotesItemDTO] = Field(max_length=settings.FX_QUOTES_MAX_ITEMS)
+
+class FxQuotesLineDTO(BaseModel):
+    base: str
+    quote: str
+    rate: str
+    amount_in: str
+    amount_out: str
+
+class FxQuotesDTO(BaseModel):
+    provider: str
+    as_of: str
+    items: list[FxQuotesLineDTO]
+
+class PaymentStatsDTO(BaseModel):
+    bucket: str
+    src_currency: str
+    dst_currency: str
+    status: str
+    count: int
+    src_volume: str
+    dst_volume: str
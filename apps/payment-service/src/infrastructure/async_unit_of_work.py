@@ -1,11 +1,16 @@
-from typing import Tuple
+from typing import Generator, Tuple
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from patterns.message import Event
 from patterns.repository import AbstractRepository
 from patterns.unit_of_work import AsyncAbstractUnitOfWork
 from patterns.observability import ObservabilityHook, NoopHook
-from src.infrastructure.db_async import AsyncSessionLocal
+from src.infrastructure.db_async import AsyncSessionLocal, ReadSessionLocal
+from src.infrastructure.payments.archive import ARCHIVE
 from src.repository.sqlalchemy_async import SqlAlchemyAsyncPaymentRepository
+from src.repository.sqlalchemy_balances import SqlAlchemyAsyncBalances
+from src.repository.sqlalchemy_rollups import SqlAlchemyAsyncRollups
+from src.repository.sqlalchemy_outbox import SqlAlchemyAsyncOutbox
 from src.domains.common.exceptions import  DatabaseConflict
 
 
@@ -17,7 +22,10 @@ class AsyncUnitOfWork(AsyncAbstractUnitOfWork):
 
     async def __aenter__(self) -> "AsyncUnitOfWork":
         self.session = self._session_factory()
-        self.payments = SqlAlchemyAsyncPaymentRepository(self.session)
+        self.payments = SqlAlchemyAsyncPaymentRepository(self.session, archive=ARCHIVE)
+        self.outbox = SqlAlchemyAsyncOutbox(self.session)
+        self.balances = SqlAlchemyAsyncBalances(self.session)
+        self.rollups = SqlAlchemyAsyncRollups(self.session)
         self.repositories: Tuple[AbstractRepository, ...] = (self.payments,)
         return self
 
@@ -31,9 +39,15 @@ class AsyncUnitOfWork(AsyncAbstractUnitOfWork):
             if self.session:
                 await self.session.close()
 
+    def collect_new_events(self) -> Generator[Event, None, None]:
+        # events are not dispatched inline: _commit writes them to the outbox for the relay
+        yield from ()
+
     async def _commit(self) -> None:
         try:
             if self.session:
+                for agg, event in self._drain_events():
+                    self.outbox.add(str(agg.id), event)
                 await self.session.commit()
         except IntegrityError as e:
             raise DatabaseConflict("Database conflict")
@@ -41,3 +55,16 @@ class AsyncUnitOfWork(AsyncAbstractUnitOfWork):
     async def _rollback(self) -> None:
         if self.session:
             await self.session.rollback()
+
+
+class ReadOnlyAsyncUnitOfWork(AsyncUnitOfWork):
+    def __init__(self, session_factory=ReadSessionLocal) -> None:
+        super().__init__(session_factory)
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        # nothing to flush or commit: closing ends the read transaction and returns the connection
+        if self.session:
+            await self.session.close()
+
+    async def _commit(self) -> None:
+        raise RuntimeError("Read-only unit of work cannot commit")
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, DateTime, Numeric, String, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.sql import func
+from src.infrastructure.db_async import Base
+
+
+class BalanceORM(Base):
+    __tablename__ = "balances"
+    user_id = Column(PG_UUID, primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    available = Column(Numeric(18, 2), nullable=False, server_default=text("0"))
+    pending = Column(Numeric(18, 2), nullable=False, server_default=text("0"))
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.current_timestamp())
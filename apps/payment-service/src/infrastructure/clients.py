@@ -1,15 +1,24 @@
 from uuid import UUID
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Literal, Optional, Dict, Any
+from typing import Literal, Optional, Dict, Any, Sequence
 from decimal import Decimal
 import asyncio
 import aiohttp
 import json
+import logging
 import time
 
 import redis.asyncio as redis
 from src.config import settings
+from src.infrastructure.fx.rates import RateSnapshot, RateTable
+from src.infrastructure.fx.history import RateHistory
+from src.infrastructure.fx.providers import HedgedFetcher, RateProvider, build_providers
+from src.infrastructure.fx.snapshots import SnapshotStore
+
+FX_PAYLOAD_KEY = "fx:fixer:latest"
+
+log = logging.getLogger("fx")
 
 
 class UsersClient:
@@ -37,36 +46,91 @@ class FxQuote:
 class FxClient:
     def __init__(
         self,
-        api_key: str = settings.FX_API_TOKEN,
+        providers: Optional[Sequence[RateProvider]] = None,
         redis_url: str = settings.REDIS_URL,
-        http_timeout_sec: float = 3.0,
+        http_timeout_sec: float = settings.FX_TIMEOUT_SEC,
+        fresh_sec: float = settings.FX_RATES_FRESH_SEC,
+        stale_sec: float = settings.FX_RATES_STALE_SEC,
+        upstream_on_miss: bool = True,
+        snapshot_dir: str = settings.FX_SNAPSHOT_DIR,
+        history_path: str = settings.FX_HISTORY_PATH,
     ) -> None:
-        self.api_key = api_key.strip("/")
-        self.http_timeout = aiohttp.ClientTimeout(total=http_timeout_sec)
+        self.upstream = HedgedFetcher(
+            build_providers(settings.FX_PROVIDERS) if providers is None else providers,
+            timeout_sec=http_timeout_sec,
+            hedge_percentile=settings.FX_HEDGE_PERCENTILE,
+            min_delay_sec=settings.FX_HEDGE_MIN_DELAY_SEC,
+            max_delay_sec=settings.FX_HEDGE_MAX_DELAY_SEC,
+            window=settings.FX_EJECT_WINDOW,
+            min_requests=settings.FX_EJECT_MIN_REQUESTS,
+            max_error_rate=settings.FX_EJECT_ERROR_RATE,
+            eject_sec=settings.FX_EJECT_SEC,
+        )
         self.r = redis.from_url(redis_url, encoding="utf-8", decode_responses=True)
+        # with a background refresher feeding Redis (src.infrastructure.fx.refresher) requests
+        # never go upstream themselves: a Redis miss fails fast instead
+        self.upstream_on_miss = upstream_on_miss
+        # every new rate version is also written to disk: as the latest snapshot (see restore())
+        # and into the rate history that refunds and backdated quotes read
+        self.snapshots = SnapshotStore(snapshot_dir, keep=settings.FX_SNAPSHOT_KEEP) if snapshot_dir else None
+        self.history = RateHistory(history_path) if history_path else None
+        self._writes: set[asyncio.Task] = set()
+        # conversions read this table; Redis and the upstream are only touched by its refreshes
+        self.rates = RateTable(
+            self._get_payload, fresh_sec=fresh_sec, stale_sec=stale_sec,
+            on_update=self._persist if self.snapshots or self.history else None,
+        )
+
+    def _persist(self, snap: RateSnapshot) -> None:
+        # called by the rate table from the event loop; writes and fsyncs happen in a thread
+        task = asyncio.get_running_loop().create_task(asyncio.to_thread(self._save, snap))
+        self._writes.add(task)
+        task.add_done_callback(self._saved)
+
+    def _save(self, snap: RateSnapshot) -> None:
+        if self.snapshots:
+            self.snapshots.save(snap)
+        if self.history:
+            self.history.append(snap)
+
+    def _saved(self, task: asyncio.Task) -> None:
+        self._writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.warning("fx.snapshot.save_failed", extra={"audit": {
+                "type": "fx.snapshot.save_failed", "error": repr(task.exception()),
+            }})
+
+    def restore(self) -> Optional[RateSnapshot]:
+        # startup: the newest snapshot on disk goes into the table keeping its age, so it is
+        # served (and refreshed in the background) while younger than FRESH + STALE seconds
+        found = self.snapshots.latest() if self.snapshots else None
+        if found is None:
+            return None
+        snap, saved_at = found
+        age = time.time() - saved_at
+        if age >= self.rates.fresh_sec + self.rates.stale_sec:
+            log.info("fx.snapshot.expired", extra={"audit": {"type": "fx.snapshot.expired", "version": snap.version, "age_sec": round(age)}})
+            return None
+        log.info("fx.snapshot.restored", extra={"audit": {"type": "fx.snapshot.restored", "version": snap.version, "age_sec": round(age)}})
+        return self.rates.install(snap)
+
+    async def get_cached_payload(self) -> Optional[Dict[str, Any]]:
+        cached = await self.r.get(FX_PAYLOAD_KEY)
+        return json.loads(cached) if cached else None
 
     async def _get_payload(self) -> Dict[str, Any]:
-        cached = await self.r.get("fx:fixer:latest")
+        cached = await self.get_cached_payload()
         if cached:
-            return json.loads(cached)
-
-        url = f"{settings.FX_BASE_URL}/latest?access_key={self.api_key}"
-        async with aiohttp.ClientSession(timeout=self.http_timeout, trust_env=True) as sess:
-            async with sess.get(url) as resp:
-                if resp.status != 200:
-                    raise RuntimeError(f"Fixer HTTP {resp.status}: {await resp.text()}")
-                data = await resp.json()
-        if not data.get("success"):
-            raise RuntimeError(f"Fixer error: {url}, {data} {data.get('error')}")
-
-        ttl = 10
-        await self.r.setex("fx:fixer:latest", ttl, json.dumps(data))
+            return cached
+        if not self.upstream_on_miss:
+            raise RuntimeError("FX rates are not available yet")
+        return await self.fetch_upstream()
+
+    async def fetch_upstream(self) -> Dict[str, Any]:
+        data = await self.upstream.fetch()
+        await self.r.setex(FX_PAYLOAD_KEY, settings.FX_CACHE_TTL_SEC, json.dumps(data))
         return data
 
-    @staticmethod
-    def _as_of(date_str: str) -> datetime:
-        return datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-
     async def convert(
         self,
         *,
@@ -80,14 +144,41 @@ class FxClient:
             now = datetime.now(timezone.utc)
             return FxQuote(base, quote, Decimal("1"), amount, amount, "fixer.io", now)
 
-        payload = await self._get_payload()
-        rates: Dict[str, float] = payload["rates"]
-        as_of = self._as_of(payload["date"])
-
-        if base not in rates or quote not in rates:
-            raise RuntimeError(f"Missing rates for {base} or {quote}")
-        rate = Decimal(str(rates[quote])) / Decimal(str(rates[base]))
-
+        snap = await self.rates.get()
+        rate = snap.cross(base, quote)
         amount_out = amount * rate
-        return FxQuote(base, quote, rate, amount, amount_out, "fixer.io", as_of)
-
+        return FxQuote(base, quote, rate, amount, amount_out, snap.provider, snap.as_of)
+
+
+    async def convert_many(self, items: Sequence[tuple[str, str, Decimal]]) -> tuple[RateSnapshot, list[FxQuote]]:
+        # (base, quote, amount) triples converted against one snapshot in a single vectorized
+        # pass, returned along with the quotes: the table may move on to a newer one meanwhile.
+        # Unlike convert, amount_out is rounded to cents, see src.infrastructure.fx.matrix
+        snap = await self.rates.get()
+        bases = [base.upper() for base, _, _ in items]
+        quotes = [quote.upper() for _, quote, _ in items]
+        amounts = [amount for _, _, amount in items]
+        amounts_out = snap.matrix.convert(bases, quotes, amounts, snap.cross)
+        return snap, [
+            FxQuote(base, quote, snap.cross(base, quote), amount, amount_out, snap.provider, snap.as_of)
+            for base, quote, amount, amount_out in zip(bases, quotes, amounts, amounts_out)
+        ]
+
+    async def historical_rate(self, *, base: str, quote: str, at: datetime) -> Optional[Decimal]:
+        # rate of the version in force at `at` from the local history, None if it has none
+        base, quote = base.upper(), quote.upper()
+        if base == quote:
+            return Decimal("1")
+        if self.history is None:
+            return None
+        # the history's lock is shared with appends in the persist thread; never wait on it here
+        return await asyncio.to_thread(self.history.rate, base, quote, at)
+
+    async def historical_quote(self, *, base: str, quote: str, amount: Decimal, at: datetime) -> Optional[FxQuote]:
+        # convert at the version that was in force at `at`; as_of is that version's time
+        base, quote = base.upper(), quote.upper()
+        snap = await asyncio.to_thread(self.history.as_of, at) if self.history else None
+        if snap is None or base not in snap.rates or quote not in snap.rates:
+            return None
+        rate = snap.cross(base, quote)
+        return FxQuote(base, quote, rate, amount, amount * rate, snap.provider, snap.as_of)
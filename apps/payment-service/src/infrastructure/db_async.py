@@ -1,14 +1,81 @@
+import logging
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from sqlalchemy.orm import declarative_base
 from src.config import settings
+from src.infrastructure.db_pool import instrument, pool_kwargs, warm_up
+from src.infrastructure.db_routing import ReplicaPool, RoutingSession
 
 Base = declarative_base()
+log = logging.getLogger("db")
 
 def _get_url() -> str:
     return settings.DATABASE_URL
 
-ASYNC_ENGINE: AsyncEngine = create_async_engine(
-    _get_url(),
-    future=True,
+
+def _engine_kwargs(url: str, name: str) -> dict:
+    kwargs = {"future": True, "query_cache_size": settings.DB_QUERY_CACHE_SIZE, **pool_kwargs(url, name)}
+    if make_url(url).get_driver_name() == "asyncpg":
+        # per-connection LRU of server-side prepared statements; 0 turns it off, which is what
+        # a transaction-pooling pgbouncer in front of the database needs
+        kwargs["connect_args"] = {"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE}
+    return kwargs
+
+ASYNC_ENGINE: AsyncEngine = create_async_engine(_get_url(), **_engine_kwargs(_get_url(), "primary"))
+REPLICAS = ReplicaPool(
+    [
+        create_async_engine(url, **_engine_kwargs(url, f"replica{i}"))
+        for i, url in enumerate(settings.DATABASE_REPLICA_URLS)
+    ],
+    strategy=settings.DB_REPLICA_STRATEGY,
+    eject_sec=settings.DB_REPLICA_EJECT_SEC,
+)
+READ_ENGINE: AsyncEngine = ASYNC_ENGINE.execution_options(postgresql_readonly=True)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=ASYNC_ENGINE, expire_on_commit=False, autoflush=False, class_=AsyncSession,
+    sync_session_class=RoutingSession, replicas=REPLICAS,
 )
-AsyncSessionLocal = async_sessionmaker(bind=ASYNC_ENGINE, expire_on_commit=False, autoflush=False, class_=AsyncSession)
+ReadSessionLocal = async_sessionmaker(
+    bind=READ_ENGINE, expire_on_commit=False, autoflush=False, class_=AsyncSession,
+    sync_session_class=RoutingSession, replicas=REPLICAS, replica=True,
+)
+
+_statement_counter: ContextVar[list[int] | None] = ContextVar("db_statement_counter", default=None)
+
+
+def count_statements() -> list[int]:
+    counter = [0]
+    _statement_counter.set(counter)
+    return counter
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    counter = _statement_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+for _engine in [ASYNC_ENGINE.sync_engine] + [r.engine.sync_engine for r in REPLICAS.replicas]:
+    event.listen(_engine, "before_cursor_execute", _count_statement)
+
+
+instrument(ASYNC_ENGINE, "primary")
+for _i, _replica in enumerate(REPLICAS.replicas):
+    instrument(_replica.engine, f"replica{_i}")
+
+
+async def warm_up_pools() -> None:
+    # fill the pools before the app starts taking traffic; a replica that cannot be reached has
+    # already been ejected by the replica pool's error listener and must not fail startup
+    size = min(settings.DB_POOL_WARMUP, settings.DB_POOL_SIZE)
+    if size <= 0:
+        return
+    await warm_up(ASYNC_ENGINE, size)
+    for replica in REPLICAS.replicas:
+        try:
+            await warm_up(replica.engine, size)
+        except Exception as e:
+            log.warning("db.replica.warmup_failed", extra={"audit": {"type": "db.replica.warmup_failed", "err": str(e)}})
@@ -0,0 +1,146 @@
+import bisect
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from src.infrastructure.fx import snapshots
+from src.infrastructure.fx.rates import RateSnapshot
+
+# Every rate version FxClient sees is appended to one file as a snapshot record (the format of
+# src.infrastructure.fx.snapshots, ~11 bytes per currency: an hourly feed is ~17 MB a year).
+# Records are never rewritten. Record headers are scanned into a (version, offset) index kept
+# sorted by version, so backfilled older payloads can be appended after newer ones; a lookup
+# "as of" a time is a bisect over that index and reads only the record it lands on.
+log = logging.getLogger("fx")
+
+
+class RateHistory:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._versions: list[int] = []
+        self._offsets: list[int] = []
+        self._size = 0
+        self._seen = 0
+        self._mm: mmap.mmap | None = None
+        # set while extend writes: the file is growing past the index and is not read meanwhile
+        self._appending = False
+        with self._lock:
+            self._catch_up()
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def _catch_up(self) -> None:
+        # indexes records appended since the last look, by this process or another one
+        # (the backfill command); stops at a torn last record, which the next append overwrites
+        if self._appending:
+            return
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size == self._seen or size <= self._size:
+            return
+        offset = self._size
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            while offset < len(mm):
+                try:
+                    version, end = snapshots.header(mm, offset)
+                except (ValueError, struct.error) as e:
+                    log.warning("fx.history.truncated", extra={"audit": {
+                        "type": "fx.history.truncated", "path": str(self.path), "offset": offset, "error": repr(e),
+                    }})
+                    break
+                i = bisect.bisect_left(self._versions, version)
+                if i == len(self._versions) or self._versions[i] != version:
+                    self._versions.insert(i, version)
+                    self._offsets.insert(i, offset)
+                offset = end
+        self._size, self._seen = offset, size
+
+    def append(self, snap: RateSnapshot) -> bool:
+        # False when the version is already stored
+        return self.extend([snap]) == 1
+
+    def extend(self, snaps: list[RateSnapshot]) -> int:
+        # appends the versions not stored yet in one write and fsync, returns how many. Writers
+        # serialize on an exclusive lock of the file, so the service and a backfill run can
+        # append to the same history. The thread lock is held only to read and then publish the
+        # index: lookups go on against the old index while the write and fsync run
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                with self._lock:
+                    self._catch_up()
+                    new, chunks, base = {}, [], self._size
+                    offset = base
+                    for snap in snaps:
+                        i = bisect.bisect_left(self._versions, snap.version)
+                        if snap.version in new or (i < len(self._versions) and self._versions[i] == snap.version):
+                            continue
+                        data = snapshots.encode(snap, time.time() - (time.monotonic() - snap.loaded_at))
+                        new[snap.version] = offset
+                        chunks.append(data)
+                        offset += len(data)
+                    if not chunks:
+                        return 0
+                    self._appending = True
+                try:
+                    f.truncate(base)
+                    f.write(b"".join(chunks))
+                    f.flush()
+                    os.fsync(f.fileno())
+                finally:
+                    with self._lock:
+                        self._appending = False
+                with self._lock:
+                    for version, at in new.items():
+                        i = bisect.bisect_left(self._versions, version)
+                        self._versions.insert(i, version)
+                        self._offsets.insert(i, at)
+                    self._size = self._seen = offset
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return len(new)
+
+    def _find(self, at: datetime) -> int | None:
+        # offset of the newest record published at or before `at` (naive times are UTC)
+        self._catch_up()
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        i = bisect.bisect_right(self._versions, at.timestamp()) - 1
+        return self._offsets[i] if i >= 0 else None
+
+    def _buffer(self) -> mmap.mmap:
+        # remapped after appends, a mapping does not grow with its file
+        if self._mm is None or len(self._mm) < self._size:
+            if self._mm is not None:
+                self._mm.close()
+            with open(self.path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def as_of(self, at: datetime) -> RateSnapshot | None:
+        with self._lock:
+            offset = self._find(at)
+            return None if offset is None else snapshots.decode(self._buffer(), offset)[0]
+
+    def rate(self, base: str, quote: str, at: datetime) -> Decimal | None:
+        # same value RateSnapshot.cross gives for the version in force at `at`
+        with self._lock:
+            offset = self._find(at)
+            if offset is None:
+                return None
+            buf = self._buffer()
+            b, q = snapshots.find_rate(buf, offset, base), snapshots.find_rate(buf, offset, quote)
+        if b is None or q is None or not b:
+            return None
+        return q / b
@@ -0,0 +1,65 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Callable, Mapping, Sequence
+import numpy as np
+
+# Batch conversions are defined by the scalar Decimal result, the float matrix only gets there
+# faster: amount_out = (amount * rate).quantize(CENT, ROUND_HALF_UP), with rate the Decimal
+# cross rate of the snapshot. ROUND_HALF_UP is also what NUMERIC(18, 2) does when it stores
+# dst_amount, so a batch quote equals the amount a payment at that quote would be saved with.
+CENT = Decimal("0.01")
+# float64 carries ~16 significant digits; the cross rate and the product each add a few ulps.
+# Amounts whose float result lands closer than this to a half cent are redone in Decimal
+_REL_ERR = 1e-14
+_MAX_EXACT = float(2 ** 52)
+
+
+def round_amount(amount: Decimal, rate: Decimal) -> Decimal:
+    return (amount * rate).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class CrossRates:
+    # dense cross-rate matrix of one snapshot: matrix[i, j] converts codes[i] into codes[j].
+    # Built once per refresh from the same rates the scalar path uses
+    def __init__(self, rates: Mapping[str, Decimal]) -> None:
+        self.codes = sorted(rates)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        against_base = np.array([float(rates[code]) for code in self.codes], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.matrix = against_base[None, :] / against_base[:, None]
+
+    def convert(
+        self,
+        bases: Sequence[str],
+        quotes: Sequence[str],
+        amounts: Sequence[Decimal],
+        cross: Callable[[str, str], Decimal],
+    ) -> list[Decimal]:
+        # one vectorized pass; cross is the scalar Decimal rate, used for the amounts the
+        # float pass cannot round with certainty
+        cents, unsure = self._cents(
+            self._positions(bases),
+            self._positions(quotes),
+            np.fromiter(map(float, amounts), dtype=np.float64, count=len(amounts)),
+        )
+        out = list(map(CENT.__mul__, map(Decimal, cents.tolist())))
+        for i in np.flatnonzero(unsure).tolist():
+            out[i] = round_amount(amounts[i], cross(bases[i], quotes[i]))
+        return out
+
+    def _positions(self, codes: Sequence[str]) -> np.ndarray:
+        try:
+            return np.fromiter(map(self.index.__getitem__, codes), dtype=np.intp, count=len(codes))
+        except KeyError as e:
+            raise RuntimeError(f"Missing rates for {e.args[0]}") from None
+
+    def _cents(self, base: np.ndarray, quote: np.ndarray, amounts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # amounts converted and rounded half up to whole cents, plus a mask of the ones too
+        # close to a half cent (or too large) for float64 to decide; those must be redone exactly
+        y = amounts * 100.0 * self.matrix[base, quote]
+        rounded = np.floor(y + 0.5)
+        unsure = (
+            ~np.isfinite(y)
+            | (np.abs(y) >= _MAX_EXACT)
+            | (np.abs(y - np.floor(y) - 0.5) <= np.abs(y) * _REL_ERR + 1e-9)
+        )
+        return np.where(unsure, 0.0, rounded).astype(np.int64), unsure
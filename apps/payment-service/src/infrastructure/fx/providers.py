@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Protocol, Sequence
+import aiohttp
+from prometheus_client import Counter, Gauge, Histogram
+from src.config import settings
+
+# Rate sources behind FxClient. Every provider returns the payload in the fixer shape
+# ({"timestamp", "date", "rates", ...}) plus its own name under "provider"; cross rates do not
+# depend on the base a provider quotes against, so payloads from different providers mix.
+FX_PROVIDER_LATENCY = Histogram(
+    "fx_provider_latency_seconds", "Upstream rate requests by provider and outcome", ["provider", "result"],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5),
+)
+FX_PROVIDER_REQUESTS = Counter("fx_provider_requests_total", "Upstream rate requests", ["provider", "result"])
+FX_PROVIDER_EJECTED = Gauge("fx_provider_ejected", "1 while the provider is ejected for its error rate", ["provider"])
+FX_HEDGES = Counter("fx_provider_hedges_total", "Requests sent to a next provider", ["reason"])
+
+log = logging.getLogger("fx")
+
+Payload = Dict[str, Any]
+
+
+class RateProvider(Protocol):
+    name: str
+
+    async def fetch(self, session: aiohttp.ClientSession) -> Payload: ...
+
+
+class FixerProvider:
+    name = "fixer.io"
+
+    def __init__(self, base_url: str, api_key: str) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key.strip("/")
+
+    async def fetch(self, session: aiohttp.ClientSession) -> Payload:
+        url = f"{self.base_url}/latest?access_key={self.api_key}"
+        async with session.get(url) as resp:
+            if resp.status != 200:
+                raise RuntimeError(f"Fixer HTTP {resp.status}: {await resp.text()}")
+            data = await resp.json()
+        if not data.get("success"):
+            raise RuntimeError(f"Fixer error: {data.get('error')}")
+        return {**data, "provider": self.name}
+
+
+class OpenExchangeRatesProvider:
+    # {"timestamp": ..., "base": "USD", "rates": {...}}; no "date" field, it follows the timestamp
+    name = "openexchangerates.org"
+
+    def __init__(self, base_url: str, app_id: str) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.app_id = app_id
+
+    async def fetch(self, session: aiohttp.ClientSession) -> Payload:
+        async with session.get(f"{self.base_url}/latest.json", params={"app_id": self.app_id}) as resp:
+            if resp.status != 200:
+                raise RuntimeError(f"OpenExchangeRates HTTP {resp.status}: {await resp.text()}")
+            data = await resp.json()
+        ts = int(data["timestamp"])
+        return {
+            "success": True,
+            "timestamp": ts,
+            "date": datetime.fromtimestamp(ts, timezone.utc).date().isoformat(),
+            "base": data.get("base", "USD"),
+            "rates": data["rates"],
+            "provider": self.name,
+        }
+
+
+def build_providers(names: str) -> list[RateProvider]:
+    # FX_PROVIDERS: comma-separated, in the order they are asked
+    factories = {
+        "fixer": lambda: FixerProvider(settings.FX_BASE_URL, settings.FX_API_TOKEN),
+        "openexchangerates": lambda: OpenExchangeRatesProvider(settings.FX_OXR_BASE_URL, settings.FX_OXR_APP_ID),
+    }
+    providers = []
+    for name in filter(None, (n.strip().lower() for n in names.split(","))):
+        if name not in factories:
+            raise ValueError(f"Unknown FX provider: {name}")
+        providers.append(factories[name]())
+    return providers
+
+
+class ProviderHealth:
+    # rolling outcomes of one provider: the last `window` requests decide its error rate and
+    # its latency percentile. Past max_error_rate (with at least min_requests
+    # seen) it is ejected for eject_sec, then gets a clean window
+    def __init__(self, name: str, *, window: int, min_requests: int, max_error_rate: float, eject_sec: float) -> None:
+        self.name = name
+        self.min_requests = min_requests
+        self.max_error_rate = max_error_rate
+        self.eject_sec = eject_sec
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.ejected_until = 0.0
+
+    @property
+    def ejected(self) -> bool:
+        if self.ejected_until and time.monotonic() >= self.ejected_until:
+            self.ejected_until = 0.0
+            self.outcomes.clear()
+            FX_PROVIDER_EJECTED.labels(self.name).set(0)
+        return self.ejected_until > 0
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def latency(self, percentile: float) -> float | None:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * percentile), len(ordered) - 1)]
+
+    def record(self, ok: bool | None, elapsed: float) -> None:
+        # ok=None: cancelled after losing a hedge race; no outcome, but the request took at
+        # least `elapsed`, which keeps a slowing provider's percentile from going stale
+        if ok is not False:
+            self.latencies.append(elapsed)
+        if ok is None:
+            return
+        self.outcomes.append(ok)
+        if not ok and len(self.outcomes) >= self.min_requests and self.error_rate >= self.max_error_rate:
+            self.ejected_until = time.monotonic() + self.eject_sec
+            FX_PROVIDER_EJECTED.labels(self.name).set(1)
+            log.warning("fx.provider.ejected", extra={"audit": {
+                "type": "fx.provider.ejected", "provider": self.name,
+                "error_rate": round(self.error_rate, 3), "eject_sec": self.eject_sec,
+            }})
+
+
+class HedgedFetcher:
+    # Asks providers in order. The first gets hedge_delay (its own latency percentile, clamped to
+    # [min_delay, max_delay]) to answer before the next one is asked too; a failure moves on at
+    # once. The first payload wins and the requests still running are cancelled. Ejected
+    # providers are skipped unless all of them are ejected.
+    def __init__(
+        self,
+        providers: Sequence[RateProvider],
+        *,
+        timeout_sec: float,
+        hedge_percentile: float = 0.95,
+        min_delay_sec: float = 0.05,
+        max_delay_sec: float = 1.0,
+        window: int = 50,
+        min_requests: int = 5,
+        max_error_rate: float = 0.5,
+        eject_sec: float = 30.0,
+    ) -> None:
+        if not providers:
+            raise ValueError("At least one FX provider is required")
+        self.providers = list(providers)
+        self.timeout = aiohttp.ClientTimeout(total=timeout_sec)
+        self.hedge_percentile = hedge_percentile
+        self.min_delay = min_delay_sec
+        self.max_delay = max_delay_sec
+        self.health = {
+            p.name: ProviderHealth(p.name, window=window, min_requests=min_requests,
+                                   max_error_rate=max_error_rate, eject_sec=eject_sec)
+            for p in self.providers
+        }
+
+    def _candidates(self) -> list[RateProvider]:
+        healthy = [p for p in self.providers if not self.health[p.name].ejected]
+        return healthy or self.providers
+
+    def hedge_delay(self, provider: RateProvider) -> float:
+        observed = self.health[provider.name].latency(self.hedge_percentile)
+        if observed is None:
+            return self.max_delay
+        return min(max(observed, self.min_delay), self.max_delay)
+
+    async def _call(self, provider: RateProvider, session: aiohttp.ClientSession) -> Payload:
+        start = time.perf_counter()
+        result = "ok"
+        try:
+            return await provider.fetch(session)
+        except asyncio.CancelledError:
+            result = "cancelled"
+            raise
+        except Exception:
+            result = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            FX_PROVIDER_REQUESTS.labels(provider.name, result).inc()
+            FX_PROVIDER_LATENCY.labels(provider.name, result).observe(elapsed)
+            self.health[provider.name].record(None if result == "cancelled" else result == "ok", elapsed)
+
+    async def fetch(self) -> Payload:
+        queue = self._candidates()
+        errors: list[str] = []
+        running: dict[asyncio.Task, RateProvider] = {}
+        start_next = True
+        async with aiohttp.ClientSession(timeout=self.timeout, trust_env=True) as session:
+            try:
+                while queue or running:
+                    if start_next and queue:
+                        provider = queue.pop(0)
+                        running[asyncio.create_task(self._call(provider, session))] = provider
+                    # the hedge timer follows the provider asked last
+                    wait = self.hedge_delay(provider) if queue else None
+                    done, _ = await asyncio.wait(running, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        FX_HEDGES.labels("slow").inc()
+                        start_next = True
+                        continue
+                    start_next = False
+                    for task in done:
+                        failed = running.pop(task)
+                        if task.exception() is None:
+                            return task.result()
+                        errors.append(f"{failed.name}: {task.exception()!r}")
+                    if queue:
+                        FX_HEDGES.labels("error").inc()
+                        start_next = True
+            finally:
+                for task in running:
+                    task.cancel()
+                await asyncio.gather(*running, return_exceptions=True)
+        raise RuntimeError(f"All FX providers failed: {'; '.join(errors)}")
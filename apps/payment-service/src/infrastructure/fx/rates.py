@@ -0,0 +1,132 @@
+import asyncio
+import dataclasses
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Mapping
+from prometheus_client import Counter
+from src.infrastructure.fx.matrix import CrossRates
+
+FX_LOOKUPS = Counter("fx_rate_table_lookups_total", "Rate table reads by freshness of the table", ["state"])
+FX_REFRESHES = Counter("fx_rate_table_refreshes_total", "Rate table refreshes", ["result"])
+_FRESH, _STALE, _WAIT = (FX_LOOKUPS.labels(s) for s in ("fresh", "stale", "wait"))
+
+log = logging.getLogger("fx")
+
+Payload = Mapping[str, Any]
+
+
+@dataclass(frozen=True, slots=True)
+class RateSnapshot:
+    # one fixer payload, parsed once: rates against the payload base as Decimal, with the
+    # payload timestamp as version; batch conversions also use a float cross-rate matrix
+    version: int
+    as_of: datetime
+    rates: Mapping[str, Decimal]
+    provider: str = "fixer.io"
+    loaded_at: float = field(default_factory=time.monotonic)
+    _pairs: dict = field(default_factory=dict, repr=False, compare=False)
+    _matrix: CrossRates | None = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_payload(cls, payload: Payload, provider: str = "fixer.io") -> "RateSnapshot":
+        # as_of is the moment the rates were published (it becomes fx_at of a payment), so the
+        # rate history can find the exact version again; payloads without one fall back to the date
+        ts = payload.get("timestamp")
+        if ts:
+            as_of = datetime.fromtimestamp(int(ts), timezone.utc)
+        else:
+            as_of = datetime.strptime(payload["date"], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        return cls(
+            version=int(as_of.timestamp()),
+            as_of=as_of,
+            rates={code: Decimal(str(value)) for code, value in payload["rates"].items()},
+            provider=payload.get("provider") or provider,
+        )
+
+    @property
+    def matrix(self) -> CrossRates:
+        # built by the first batch conversion, then kept for the life of the snapshot
+        if self._matrix is None:
+            object.__setattr__(self, "_matrix", CrossRates(self.rates))
+        return self._matrix
+
+    def cross(self, base: str, quote: str) -> Decimal:
+        rate = self._pairs.get((base, quote))
+        if rate is None:
+            if base not in self.rates or quote not in self.rates:
+                raise RuntimeError(f"Missing rates for {base} or {quote}")
+            rate = self._pairs[(base, quote)] = self.rates[quote] / self.rates[base]
+        return rate
+
+
+class RateTable:
+    # rates are served from memory: fresh for fresh_sec after loading, then for up to stale_sec
+    # more while a background refresh runs. Only an empty or expired table makes callers wait,
+    # and all of them wait on the same fetch. A failed refresh is not retried for retry_sec.
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[Payload]],
+        *,
+        fresh_sec: float,
+        stale_sec: float,
+        retry_sec: float = 1.0,
+        on_update: Callable[[RateSnapshot], None] | None = None,
+    ) -> None:
+        self._fetch = fetch
+        self._on_update = on_update
+        self.fresh_sec = fresh_sec
+        self.stale_sec = stale_sec
+        self.retry_sec = retry_sec
+        self.snapshot: RateSnapshot | None = None
+        self._inflight: asyncio.Task | None = None
+        self._retry_at = 0.0
+
+    async def get(self) -> RateSnapshot:
+        snap = self.snapshot
+        if snap is not None:
+            age = time.monotonic() - snap.loaded_at
+            if age < self.fresh_sec:
+                _FRESH.inc()
+                return snap
+            if age < self.fresh_sec + self.stale_sec:
+                _STALE.inc()
+                if self._inflight is None and time.monotonic() >= self._retry_at:
+                    self._start()
+                return snap
+        _WAIT.inc()
+        return await self.refresh()
+
+    async def refresh(self) -> RateSnapshot:
+        # shielded: a caller that gives up does not cancel the fetch the others are waiting on
+        return await asyncio.shield(self._inflight or self._start())
+
+    def _start(self) -> asyncio.Task:
+        task = self._inflight = asyncio.create_task(self._refresh())
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _refresh(self) -> RateSnapshot:
+        try:
+            snap = self.install(RateSnapshot.from_payload(await self._fetch()))
+        except Exception as e:
+            self._retry_at = time.monotonic() + self.retry_sec
+            FX_REFRESHES.labels("error").inc()
+            log.warning("fx.rates.refresh_failed", extra={"audit": {"type": "fx.rates.refresh_failed", "error": repr(e)}})
+            raise
+        finally:
+            self._inflight = None
+        FX_REFRESHES.labels("ok").inc()
+        return snap
+
+    def install(self, snap: RateSnapshot) -> RateSnapshot:
+        # an older payload (a lagging L2 copy) never replaces a newer one, it only confirms it
+        current = self.snapshot
+        if current is not None and snap.version < current.version:
+            snap = dataclasses.replace(current, loaded_at=snap.loaded_at)
+        self.snapshot = snap
+        if self._on_update and (current is None or snap.version > current.version):
+            self._on_update(snap)
+        return snap
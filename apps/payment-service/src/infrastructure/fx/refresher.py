@@ -0,0 +1,90 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from prometheus_client import Counter
+from src.infrastructure.clients import FxClient
+from src.infrastructure.fx.rates import RateSnapshot
+
+FX_LEASE_KEY = "fx:fixer:lease"
+FX_CHANNEL = "fx:fixer:updates"
+
+FX_ROUNDS = Counter("fx_refresher_rounds_total", "FX refresher rounds by outcome", ["result"])
+FX_UPDATES = Counter("fx_refresher_updates_total", "Rate payloads received over pub/sub", ["result"])
+
+log = logging.getLogger("fx")
+
+
+class FxRefresher:
+    # Keeps the rate table of every instance fresh so requests never wait on fixer. Each
+    # interval the instances race for a short Redis lease (SET NX PX); the winner fetches
+    # upstream, stores the payload in Redis and publishes it, everyone installs what is
+    # published. The lease is left to expire, so the cluster fetches at most once per lease.
+    # An instance that missed a message (listener reconnecting) catches up from Redis.
+    def __init__(self, client: FxClient, *, interval_sec: float, lease_ms: int | None = None) -> None:
+        self.client = client
+        self.interval = interval_sec
+        self.lease_ms = lease_ms or int(interval_sec * 1000)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def run(self, stop: asyncio.Event | None = None) -> None:
+        stop = stop or asyncio.Event()
+        listener = asyncio.create_task(self._listen(stop))
+        try:
+            while not stop.is_set():
+                try:
+                    FX_ROUNDS.labels(await self.run_once()).inc()
+                except Exception as e:
+                    FX_ROUNDS.labels("error").inc()
+                    log.warning("fx.refresher.failed", extra={"audit": {"type": "fx.refresher.failed", "error": repr(e)}})
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+
+    async def run_once(self) -> str:
+        r = self.client.r
+        if await r.set(FX_LEASE_KEY, self.owner, nx=True, px=self.lease_ms):
+            payload = await self.client.fetch_upstream()
+            self._install(payload)
+            await r.publish(FX_CHANNEL, json.dumps(payload))
+            return "fetched"
+        if not self._behind():
+            return "skipped"
+        payload = await self.client.get_cached_payload()
+        if payload:
+            self._install(payload)
+        return "caught_up"
+
+    def _behind(self) -> bool:
+        snap = self.client.rates.snapshot
+        return snap is None or time.monotonic() - snap.loaded_at > self.interval * 1.5
+
+    def _install(self, payload: dict) -> None:
+        self.client.rates.install(RateSnapshot.from_payload(payload))
+
+    async def _listen(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            pubsub = self.client.r.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(FX_CHANNEL)
+                while not stop.is_set():
+                    msg = await pubsub.get_message(timeout=1.0)
+                    if msg is None:
+                        continue
+                    try:
+                        self._install(json.loads(msg["data"]))
+                        FX_UPDATES.labels("ok").inc()
+                    except (ValueError, KeyError, TypeError) as e:
+                        FX_UPDATES.labels("invalid").inc()
+                        log.warning("fx.refresher.bad_update", extra={"audit": {"type": "fx.refresher.bad_update", "error": repr(e)}})
+            except Exception as e:
+                log.warning("fx.refresher.listen_failed", extra={"audit": {"type": "fx.refresher.listen_failed", "error": repr(e)}})
+                await asyncio.sleep(self.interval)
+            finally:
+                await pubsub.aclose()
@@ -0,0 +1,142 @@
+import logging
+import mmap
+import os
+import struct
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from src.infrastructure.fx.rates import RateSnapshot
+
+# Every rate version the table installs is also written to disk, so a restarted instance has
+# rates before Redis or fixer answer. One file per version, fx-<version>.snap:
+#   header  magic "FXRS", format, version (payload timestamp), as_of and saved_at (unix
+#           seconds), provider (32 bytes, NUL padded), number of rates
+#   rates   3-byte ISO code + float64 per currency, sorted by code
+# Rates are stored as the float the provider JSON carried, so they read back to the same
+# Decimal. Records of any other format are rejected, not converted.
+MAGIC = b"FXRS"
+FORMAT = 2
+_PREFIX = struct.Struct("<4sB")
+_HEADER = struct.Struct("<4sB3xqqd32sI")
+_RATE = struct.Struct("<3sd")
+
+log = logging.getLogger("fx")
+
+
+def encode(snap: RateSnapshot, saved_at: float) -> bytes:
+    codes = sorted(snap.rates)
+    parts = [_HEADER.pack(
+        MAGIC, FORMAT, snap.version, int(snap.as_of.timestamp()), saved_at,
+        snap.provider.encode()[:32], len(codes),
+    )]
+    for code in codes:
+        raw = code.encode("ascii")
+        if len(raw) != 3:
+            raise ValueError(f"Not an ISO 4217 code: {code!r}")
+        parts.append(_RATE.pack(raw, float(snap.rates[code])))
+    return b"".join(parts)
+
+
+def _unpack(buf, offset: int) -> tuple:
+    # header fields of the record at offset, then where its rates start and end
+    if len(buf) - offset < _PREFIX.size:
+        raise ValueError("truncated FX snapshot")
+    magic, fmt = _PREFIX.unpack_from(buf, offset)
+    if magic != MAGIC or fmt != FORMAT:
+        raise ValueError(f"not an FX snapshot (format {fmt})")
+    if len(buf) - offset < _HEADER.size:
+        raise ValueError("truncated FX snapshot")
+    _, _, version, as_of, saved_at, provider, count = _HEADER.unpack_from(buf, offset)
+    start = offset + _HEADER.size
+    end = start + count * _RATE.size
+    if len(buf) < end:
+        raise ValueError("truncated FX snapshot")
+    return version, as_of, saved_at, provider, count, start, end
+
+
+def decode(buf, offset: int = 0) -> tuple[RateSnapshot, float, int]:
+    # the record at offset: snapshot (aged as of its save time), wall clock time it was saved
+    # at, and the offset right after it
+    version, as_of, saved_at, provider, _, start, end = _unpack(buf, offset)
+    with memoryview(buf) as view:
+        rates = {code.decode(): Decimal(repr(rate)) for code, rate in _RATE.iter_unpack(view[start:end])}
+    snap = RateSnapshot(
+        version=version,
+        as_of=datetime.fromtimestamp(as_of, timezone.utc),
+        rates=rates,
+        provider=provider.rstrip(b"\0").decode(),
+        loaded_at=time.monotonic() - max(time.time() - saved_at, 0.0),
+    )
+    return snap, saved_at, end
+
+
+def header(buf, offset: int = 0) -> tuple[int, int]:
+    # (version, offset right after the record) without decoding the rates
+    version, *_, end = _unpack(buf, offset)
+    return version, end
+
+
+def find_rate(buf, offset: int, code: str) -> Decimal | None:
+    # one currency of the record at offset, by binary search over its sorted codes
+    _, _, _, _, count, start, _ = _unpack(buf, offset)
+    key = code.encode("ascii", "replace")
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        found, rate = _RATE.unpack_from(buf, start + mid * _RATE.size)
+        if found == key:
+            return Decimal(repr(rate))
+        if found < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return None
+
+
+def read(path: str | Path) -> tuple[RateSnapshot, float]:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        snap, saved_at, end = decode(mm)
+        if end != len(mm):
+            raise ValueError(f"{path}: trailing data")
+    return snap, saved_at
+
+
+class SnapshotStore:
+    def __init__(self, directory: str | Path, keep: int = 48) -> None:
+        self.dir = Path(directory)
+        self.keep = max(keep, 1)
+
+    def _path(self, version: int) -> Path:
+        return self.dir / f"fx-{version:012d}.snap"
+
+    def files(self) -> list[Path]:
+        # newest first; the zero-padded version keeps name order and version order the same
+        return sorted(self.dir.glob("fx-*.snap"), reverse=True) if self.dir.is_dir() else []
+
+    def save(self, snap: RateSnapshot) -> Path | None:
+        path = self._path(snap.version)
+        if path.exists():
+            return None
+        self.dir.mkdir(parents=True, exist_ok=True)
+        saved_at = time.time() - (time.monotonic() - snap.loaded_at)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(encode(snap, saved_at))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        for old in self.files()[self.keep:]:
+            old.unlink(missing_ok=True)
+        return path
+
+    def latest(self) -> tuple[RateSnapshot, float] | None:
+        # newest readable snapshot; a damaged file (torn write, disk error) falls back to the previous one
+        for path in self.files():
+            try:
+                return read(path)
+            except (OSError, ValueError, struct.error) as e:
+                log.warning("fx.snapshot.unreadable", extra={"audit": {
+                    "type": "fx.snapshot.unreadable", "path": str(path), "error": repr(e),
+                }})
+        return None
@@ -1,8 +1,11 @@
 import time
-from prometheus_client import Counter, Histogram
+from datetime import datetime, timezone
+from prometheus_client import Counter, Gauge, Histogram
 from typing import Any
-from patterns.observability import ObservabilityHook
+from patterns.observability import ObservabilityHook, OutboxHook
 from patterns.message import Command, Event
+from patterns.outbox import OutboxMessage
+from src.infrastructure.db_async import count_statements
 from src.infrastructure.logging import audit_log, get_request_id, logging
 
 log = logging.getLogger("obs")
@@ -11,15 +14,22 @@ CMD_CNT = Counter("bus_commands_total", "Commands processed", ["name","status"])
 CMD_LAT = Histogram("bus_command_duration_seconds", "Command latency", ["name","status"])
 EVT_CNT = Counter("bus_events_total", "Events processed", ["name","status"])
 EVT_LAT = Histogram("bus_event_duration_seconds", "Event latency", ["name","status"])
+CMD_STMTS = Histogram("bus_command_db_statements", "SQL statements executed per command", ["name"], buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50))
 UOW_CNT = Counter("uow_total", "UoW commits/rollbacks", ["action"])
+OUTBOX_CNT = Counter("outbox_events_total", "Outbox events relayed", ["name","status"])
+OUTBOX_LAG = Histogram("outbox_delivery_lag_seconds", "Time from commit to relay delivery", ["name"])
+OUTBOX_PENDING = Gauge("outbox_pending_events", "Outbox events waiting for the relay")
+OUTBOX_OLDEST = Gauge("outbox_oldest_pending_age_seconds", "Age of the oldest undelivered outbox event")
 
 class PromAuditHook(ObservabilityHook):
     def __init__(self) -> None:
         self._cmd_started_at: dict[int, float] = {}
+        self._cmd_statements: dict[int, list[int]] = {}
         self._evt_started_at: dict[int, float] = {}
 
     async def on_command_start(self, cmd: Command) -> None:
         key = id(cmd); self._cmd_started_at[key] = time.perf_counter()
+        self._cmd_statements[key] = count_statements()
         name = type(cmd).__name__
         log.info("cmd.start", extra={"request_id": get_request_id(), "audit": {"type": "cmd.start", "name": name}})
         audit_log(action=f"cmd.{name}.start", actor_id=None, target=None, status="success", meta={})
@@ -27,15 +37,18 @@ class PromAuditHook(ObservabilityHook):
     async def on_command_end(self, cmd: Command, result: Any | None) -> None:
         key = id(cmd); start = self._cmd_started_at.pop(key, time.perf_counter())
         dur = time.perf_counter() - start
+        statements = self._cmd_statements.pop(key, [0])[0]
         name = type(cmd).__name__
         CMD_CNT.labels(name, "ok").inc()
         CMD_LAT.labels(name, "ok").observe(dur)
-        log.info("cmd.end", extra={"request_id": get_request_id(), "audit": {"type":"cmd.end","name": name, "duration": dur}})
+        CMD_STMTS.labels(name).observe(statements)
+        log.info("cmd.end", extra={"request_id": get_request_id(), "audit": {"type":"cmd.end","name": name, "duration": dur, "statements": statements}})
         audit_log(action=f"cmd.{name}.end", actor_id=None, target=None, status="success", meta={"duration": dur})
 
     async def on_command_error(self, cmd: Command, err: BaseException) -> None:
         key = id(cmd); start = self._cmd_started_at.pop(key, time.perf_counter())
         dur = time.perf_counter() - start
+        self._cmd_statements.pop(key, None)
         name = type(cmd).__name__
         CMD_CNT.labels(name, "error").inc()
         CMD_LAT.labels(name, "error").observe(dur)
@@ -70,3 +83,26 @@ class PromAuditHook(ObservabilityHook):
     async def on_uow_rollback(self) -> None:
         UOW_CNT.labels("rollback").inc()
         log.info("uow.rollback", extra={"request_id": get_request_id(), "audit": {"type":"uow.rollback"}})
+
+
+class PromOutboxHook(OutboxHook):
+    async def on_outbox_delivered(self, msg: OutboxMessage) -> None:
+        lag = (datetime.now(timezone.utc) - msg.occurred_at).total_seconds()
+        OUTBOX_CNT.labels(msg.name, "ok").inc()
+        OUTBOX_LAG.labels(msg.name).observe(lag)
+
+    async def on_outbox_failed(self, msg: OutboxMessage | None, err: BaseException) -> None:
+        name = msg.name if msg else "relay"
+        OUTBOX_CNT.labels(name, "error").inc()
+        log.error("outbox.error", extra={"audit": {"type": "outbox.error", "name": name, "id": msg.id if msg else None, "err": str(err)}})
+
+    async def on_outbox_dead_lettered(self, msg: OutboxMessage, err: BaseException) -> None:
+        OUTBOX_CNT.labels(msg.name, "dead").inc()
+        log.error("outbox.dead_lettered", extra={"audit": {
+            "type": "outbox.dead_lettered", "name": msg.name, "id": msg.id,
+            "aggregate_id": msg.aggregate_id, "attempts": msg.attempts + 1, "err": str(err),
+        }})
+
+    async def on_outbox_backlog(self, pending: int, oldest_age_sec: float) -> None:
+        OUTBOX_PENDING.set(pending)
+        OUTBOX_OLDEST.set(oldest_age_sec)
@@ -14,6 +14,7 @@ from src.infrastructure.logging import get_request_id, logging
 logger = logging.getLogger("cached")
 REQS = Counter("http_requests_total", "Total HTTP requests", ["method","path","status"])
 LAT  = Histogram("http_request_duration_seconds", "Latency", ["method","path","status"])
+STREAMING_MEDIA_TYPES = {"application/x-ndjson", "text/csv"}
 
 
 @dataclass
@@ -41,7 +42,7 @@ class CachedResponse:
 
 def make_key(request: Request) -> str:
     idem_hdr = request.headers.get("Idempotency-Key", "")
-    return f"idem:{request.method}:{request.url.path}:{idem_hdr}"
+    return f"idem:{request.method}:{request.url.path}?{request.url.query}:{idem_hdr}"
 
 class IdempotencyMiddleware(BaseHTTPMiddleware):
     def __init__(self, app):
@@ -67,6 +68,8 @@ class IdempotencyMiddleware(BaseHTTPMiddleware):
                 return Response(content=cr.body, status_code=cr.status, headers=cr.headers)
 
             response: Response = await call_next(request)
+            if response.headers.get("content-type", "").split(";")[0] in STREAMING_MEDIA_TYPES:
+                return response
             body = b""
             async for chunk in response.body_iterator:
                 body += chunk
@@ -0,0 +1,342 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import groupby
+from pathlib import Path
+from typing import AsyncIterator, Sequence
+from uuid import UUID
+from sqlalchemy import delete, select, tuple_
+from patterns.pagination import Cursor
+from src.config import settings
+from src.infrastructure.db_async import ASYNC_ENGINE
+from src.infrastructure.payments.export import EXPORT_COLUMNS, encode_ndjson
+from src.infrastructure.payments.ingest import FIELDS, parse_record
+from src.infrastructure.payments.orm import PaymentORM, PaymentStatus
+
+# Payments past the retention age are moved out of the hot table into append-only segment
+# files: a segment is a run of zlib-compressed NDJSON blocks (the export row format), each
+# block holding up to block_rows payments of a single created_at month in (created_at, id)
+# order. index.sqlite maps id -> block and (payer_id, month) -> blocks. Segments are never
+# rewritten; a payment archived twice (it was changed after being restored) simply points
+# at its newest block and older copies are skipped when read.
+INDEX_FILE = "index.sqlite"
+TERMINAL = (PaymentStatus.COMPLETED, PaymentStatus.FAILED, PaymentStatus.REFUNDED)
+_ID, _PAYER, _PAYEE, _CREATED_AT = (FIELDS.index(f) for f in ("id", "payer_id", "payee_id", "created_at"))
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    name TEXT PRIMARY KEY, rows INTEGER NOT NULL, bytes INTEGER NOT NULL, max_created TEXT NOT NULL,
+    archived_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    segment TEXT NOT NULL, block INTEGER NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL,
+    month TEXT NOT NULL, PRIMARY KEY (segment, block)
+);
+CREATE INDEX IF NOT EXISTS ix_blocks_month ON blocks (month);
+CREATE TABLE IF NOT EXISTS ids (
+    id BLOB PRIMARY KEY, segment TEXT NOT NULL, block INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_ids_block ON ids (segment, block);
+CREATE TABLE IF NOT EXISTS payer_months (
+    payer_id BLOB NOT NULL, month TEXT NOT NULL, segment TEXT NOT NULL, block INTEGER NOT NULL,
+    PRIMARY KEY (payer_id, month, segment, block)
+) WITHOUT ROWID;
+"""
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _month(value: datetime) -> str:
+    return _utc(value).astimezone(timezone.utc).strftime("%Y-%m")
+
+
+@lru_cache(maxsize=1024)
+def _read_block(path: str, offset: int, length: int) -> tuple[tuple, ...]:
+    # segments are immutable once renamed into place, so decoded blocks can be cached as is
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = zlib.decompress(f.read(length))
+    return tuple(parse_record(json.loads(line)) for line in data.splitlines())
+
+
+def to_orm(row: tuple) -> PaymentORM:
+    # transient, never added to a session: only read by the repository's _to_domain
+    return PaymentORM(**dict(zip(FIELDS, row)))
+
+
+class SegmentWriter:
+    def __init__(self, root: Path, name: str, block_rows: int) -> None:
+        self.name = name
+        self.final = root / name
+        self.tmp = root / f".{name}.tmp"
+        self.block_rows = block_rows
+        self.rows = 0
+        self.max_created: datetime | None = None
+        self.ids: list[UUID] = []
+        self.blocks: list[tuple[int, int, int, str]] = []
+        self.index_ids: list[tuple[bytes, int]] = []
+        self.index_payers: set[tuple[bytes, str, int]] = set()
+        self._f = open(self.tmp, "wb")
+        self._offset = 0
+        self._pending: list[Sequence] = []
+        self._month: str | None = None
+
+    def add(self, row: Sequence) -> None:
+        month = _month(row[_CREATED_AT])
+        if self._pending and (month != self._month or len(self._pending) >= self.block_rows):
+            self._flush()
+        self._month = month
+        self._pending.append(row)
+        self.rows += 1
+        self.max_created = _utc(row[_CREATED_AT])
+
+    def _flush(self) -> None:
+        block = len(self.blocks)
+        data = zlib.compress(encode_ndjson(self._pending))
+        self._f.write(data)
+        self.blocks.append((block, self._offset, len(data), self._month))
+        self._offset += len(data)
+        for row in self._pending:
+            self.ids.append(row[_ID])
+            self.index_ids.append((row[_ID].bytes, block))
+            if row[_PAYER] is not None:
+                self.index_payers.add((row[_PAYER].bytes, self._month, block))
+        self._pending = []
+
+    def close(self) -> int:
+        if self._pending:
+            self._flush()
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+        os.replace(self.tmp, self.final)
+        return self._offset
+
+    def abort(self) -> None:
+        self._f.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+class PaymentArchive:
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._newest: tuple[float, datetime | None] | None = None
+
+    def _index(self, create: bool = False) -> sqlite3.Connection | None:
+        if self._conn is None:
+            path = self.root / INDEX_FILE
+            if not create and not path.exists():
+                return None
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def register(self, writer: SegmentWriter, size: int) -> None:
+        # one transaction per segment, after the file is durable: a crash before it leaves an
+        # unreferenced file and the payments still in the hot table
+        with self._lock:
+            conn = self._index(create=True)
+            conn.execute("BEGIN")
+            try:
+                conn.execute("INSERT INTO segments VALUES (?, ?, ?, ?, ?)", (
+                    writer.name, writer.rows, size, writer.max_created.isoformat(), datetime.now(timezone.utc).isoformat(),
+                ))
+                conn.executemany("INSERT INTO blocks VALUES (?, ?, ?, ?, ?)", [(writer.name, *b) for b in writer.blocks])
+                conn.executemany("INSERT OR REPLACE INTO ids VALUES (?, ?, ?)", [(i, writer.name, b) for i, b in writer.index_ids])
+                conn.executemany("INSERT OR IGNORE INTO payer_months VALUES (?, ?, ?, ?)", [(p, m, writer.name, b) for p, m, b in writer.index_payers])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def newest(self) -> datetime | None:
+        # created_at of the newest archived payment. Read again only when the index file
+        # changes, so asking on every list call costs a stat()
+        try:
+            mtime = (self.root / INDEX_FILE).stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if self._newest is None or self._newest[0] != mtime:
+            with self._lock:
+                value = self._index().execute("SELECT max(max_created) FROM segments").fetchone()[0]
+            self._newest = (mtime, datetime.fromisoformat(value) if value else None)
+        return self._newest[1]
+
+    def _rows(self, segment: str, block: int, offset: int, length: int) -> list[tuple]:
+        # the lock only guards the shared index connection; blocks are read and decompressed
+        # outside it so newest(), called on the event loop, never waits behind a scan
+        with self._lock:
+            current = {r[0] for r in self._conn.execute("SELECT id FROM ids WHERE segment = ? AND block = ?", (segment, block))}
+        return [row for row in _read_block(str(self.root / segment), offset, length) if row[_ID].bytes in current]
+
+    def get_sync(self, payment_id: UUID) -> PaymentORM | None:
+        with self._lock:
+            conn = self._index()
+            if conn is None:
+                return None
+            hit = conn.execute(
+                "SELECT b.segment, b.offset, b.length FROM ids i JOIN blocks b USING (segment, block) WHERE i.id = ?",
+                (payment_id.bytes,),
+            ).fetchone()
+        if hit is None:
+            return None
+        segment, offset, length = hit
+        for row in _read_block(str(self.root / segment), offset, length):
+            if row[_ID] == payment_id:
+                return to_orm(row)
+        return None
+
+    def list_sync(
+        self,
+        *,
+        payer_id: UUID | None = None,
+        payee_id: UUID | None = None,
+        created_from: datetime | None = None,
+        created_to: datetime | None = None,
+        after: Cursor | None = None,
+        limit: int = 50,
+    ) -> list[PaymentORM]:
+        # newest first, like the hot query; blocks are read a month at a time and the scan
+        # stops at the first month boundary with enough rows. Only payer_id narrows the
+        # blocks through the index, other filters are applied to the decoded rows
+        upper = [t for t in (created_to, after.created_at if after else None) if t is not None]
+        lo = _month(created_from) if created_from else "0000-00"
+        hi = _month(min(map(_utc, upper))) if upper else "9999-99"
+        lower_ts = _utc(created_from) if created_from else None
+        upper_ts = _utc(created_to) if created_to else None
+        cursor = (_utc(after.created_at), after.id) if after else None
+
+        def wanted(row: tuple) -> bool:
+            created = row[_CREATED_AT]
+            return (
+                (payer_id is None or row[_PAYER] == payer_id)
+                and (payee_id is None or row[_PAYEE] == payee_id)
+                and (lower_ts is None or created >= lower_ts)
+                and (upper_ts is None or created < upper_ts)
+                and (cursor is None or (created, row[_ID]) < cursor)
+            )
+
+        with self._lock:
+            conn = self._index()
+            if conn is None:
+                return []
+            if payer_id is not None:
+                blocks = conn.execute(
+                    "SELECT b.month, b.segment, b.block, b.offset, b.length FROM payer_months p "
+                    "JOIN blocks b USING (segment, block) WHERE p.payer_id = ? AND p.month BETWEEN ? AND ? "
+                    "ORDER BY b.month DESC", (payer_id.bytes, lo, hi),
+                ).fetchall()
+            else:
+                blocks = conn.execute(
+                    "SELECT month, segment, block, offset, length FROM blocks WHERE month BETWEEN ? AND ? "
+                    "ORDER BY month DESC", (lo, hi),
+                ).fetchall()
+        out: list[tuple] = []
+        for _, group in groupby(blocks, key=lambda b: b[0]):
+            if len(out) >= limit:
+                break
+            for _, segment, block, offset, length in group:
+                out.extend(row for row in self._rows(segment, block, offset, length) if wanted(row))
+        out.sort(key=lambda row: (row[_CREATED_AT], row[_ID]), reverse=True)
+        return [to_orm(row) for row in out[:limit]]
+
+    def blocks_sync(self) -> list[tuple[str, int, int, int]]:
+        with self._lock:
+            conn = self._index()
+            if conn is None:
+                return []
+            return conn.execute("SELECT segment, block, offset, length FROM blocks ORDER BY segment, block").fetchall()
+
+    def block_sync(self, segment: str, block: int, offset: int, length: int) -> list[PaymentORM]:
+        return [to_orm(row) for row in self._rows(segment, block, offset, length)]
+
+    async def scan(self) -> AsyncIterator[list[PaymentORM]]:
+        # every archived payment once (its newest copy), a block at a time
+        for block in await asyncio.to_thread(self.blocks_sync):
+            yield await asyncio.to_thread(self.block_sync, *block)
+
+    async def get(self, payment_id: UUID) -> PaymentORM | None:
+        return await asyncio.to_thread(self.get_sync, payment_id)
+
+    async def list(self, **filters) -> list[PaymentORM]:
+        return await asyncio.to_thread(lambda: self.list_sync(**filters))
+
+
+ARCHIVE = PaymentArchive(settings.PAYMENTS_ARCHIVE_DIR) if settings.PAYMENTS_ARCHIVE_DIR else None
+
+
+async def archive_payments(
+    archive: PaymentArchive,
+    *,
+    older_than_days: int,
+    block_rows: int = 512,
+    segment_rows: int = 500000,
+    batch_size: int = 10000,
+) -> tuple[int, int, list[str]]:
+    # terminal payments created before now - older_than_days are written to segments and then
+    # deleted from payments, unless they changed after this run started (updated_at guard):
+    # those stay hot and win over the archived copy on reads. Pages are read by keyset from the
+    # primary, so no read stays open while rows are deleted behind it.
+    started = datetime.now(timezone.utc)
+    cutoff = started - timedelta(days=older_than_days)
+    run_id = started.strftime("%Y%m%dT%H%M%S")
+    archive.root.mkdir(parents=True, exist_ok=True)
+    base = (
+        select(*EXPORT_COLUMNS)
+        .where(PaymentORM.created_at < cutoff, PaymentORM.status.in_(TERMINAL), PaymentORM.updated_at < started)
+        .order_by(PaymentORM.created_at, PaymentORM.id)
+        .limit(batch_size)
+    )
+    archived = deleted = 0
+    segments: list[str] = []
+    writer: SegmentWriter | None = None
+
+    async def seal(w: SegmentWriter) -> None:
+        nonlocal archived, deleted
+        size = w.close()
+        await asyncio.to_thread(archive.register, w, size)
+        async with ASYNC_ENGINE.begin() as conn:
+            for i in range(0, len(w.ids), 1000):
+                res = await conn.execute(delete(PaymentORM).where(
+                    PaymentORM.id.in_(w.ids[i:i + 1000]),
+                    PaymentORM.created_at < cutoff,
+                    PaymentORM.updated_at < started,
+                ))
+                deleted += res.rowcount
+        archived += w.rows
+        segments.append(w.name)
+
+    last = None
+    try:
+        while True:
+            q = base if last is None else base.where(tuple_(PaymentORM.created_at, PaymentORM.id) > last)
+            async with ASYNC_ENGINE.connect() as conn:
+                rows = (await conn.execute(q)).all()
+            if not rows:
+                break
+            for row in rows:
+                if writer is None:
+                    writer = SegmentWriter(archive.root, f"seg-{run_id}-{len(segments):04d}.seg", block_rows)
+                writer.add(row)
+                if writer.rows >= segment_rows:
+                    await seal(writer)
+                    writer = None
+            last = (rows[-1].created_at, rows[-1].id)
+        if writer is not None:
+            await seal(writer)
+            writer = None
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    return archived, deleted, segments
@@ -0,0 +1,291 @@
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Callable, Iterator
+from uuid import UUID
+from sqlalchemy import any_, bindparam, column, insert, select, table, text
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+from src.infrastructure.db_async import ASYNC_ENGINE
+from src.infrastructure.payments.export import EXPORT_FIELDS
+from src.infrastructure.payments.orm import PaymentORM, PaymentStatus
+
+# the export format is the ingest format: a file written by export_payments loads back as is
+FIELDS = EXPORT_FIELDS
+CONFLICT_MODES = ("error", "skip", "update")
+STAGING = "payments_ingest"
+_STATUS = FIELDS.index("status")
+_ID = FIELDS.index("id")
+_CREATED_AT = FIELDS.index("created_at")
+_STATUSES = {s.value: s for s in PaymentStatus}
+_LIMITS = {places: Decimal(10) ** (18 - places) for places in (2, 8)}
+
+
+@dataclass(slots=True)
+class IngestStats:
+    read: int = 0
+    loaded: int = 0
+    skipped: int = 0
+    rejected: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self) -> float:
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_records(path: str | Path, fmt: str) -> Iterator[tuple[int, dict]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for lineno, raw in enumerate(csv.DictReader(f), start=2):
+                yield lineno, raw
+            return
+        for lineno, line in enumerate(f, start=1):
+            if line.strip():
+                yield lineno, json.loads(line)
+
+
+def _value(raw: dict, key: str, required: bool = True) -> Any:
+    value = raw.get(key)
+    if value is None or value == "":
+        if required:
+            raise RowError(f"{key} is required")
+        return None
+    return value
+
+
+def _uuid(raw: dict, key: str, required: bool = True) -> UUID | None:
+    value = _value(raw, key, required)
+    try:
+        return UUID(str(value)) if value is not None else None
+    except ValueError:
+        raise RowError(f"{key} is not a UUID") from None
+
+
+def _decimal(raw: dict, key: str, places: int) -> Decimal:
+    try:
+        value = Decimal(str(_value(raw, key)))
+    except InvalidOperation:
+        raise RowError(f"{key} is not a number") from None
+    if not value.is_finite() or value <= 0:
+        raise RowError(f"{key} must be positive")
+    # both columns are NUMERIC(18, places)
+    if value >= _LIMITS[places]:
+        raise RowError(f"{key} is out of range")
+    if value != round(value, places):
+        raise RowError(f"{key} has more than {places} decimal places")
+    return value
+
+
+def _currency(raw: dict, key: str) -> str:
+    value = str(_value(raw, key)).upper()
+    if len(value) != 3 or not value.isalpha():
+        raise RowError(f"{key} is not an ISO 4217 code")
+    return value
+
+
+def _timestamp(raw: dict, key: str, required: bool = True) -> datetime | None:
+    value = _value(raw, key, required)
+    if value is None:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise RowError(f"{key} is not an ISO 8601 timestamp") from None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _status(raw: dict) -> PaymentStatus:
+    value = str(_value(raw, "status", required=False) or "created")
+    status = _STATUSES.get(value.lower())
+    if status is None:
+        raise RowError(f"unknown status {value!r}")
+    return status
+
+
+def _bool(raw: dict, key: str) -> bool:
+    value = raw.get(key)
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("1", "true", "t", "yes")
+
+
+def parse_record(raw: dict) -> tuple:
+    # one tuple per payment in FIELDS order; status stays a PaymentStatus, the loaders encode it
+    created_at = _timestamp(raw, "created_at")
+    description = _value(raw, "description", required=False)
+    if description is not None and len(description) > 255:
+        raise RowError("description is longer than 255 characters")
+    return (
+        _uuid(raw, "id"), _uuid(raw, "payer_id", False), _uuid(raw, "payee_id", False),
+        _decimal(raw, "src_amount", 2), _currency(raw, "src_currency"),
+        _decimal(raw, "dst_amount", 2), _currency(raw, "dst_currency"),
+        _decimal(raw, "fx_rate", 8), str(_value(raw, "fx_provider"))[:64],
+        _timestamp(raw, "fx_at", False) or created_at,
+        description, _status(raw), _bool(raw, "is_reversal"),
+        created_at, _timestamp(raw, "updated_at", False) or created_at,
+    )
+
+
+def id_clashes(rows: list[tuple], stored: dict[UUID, datetime]) -> list[tuple[int, str]]:
+    # (index, reason) of the rows whose id is already taken by a payment with another created_at,
+    # stored or earlier in the same batch. On PostgreSQL the key is (id, created_at), so the
+    # database itself would accept such a row as a second payment with the same id
+    taken = dict(stored)
+    clashes = []
+    for i, row in enumerate(rows):
+        created_at = taken.setdefault(row[_ID], row[_CREATED_AT])
+        if created_at != row[_CREATED_AT]:
+            clashes.append((i, f"id {row[_ID]} already belongs to a payment created at {created_at.isoformat()}"))
+    return clashes
+
+
+def _dedupe(rows: list[tuple]) -> list[tuple]:
+    # ON CONFLICT DO UPDATE refuses to touch the same row twice in one statement; last one wins
+    return list({row[_ID]: row for row in rows}.values())
+
+
+class PostgresLoader:
+    # COPY is the fastest way into Postgres. With on_conflict="error" rows are copied straight
+    # into payments, so a duplicate (id, created_at) fails the batch. Otherwise they are copied into a
+    # session-local staging table and moved over with INSERT .. SELECT .. ON CONFLICT
+    def __init__(self, conn: AsyncConnection, on_conflict: str) -> None:
+        self.conn = conn
+        self.on_conflict = on_conflict
+        self._staged = False
+        staging = table(STAGING, *(column(name) for name in FIELDS))
+        # payments is partitioned by created_at here, so (id, created_at) is the only unique key
+        self.stmt = _on_conflict(
+            pg_insert(PaymentORM.__table__).from_select(list(FIELDS), select(staging)), on_conflict,
+            [PaymentORM.id, PaymentORM.created_at],
+        )
+        self.stored_stmt = select(PaymentORM.id, PaymentORM.created_at).where(
+            PaymentORM.id == any_(bindparam("ids", type_=ARRAY(PaymentORM.id.type)))
+        )
+
+    async def stored(self, ids: list[UUID]) -> dict[UUID, datetime]:
+        # created_at of the payments already stored under these ids (one index probe per partition)
+        res = await self.conn.execute(self.stored_stmt, {"ids": ids})
+        return dict(res.all())
+
+    async def _copy(self, target: str, rows: list[tuple]) -> None:
+        raw = (await self.conn.get_raw_connection()).driver_connection
+        records = [row[:_STATUS] + (row[_STATUS].name,) + row[_STATUS + 1:] for row in rows]
+        await raw.copy_records_to_table(target, records=records, columns=list(FIELDS))
+
+    async def load(self, rows: list[tuple]) -> int:
+        if self.on_conflict == "error":
+            await self._copy(PaymentORM.__tablename__, rows)
+            return len(rows)
+        if not self._staged:
+            await self.conn.execute(text(
+                f"CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING} "
+                f"(LIKE {PaymentORM.__tablename__} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            ))
+            self._staged = True
+        await self._copy(STAGING, rows)
+        # rows written; with "update" that counts overwritten payments as well as new ones
+        return (await self.conn.execute(self.stmt)).rowcount
+
+
+class SqliteLoader:
+    # no COPY here: each batch is one executemany of a single prepared INSERT. A multi-row
+    # VALUES statement would have to be compiled anew for every batch, which costs more
+    # than it saves
+    def __init__(self, conn: AsyncConnection, on_conflict: str) -> None:
+        self.conn = conn
+        self.stmt = insert(PaymentORM.__table__)
+        if on_conflict != "error":
+            self.stmt = _on_conflict(sqlite_insert(PaymentORM.__table__), on_conflict, [PaymentORM.id])
+
+    async def stored(self, ids: list[UUID]) -> dict[UUID, datetime]:
+        # id alone is the primary key here, the conflict mode already covers stored ids
+        return {}
+
+    async def load(self, rows: list[tuple]) -> int:
+        result = await self.conn.execute(self.stmt, [dict(zip(FIELDS, row)) for row in rows])
+        return result.rowcount
+
+
+def _on_conflict(stmt, on_conflict: str, key: list):
+    if on_conflict == "skip":
+        return stmt.on_conflict_do_nothing(index_elements=key)
+    return stmt.on_conflict_do_update(
+        index_elements=key,
+        set_={name: stmt.excluded[name] for name in FIELDS if name not in {c.key for c in key}},
+    )
+
+
+async def ingest_payments(
+    records: Iterator[tuple[int, dict]],
+    *,
+    on_conflict: str = "error",
+    batch_size: int = 10000,
+    max_errors: int = 0,
+    on_reject: Callable[[int, dict, str], None] | None = None,
+    on_progress: Callable[[IngestStats], None] | None = None,
+) -> IngestStats:
+    # every batch is validated in full and committed in its own transaction, so an interrupted
+    # run can be resumed with on_conflict="skip". Invalid rows are reported through on_reject;
+    # past max_errors of them the run stops before loading the batch that crossed the limit
+    if on_conflict not in CONFLICT_MODES:
+        raise ValueError(f"Unknown conflict mode: {on_conflict}")
+    stats = IngestStats()
+
+    def reject(lineno: int, raw: dict, reason: str) -> None:
+        stats.rejected += 1
+        if on_reject:
+            on_reject(lineno, raw, reason)
+        if stats.rejected > max_errors:
+            raise RowError(f"line {lineno}: {reason} (more than {max_errors} invalid rows)") from None
+
+    async with ASYNC_ENGINE.connect() as conn:
+        loader_cls = PostgresLoader if conn.dialect.name == "postgresql" else SqliteLoader
+        loader = loader_cls(conn, on_conflict)
+        batch: list[tuple] = []
+        sources: list[tuple[int, dict]] = []
+
+        async def flush() -> None:
+            async with conn.begin():
+                rows = batch
+                clashes = id_clashes(rows, await loader.stored([row[_ID] for row in rows]))
+                if clashes:
+                    for i, reason in clashes:
+                        reject(*sources[i], reason)
+                    dropped = {i for i, _ in clashes}
+                    rows = [row for i, row in enumerate(rows) if i not in dropped]
+                rows = _dedupe(rows) if on_conflict == "update" else rows
+                loaded = await loader.load(rows) if rows else 0
+            stats.loaded += loaded
+            stats.skipped += len(batch) - len(clashes) - loaded
+            batch.clear()
+            sources.clear()
+            if on_progress:
+                on_progress(stats)
+
+        for lineno, raw in records:
+            stats.read += 1
+            try:
+                batch.append(parse_record(raw))
+            except RowError as e:
+                reject(lineno, raw, str(e))
+                continue
+            sources.append((lineno, raw))
+            if len(batch) >= batch_size:
+                await flush()
+        if batch:
+            await flush()
+    return stats
@@ -13,6 +13,10 @@ class PaymentStatus(str, Enum):
 
 class PaymentORM(Base):
     __tablename__ = "payments"
+    # on PostgreSQL the table is partitioned by created_at month and its primary key is
+    # (id, created_at); see src.infrastructure.payments.partitions. The database then no longer
+    # keeps id unique on its own: ids are uuid4s generated by the application (Payment), and
+    # ingest rejects an id that is already stored under another created_at
     id = Column(PG_UUID, primary_key=True)
     src_amount = Column(Numeric(18, 2), nullable=False)
     src_currency = Column(String(3), nullable=False)
@@ -34,8 +38,10 @@ class PaymentORM(Base):
     updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
 
     __table_args__ = (
-        Index("ix_payments_payer", "payer_id"),
-        Index("ix_payments_payee", "payee_id"),
+        Index("ix_payments_created", "created_at", "id"),
+        Index("ix_payments_updated", "updated_at", "id"),
+        Index("ix_payments_payer_created", "payer_id", "created_at", "id"),
+        Index("ix_payments_payee_created", "payee_id", "created_at", "id"),
         Index("ix_payments_status", "status"),
         Index("ix_payments_dst_ccy", "dst_currency"),
     )
@@ -0,0 +1,146 @@
+import json
+import os
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Sequence
+from uuid import UUID
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select, tuple_
+from src.infrastructure.db_async import ReadSessionLocal
+from src.infrastructure.payments.export import EXPORT_COLUMNS
+from src.infrastructure.payments.orm import PaymentORM
+
+TS = pa.timestamp("us", tz="UTC")
+SCHEMA = pa.schema([
+    ("id", pa.string()), ("payer_id", pa.string()), ("payee_id", pa.string()),
+    ("src_amount", pa.decimal128(18, 2)), ("src_currency", pa.string()),
+    ("dst_amount", pa.decimal128(18, 2)), ("dst_currency", pa.string()),
+    ("fx_rate", pa.decimal128(18, 8)), ("fx_provider", pa.string()), ("fx_at", TS),
+    ("description", pa.string()), ("status", pa.string()), ("is_reversal", pa.bool_()),
+    ("created_at", TS), ("updated_at", TS),
+])
+_ID_COLUMNS = (0, 1, 2)
+_STATUS_COLUMN = 11
+_CREATED_AT = 13
+WATERMARK_FILE = "_watermark.json"
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def read_watermark(root: Path) -> tuple[datetime, UUID] | None:
+    path = root / WATERMARK_FILE
+    if not path.exists():
+        return None
+    raw = json.loads(path.read_text())
+    return datetime.fromisoformat(raw["updated_at"]), UUID(raw["id"])
+
+
+def write_watermark(root: Path, updated_at: datetime, ident: UUID) -> None:
+    tmp = root / f".{WATERMARK_FILE}.tmp"
+    tmp.write_text(json.dumps({"updated_at": _utc(updated_at).isoformat(), "id": str(ident)}))
+    os.replace(tmp, root / WATERMARK_FILE)
+
+
+def to_record_batch(rows: Sequence[Sequence[Any]]) -> pa.RecordBatch:
+    columns = [list(c) for c in zip(*rows)]
+    for i in _ID_COLUMNS:
+        columns[i] = [str(v) if v is not None else None for v in columns[i]]
+    columns[_STATUS_COLUMN] = [getattr(v, "value", v) for v in columns[_STATUS_COLUMN]]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(c, type=f.type) for c, f in zip(columns, SCHEMA)], schema=SCHEMA
+    )
+
+
+class PartitionWriters:
+    # one open ParquetWriter per date=/currency= directory; past max_open the least recently
+    # used one is closed and a later row for that partition starts a new part file.
+    # Files are written under a dot-name and renamed on close, so readers never see a
+    # half-written file.
+    def __init__(self, root: Path, run_id: str, *, max_open: int = 64) -> None:
+        self.root = root
+        self.run_id = run_id
+        self.max_open = max_open
+        self._open: OrderedDict[tuple[str, str], tuple[pq.ParquetWriter, Path, Path]] = OrderedDict()
+        self._seq = 0
+        self.files: list[Path] = []
+
+    def write(self, key: tuple[str, str], batch: pa.RecordBatch) -> None:
+        entry = self._open.get(key)
+        if entry is None:
+            if len(self._open) >= self.max_open:
+                self._close(*self._open.popitem(last=False))
+            day, currency = key
+            directory = self.root / f"date={day}" / f"currency={currency}"
+            directory.mkdir(parents=True, exist_ok=True)
+            self._seq += 1
+            final = directory / f"part-{self.run_id}-{self._seq:05d}.parquet"
+            tmp = directory / f".{final.name}.tmp"
+            entry = (pq.ParquetWriter(tmp, SCHEMA, compression="zstd"), tmp, final)
+            self._open[key] = entry
+        else:
+            self._open.move_to_end(key)
+        entry[0].write_batch(batch)
+
+    def _close(self, key: tuple[str, str], entry: tuple[pq.ParquetWriter, Path, Path]) -> None:
+        writer, tmp, final = entry
+        writer.close()
+        os.replace(tmp, final)
+        self.files.append(final)
+
+    def close(self) -> None:
+        while self._open:
+            self._close(*self._open.popitem(last=False))
+
+    def abort(self) -> None:
+        for writer, tmp, _ in self._open.values():
+            writer.close()
+            tmp.unlink(missing_ok=True)
+        self._open.clear()
+
+
+async def export_parquet(
+    root: str | Path,
+    *,
+    batch_size: int = 50000,
+    lag_sec: float = 60.0,
+    full: bool = False,
+    max_open_files: int = 64,
+) -> tuple[int, list[Path]]:
+    # writes <root>/date=YYYY-MM-DD/currency=XXX/part-*.parquet, incrementally by (updated_at, id):
+    # a payment whose status changed since the stored watermark is exported again, so readers
+    # keep the row with the latest updated_at per id. Rows newer than now - lag_sec are left
+    # for the next run so transactions still in flight cannot slip under the watermark.
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    since = None if full else read_watermark(root)
+    until = datetime.now(timezone.utc) - timedelta(seconds=lag_sec)
+
+    q = select(*EXPORT_COLUMNS).where(PaymentORM.updated_at < until)
+    if since:
+        q = q.where(tuple_(PaymentORM.updated_at, PaymentORM.id) > since)
+    q = q.order_by(PaymentORM.updated_at, PaymentORM.id).execution_options(yield_per=batch_size)
+
+    writers = PartitionWriters(root, datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S"), max_open=max_open_files)
+    exported, last = 0, None
+    try:
+        async with ReadSessionLocal() as session:
+            result = await session.stream(q, bind_arguments={"replica": True})
+            async for rows in result.partitions():
+                groups: dict[tuple[str, str], list] = defaultdict(list)
+                for row in rows:
+                    groups[(_utc(row[_CREATED_AT]).date().isoformat(), row.dst_currency)].append(row)
+                for key, group in groups.items():
+                    writers.write(key, to_record_batch(group))
+                exported += len(rows)
+                last = rows[-1]
+    except BaseException:
+        writers.abort()
+        raise
+    writers.close()
+    if last is not None:
+        write_watermark(root, last.updated_at, last.id)
+    return exported, writers.files
@@ -0,0 +1,112 @@
+import logging
+import re
+from datetime import date, datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from src.infrastructure.payments.orm import PaymentORM
+
+# payments is RANGE-partitioned by created_at on PostgreSQL (migration 0c1d5e2a7b44): one
+# partition per UTC month named payments_pYYYY_MM, plus payments_default for rows no month
+# partition covers. Nothing here applies to SQLite, where payments stays a plain table.
+PARENT = PaymentORM.__tablename__
+DEFAULT = f"{PARENT}_default"
+_NAME = re.compile(rf"^{PARENT}_p(\d{{4}})_(\d{{2}})$")
+
+log = logging.getLogger("payments.partitions")
+
+
+def month_start(value: date, shift: int = 0) -> date:
+    index = value.year * 12 + value.month - 1 + shift
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def is_partition(name: str) -> bool:
+    return name == DEFAULT or _NAME.match(name) is not None
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month.year:04d}_{month.month:02d}"
+
+
+def _bound(month: date) -> str:
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    res = await conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:parent)"), {"parent": PARENT}
+    )
+    return res.first() is not None
+
+
+async def list_partitions(conn: AsyncConnection) -> dict[date, str]:
+    res = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:parent)"
+    ), {"parent": PARENT})
+    months = {}
+    for (name,) in res:
+        m = _NAME.match(name)
+        if m:
+            months[date(int(m[1]), int(m[2]), 1)] = name
+    return dict(sorted(months.items()))
+
+
+async def create_partition(conn: AsyncConnection, month: date) -> str:
+    # built detached and attached afterwards: rows that already landed in the default
+    # partition for this month are moved over first, otherwise ATTACH would refuse
+    name, lo, hi = partition_name(month), _bound(month), _bound(month_start(month, 1))
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = await conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT} WHERE created_at >= '{lo}' AND created_at < '{hi}' RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ))
+    await conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ('{lo}') TO ('{hi}')"))
+    log.info("payments.partition.created", extra={"audit": {
+        "type": "payments.partition.created", "partition": name, "moved_from_default": moved.rowcount,
+    }})
+    return name
+
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: int, *, today: date | None = None) -> list[str]:
+    # current month plus months_ahead future ones; gaps left by a missed run are filled too
+    today = today or datetime.now(timezone.utc).date()
+    async with conn.begin():
+        existing = await list_partitions(conn)
+    first = min([*existing, month_start(today)])
+    wanted = [month_start(first, i) for i in range(_months_between(first, month_start(today, months_ahead)) + 1)]
+    created = []
+    for month in wanted:
+        if month not in existing:
+            async with conn.begin():
+                created.append(await create_partition(conn, month))
+    return created
+
+
+async def detach_partitions(
+    conn: AsyncConnection, retain_months: int, *, drop: bool = False, today: date | None = None
+) -> list[str]:
+    # month partitions that end before the retention window are detached (kept as plain
+    # tables for archiving) or dropped; the current month always stays
+    cutoff = month_start(today or datetime.now(timezone.utc).date(), -max(retain_months, 0))
+    detached = []
+    async with conn.begin():
+        existing = await list_partitions(conn)
+    for month, name in existing.items():
+        if month_start(month, 1) > cutoff:
+            break
+        async with conn.begin():
+            await conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+            if drop:
+                await conn.execute(text(f"DROP TABLE {name}"))
+        log.info("payments.partition.detached", extra={"audit": {
+            "type": "payments.partition.detached", "partition": name, "dropped": drop,
+        }})
+        detached.append(name)
+    return detached
+
+
+def _months_between(a: date, b: date) -> int:
+    return (b.year - a.year) * 12 + b.month - a.month
@@ -0,0 +1,46 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable
+from sqlalchemy import Executable, func, select
+from src.infrastructure.db_async import ASYNC_ENGINE
+from src.infrastructure.payments.archive import PaymentArchive
+from src.infrastructure.payments.orm import PaymentORM
+
+Window = tuple[datetime, datetime | None]
+
+
+async def created_at_windows(chunks: int) -> list[Window]:
+    async with ASYNC_ENGINE.connect() as conn:
+        lo, hi = (await conn.execute(select(func.min(PaymentORM.created_at), func.max(PaymentORM.created_at)))).one()
+    if lo is None:
+        return []
+    step = (hi - lo) / chunks or timedelta(microseconds=1)
+    bounds = [lo + step * i for i in range(chunks)]
+    return [(start, bounds[i + 1] if i + 1 < len(bounds) else None) for i, start in enumerate(bounds)]
+
+
+def in_window(window: Window) -> list:
+    start, end = window
+    return [PaymentORM.created_at >= start] + ([PaymentORM.created_at < end] if end is not None else [])
+
+
+async def aggregate_windows(query: Callable[[Window], Executable], windows: list[Window], workers: int) -> list[list]:
+    # every window is aggregated on its own connection, at most `workers` at a time
+    sem = asyncio.Semaphore(workers)
+
+    async def run(window: Window) -> list:
+        async with sem, ASYNC_ENGINE.connect() as conn:
+            return (await conn.execute(query(window))).all()
+
+    return await asyncio.gather(*(run(w) for w in windows))
+
+
+async def archived_payments(archive: PaymentArchive | None) -> AsyncIterator[list[PaymentORM]]:
+    # archived payments are no longer in the payments table, so rebuilds fold them in from the
+    # segments. Ones that came back into the hot table since are skipped: the windows count them
+    if archive is None:
+        return
+    async for rows in archive.scan():
+        async with ASYNC_ENGINE.connect() as conn:
+            hot = set((await conn.execute(select(PaymentORM.id).where(PaymentORM.id.in_([r.id for r in rows])))).scalars())
+        yield [row for row in rows if row.id not in hot]
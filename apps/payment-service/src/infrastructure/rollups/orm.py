@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Column, DateTime, Numeric, String, text
+from src.infrastructure.db_async import Base
+
+
+class _RollupColumns:
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    src_currency = Column(String(3), primary_key=True)
+    dst_currency = Column(String(3), primary_key=True)
+    status = Column(String(16), primary_key=True)
+    count = Column(BigInteger, nullable=False, server_default=text("0"))
+    src_volume = Column(Numeric(24, 2), nullable=False, server_default=text("0"))
+    dst_volume = Column(Numeric(24, 2), nullable=False, server_default=text("0"))
+
+
+class HourlyRollupORM(_RollupColumns, Base):
+    __tablename__ = "payment_rollups_hourly"
+
+
+class DailyRollupORM(_RollupColumns, Base):
+    __tablename__ = "payment_rollups_daily"
+
+
+ROLLUP_TABLES = {"hour": HourlyRollupORM, "day": DailyRollupORM}
@@ -0,0 +1,74 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+from sqlalchemy import delete, func, insert, select
+from src.domains.payments.rollups import RollupKey, bucket
+from src.infrastructure.db_async import ASYNC_ENGINE
+from src.infrastructure.payments.archive import ARCHIVE, PaymentArchive
+from src.infrastructure.payments.orm import PaymentORM
+from src.infrastructure.projections import Window, aggregate_windows, archived_payments, created_at_windows, in_window
+from src.infrastructure.rollups.orm import ROLLUP_TABLES
+
+
+def _hour_expr():
+    if ASYNC_ENGINE.dialect.name == "postgresql":
+        return func.date_trunc("hour", func.timezone("UTC", PaymentORM.created_at))
+    return func.strftime("%Y-%m-%d %H:00:00", PaymentORM.created_at)
+
+
+def chunk_query(window: Window):
+    hour = _hour_expr().label("bucket")
+    return (
+        select(
+            hour, PaymentORM.src_currency, PaymentORM.dst_currency, PaymentORM.status,
+            func.count(), func.sum(PaymentORM.src_amount), func.sum(PaymentORM.dst_amount),
+        )
+        .where(*in_window(window))
+        .group_by(hour, PaymentORM.src_currency, PaymentORM.dst_currency, PaymentORM.status)
+    )
+
+
+def _as_utc(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+async def rebuild_rollups(
+    *,
+    archive: PaymentArchive | None = ARCHIVE,
+    chunks: int = 8,
+    workers: int = 4,
+    insert_batch: int = 5000,
+) -> dict[str, int]:
+    # hourly rows come from SQL; daily rows are summed from them here rather than scanning payments twice
+    totals: dict[str, dict[RollupKey, list]] = {g: defaultdict(lambda: [0, Decimal(0), Decimal(0)]) for g in ROLLUP_TABLES}
+
+    def add(at, src, dst, status, count, src_volume, dst_volume) -> None:
+        hour = _as_utc(at)
+        status = getattr(status, "value", status)
+        for granularity, key in (("hour", hour), ("day", bucket(hour, "day"))):
+            total = totals[granularity][(key, src, dst, status)]
+            total[0] += count
+            total[1] += Decimal(str(src_volume))
+            total[2] += Decimal(str(dst_volume))
+
+    for rows in await aggregate_windows(chunk_query, await created_at_windows(chunks), workers):
+        for row in rows:
+            add(*row)
+    async for rows in archived_payments(archive):
+        for row in rows:
+            add(bucket(row.created_at, "hour"), row.src_currency, row.dst_currency, row.status,
+                1, row.src_amount, row.dst_amount)
+
+    async with ASYNC_ENGINE.begin() as conn:
+        for granularity, table in ROLLUP_TABLES.items():
+            rows = [
+                {"bucket": at, "src_currency": src, "dst_currency": dst, "status": status,
+                 "count": count, "src_volume": src_volume, "dst_volume": dst_volume}
+                for (at, src, dst, status), (count, src_volume, dst_volume) in totals[granularity].items()
+            ]
+            await conn.execute(delete(table))
+            for i in range(0, len(rows), insert_batch):
+                await conn.execute(insert(table), rows[i:i + insert_batch])
+    return {granularity: len(rows) for granularity, rows in totals.items()}
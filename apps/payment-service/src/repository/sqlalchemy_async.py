@@ -1,78 +1,157 @@
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional, Sequence
 from uuid import UUID
 from decimal import Decimal
-from sqlalchemy import select, delete
+from sqlalchemy import Select, bindparam, select, delete, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from patterns.pagination import Cursor
 from patterns.repository import AbstractRepository
+from src.infrastructure.payments.archive import PaymentArchive
 from src.infrastructure.payments.orm import PaymentORM, PaymentStatus
+from src.domains.common.exceptions import DatabaseConflict
 from src.domains.payments.model import Payment, Status
-from datetime import datetime, timezone
+
+# statements are built once and executed with parameters, so a call only pays for the compiled
+# cache lookup. The SET clause of _UPDATE follows the keys of the parameters it is given; loaded
+# ORM rows are not synchronized because the repository identity map is what callers read.
+# created_at never changes and is the partition key on PostgreSQL: matching on it lets the
+# planner go straight to the one partition holding the row
+_UPDATE = (
+    update(PaymentORM)
+    .where(PaymentORM.id == bindparam("b_id"), PaymentORM.created_at == bindparam("b_created_at"))
+    .execution_options(synchronize_session=False)
+)
+
+
+@lru_cache(maxsize=None)
+def _list_query(by_payer: bool, by_payee: bool, by_from: bool, by_to: bool, after: bool) -> Select:
+    # payments is range-partitioned by created_at month on PostgreSQL; plain created_at
+    # comparisons are what lets the planner skip partitions, a row comparison is not
+    q = select(PaymentORM).order_by(PaymentORM.created_at.desc(), PaymentORM.id.desc())
+    if by_payer: q = q.where(PaymentORM.payer_id == bindparam("payer_id"))
+    if by_payee: q = q.where(PaymentORM.payee_id == bindparam("payee_id"))
+    if by_from: q = q.where(PaymentORM.created_at >= bindparam("created_from", type_=PaymentORM.created_at.type))
+    if by_to: q = q.where(PaymentORM.created_at < bindparam("created_to", type_=PaymentORM.created_at.type))
+    if after:
+        after_created_at = bindparam("after_created_at", type_=PaymentORM.created_at.type)
+        q = q.where(
+            PaymentORM.created_at <= after_created_at,
+            tuple_(PaymentORM.created_at, PaymentORM.id) < tuple_(after_created_at, bindparam("after_id", type_=PaymentORM.id.type)),
+        )
+    return q.offset(bindparam("skip")).limit(bindparam("limit"))
+
+
+def _newest_first(p: Payment) -> tuple:
+    created_at = p.created_at if p.created_at.tzinfo else p.created_at.replace(tzinfo=timezone.utc)
+    return created_at, p.id
 
 
 class SqlAlchemyAsyncPaymentRepository(AbstractRepository[Payment]):
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(self, session: AsyncSession, archive: PaymentArchive | None = None) -> None:
         super().__init__()
         self.session = session
+        self.archive = archive
+        self._pending: dict[UUID, PaymentORM] = {}
+        self._archived: set[UUID] = set()
 
     def _add(self, aggregate: Payment) -> None:
-        self.session.add(self._to_orm(aggregate))
+        orm_obj = self._to_orm(aggregate)
+        self.session.add(orm_obj)
+        self._pending[aggregate.id] = orm_obj
 
     def _get(self, reference: UUID) -> Optional[Payment]:
         raise NotImplementedError("Use async get_async")
 
     async def save(self, aggregate: Payment) -> Payment:
-        now = datetime.now(timezone.utc)
-        orm_obj: Optional[PaymentORM] = await self.session.get(PaymentORM, aggregate.id)
-        if orm_obj is None:
-            orm_obj = PaymentORM(
-                id=aggregate.id,
-                payer_id=aggregate.payer_id,
-                payee_id=aggregate.payee_id,
-                src_amount=aggregate.src_amount,
-                src_currency=aggregate.src_currency,
-                dst_amount=aggregate.dst_amount,
-                dst_currency=aggregate.dst_currency,
-                fx_rate=aggregate.fx_rate,
-                fx_provider=aggregate.fx_provider,
-                fx_at=aggregate.fx_at,
-                description=aggregate.description,
-                status=(aggregate.status.value if hasattr(aggregate.status, "value") else aggregate.status),
-                is_reversal=aggregate.is_reversal,
-                created_at=aggregate.created_at or now,
-                updated_at=now,
-            )
-            self.session.add(orm_obj)
-        else:
-            orm_obj.payer_id = aggregate.payer_id
-            orm_obj.payee_id = aggregate.payee_id
-            orm_obj.src_amount = aggregate.src_amount
-            orm_obj.src_currency = aggregate.src_currency
-            orm_obj.dst_amount = aggregate.dst_amount
-            orm_obj.dst_currency = aggregate.dst_currency
-            orm_obj.fx_rate = aggregate.fx_rate
-            orm_obj.fx_provider = aggregate.fx_provider
-            orm_obj.fx_at = aggregate.fx_at
-            orm_obj.description = aggregate.description
-            orm_obj.status = (aggregate.status.value if hasattr(aggregate.status, "value") else aggregate.status)
-            orm_obj.is_reversal = aggregate.is_reversal
-            orm_obj.updated_at = now
-
-        return self._to_domain(orm_obj)
+        if aggregate.id not in self.identity_map:
+            self._add(aggregate)
+        elif aggregate.id in self._archived:
+            # a change to an archived payment brings it back into the hot table, where reads
+            # find it first; the next archival run supersedes the old archived copy
+            if aggregate.dirty_fields:
+                self._archived.discard(aggregate.id)
+                self._add(aggregate)
+        elif aggregate.dirty_fields:
+            values = self._changed_columns(aggregate)
+            orm_obj = self._pending.get(aggregate.id)
+            if orm_obj is not None:
+                for column, value in values.items():
+                    setattr(orm_obj, column, value)
+            else:
+                res = await self.session.execute(
+                    _UPDATE, {"b_id": aggregate.id, "b_created_at": aggregate.created_at, **values}
+                )
+                if res.rowcount != 1:
+                    raise DatabaseConflict(f"Payment {aggregate.id} was not updated")
+        aggregate.mark_clean()
+        return self._track(aggregate)
 
     async def get_async(self, payment_id: UUID) -> Optional[Payment]:
+        payment = self.identity_map.get(payment_id)
+        if payment is not None:
+            return payment
         row = await self.session.get(PaymentORM, payment_id)
-        return self._to_domain(row) if row else None
+        if row is None and self.archive is not None:
+            row = await self.archive.get(payment_id)
+            if row is not None:
+                self._archived.add(payment_id)
+        return self._load(row)
 
-    async def list_payments(self, *, payer_id: UUID | None = None, payee_id: UUID | None = None, skip: int = 0, limit: int = 50) -> list[Payment]:
-        q = select(PaymentORM).order_by(PaymentORM.created_at.desc())
-        if payer_id: q = q.where(PaymentORM.payer_id == payer_id)
-        if payee_id: q = q.where(PaymentORM.payee_id == payee_id)
-        res = await self.session.execute(q.offset(skip).limit(limit))
+    async def list_payments(
+        self,
+        *,
+        payer_id: UUID | None = None,
+        payee_id: UUID | None = None,
+        skip: int = 0,
+        limit: int = 50,
+        after: Cursor | None = None,
+        created_from: datetime | None = None,
+        created_to: datetime | None = None,
+    ) -> list[Payment]:
+        params = {
+            "payer_id": payer_id, "payee_id": payee_id, "created_from": created_from, "created_to": created_to,
+            "skip": skip, "limit": limit,
+        }
+        if after:
+            params.update(after_created_at=after.created_at, after_id=after.id)
+        q = _list_query(bool(payer_id), bool(payee_id), bool(created_from), bool(created_to), bool(after))
+        res = await self.session.execute(q, params, bind_arguments={"replica": True})
         rows: Sequence[PaymentORM] = res.scalars().all()
-        return [self._to_domain(r) for r in rows]
+        items = [self._load(r) for r in rows]
+        # old payments that never reached a terminal status stay hot, so archived ones can sort
+        # anywhere among them: merge whenever the page reaches back to the archived period.
+        # Offset paging stays on the hot table; the cursor is what reaches the archive
+        if self.archive is None or skip:
+            return items
+        newest = self.archive.newest()
+        if newest is None or (len(items) >= limit and _newest_first(items[-1])[0] > newest):
+            return items
+        hot = {p.id for p in items}
+        archived = await self.archive.list(
+            payer_id=payer_id, payee_id=payee_id, created_from=created_from, created_to=created_to,
+            after=after, limit=limit,
+        )
+        for row in archived:
+            if row.id in hot:
+                continue
+            if row.id not in self.identity_map:
+                self._archived.add(row.id)
+            items.append(self._load(row))
+        items.sort(key=_newest_first, reverse=True)
+        return items[:limit]
 
     async def remove(self, payment_id: UUID) -> None:
         await self.session.execute(delete(PaymentORM).where(PaymentORM.id == payment_id))
+        self.identity_map.pop(payment_id, None)
+        self._pending.pop(payment_id, None)
+
+    @staticmethod
+    def _changed_columns(agg: Payment) -> dict:
+        values = {field: getattr(agg, field) for field in agg.dirty_fields}
+        if "status" in values:
+            values["status"] = PaymentStatus(agg.status.value)
+        return values
 
     @staticmethod
     def _to_domain(row: PaymentORM) -> Payment:
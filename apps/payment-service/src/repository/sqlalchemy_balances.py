@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Mapping
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.domains.payments.balances import Balance, BalanceDelta, BalanceKey
+from src.infrastructure.balances.orm import BalanceORM
+from src.repository.upsert import dialect_insert
+
+
+class SqlAlchemyAsyncBalances:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def apply(self, deltas: Mapping[BalanceKey, BalanceDelta]) -> None:
+        # one INSERT .. ON CONFLICT DO UPDATE adds the deltas in place, so concurrent
+        # relays never read-modify-write the same row
+        if not deltas:
+            return
+        now = datetime.now(timezone.utc)
+        insert = dialect_insert(self.session)
+        stmt = insert(BalanceORM).values([
+            {"user_id": user_id, "currency": currency, "available": available, "pending": pending, "updated_at": now}
+            for (user_id, currency), (available, pending) in deltas.items()
+        ])
+        await self.session.execute(stmt.on_conflict_do_update(
+            index_elements=[BalanceORM.user_id, BalanceORM.currency],
+            set_={
+                "available": BalanceORM.available + stmt.excluded.available,
+                "pending": BalanceORM.pending + stmt.excluded.pending,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        ))
+
+    async def for_user(self, user_id: UUID) -> list[Balance]:
+        res = await self.session.execute(
+            select(BalanceORM.user_id, BalanceORM.currency, BalanceORM.available, BalanceORM.pending)
+            .where(BalanceORM.user_id == user_id)
+            .order_by(BalanceORM.currency),
+            bind_arguments={"replica": True},
+        )
+        return [
+            Balance(user_id=r.user_id, currency=r.currency, available=Decimal(str(r.available)), pending=Decimal(str(r.pending)))
+            for r in res
+        ]
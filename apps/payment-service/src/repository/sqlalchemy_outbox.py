@@ -0,0 +1,107 @@
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+from sqlalchemy import and_, bindparam, exists, func, or_, select, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from patterns.message import Event
+from patterns.outbox import AbstractOutbox, EventCodec, OutboxMessage
+from src.infrastructure.outbox.orm import OutboxORM
+
+# the relay runs these on every poll; built once, they skip statement construction and reuse
+# one compiled form (and one server-side prepared statement per connection on asyncpg)
+_PENDING = and_(OutboxORM.published_at.is_(None), OutboxORM.dead_lettered_at.is_(None))
+# a message backing off after a failure holds back the later messages of its aggregate
+_earlier = aliased(OutboxORM)
+_HELD_BACK = exists().where(
+    _earlier.aggregate_id == OutboxORM.aggregate_id,
+    _earlier.id < OutboxORM.id,
+    _earlier.published_at.is_(None),
+    _earlier.dead_lettered_at.is_(None),
+    _earlier.next_attempt_at > bindparam("now"),
+)
+_FETCH_PENDING = (
+    select(
+        OutboxORM.id, OutboxORM.aggregate_id, OutboxORM.name, OutboxORM.payload,
+        OutboxORM.occurred_at, OutboxORM.attempts,
+    )
+    .where(
+        _PENDING,
+        or_(OutboxORM.next_attempt_at.is_(None), OutboxORM.next_attempt_at <= bindparam("now")),
+        ~_HELD_BACK,
+    )
+    .order_by(OutboxORM.id)
+    .limit(bindparam("limit"))
+)
+_CLAIM = (
+    select(OutboxORM.id)
+    .where(OutboxORM.id == bindparam("message_id"), _PENDING)
+    .with_for_update(skip_locked=True)
+)
+_MARK_PUBLISHED = (
+    update(OutboxORM)
+    .where(OutboxORM.id == bindparam("message_id"))
+    .values(published_at=bindparam("now"))
+    .execution_options(synchronize_session=False)
+)
+_MARK_FAILED = (
+    update(OutboxORM)
+    .where(OutboxORM.id == bindparam("message_id"))
+    .values(attempts=OutboxORM.attempts + 1, last_error=bindparam("error"), next_attempt_at=bindparam("retry_at"))
+    .execution_options(synchronize_session=False)
+)
+_MARK_DEAD = (
+    update(OutboxORM)
+    .where(OutboxORM.id == bindparam("message_id"))
+    .values(attempts=OutboxORM.attempts + 1, last_error=bindparam("error"), dead_lettered_at=bindparam("now"))
+    .execution_options(synchronize_session=False)
+)
+_BACKLOG = select(func.count(OutboxORM.id), func.min(OutboxORM.occurred_at)).where(_PENDING)
+
+
+def _aware(dt: datetime | None) -> datetime | None:
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+class SqlAlchemyAsyncOutbox(AbstractOutbox):
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    def add(self, aggregate_id: str, event: Event) -> None:
+        name, payload = EventCodec.encode(event)
+        self.session.add(OutboxORM(
+            aggregate_id=aggregate_id,
+            name=name,
+            payload=payload,
+            occurred_at=datetime.now(timezone.utc),
+        ))
+
+    async def fetch_pending(self, limit: int) -> List[OutboxMessage]:
+        res = await self.session.execute(_FETCH_PENDING, {"limit": limit, "now": datetime.now(timezone.utc)})
+        return [
+            OutboxMessage(
+                id=r.id, aggregate_id=r.aggregate_id, name=r.name, payload=r.payload,
+                occurred_at=_aware(r.occurred_at), attempts=r.attempts,
+            )
+            for r in res
+        ]
+
+    async def claim(self, message_id: int) -> bool:
+        res = await self.session.execute(_CLAIM, {"message_id": message_id})
+        return res.scalar_one_or_none() is not None
+
+    async def mark_published(self, message_id: int) -> None:
+        await self.session.execute(_MARK_PUBLISHED, {"message_id": message_id, "now": datetime.now(timezone.utc)})
+
+    async def mark_failed(self, message_id: int, error: str, retry_at: datetime) -> None:
+        await self.session.execute(_MARK_FAILED, {"message_id": message_id, "error": error[:512], "retry_at": retry_at})
+
+    async def mark_dead(self, message_id: int, error: str) -> None:
+        await self.session.execute(_MARK_DEAD, {"message_id": message_id, "error": error[:512], "now": datetime.now(timezone.utc)})
+
+    async def backlog(self) -> Tuple[int, datetime | None]:
+        res = await self.session.execute(_BACKLOG)
+        pending, oldest = res.one()
+        return pending, _aware(oldest)
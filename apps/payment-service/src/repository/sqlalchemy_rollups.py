@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Mapping
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.domains.payments.rollups import Rollup, RollupDelta, RollupKey
+from src.infrastructure.rollups.orm import ROLLUP_TABLES
+from src.repository.upsert import dialect_insert
+
+
+def _aware(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class SqlAlchemyAsyncRollups:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def apply(self, granularity: str, deltas: Mapping[RollupKey, RollupDelta]) -> None:
+        if not deltas:
+            return
+        table = ROLLUP_TABLES[granularity]
+        stmt = dialect_insert(self.session)(table).values([
+            {"bucket": at, "src_currency": src, "dst_currency": dst, "status": status,
+             "count": count, "src_volume": src_volume, "dst_volume": dst_volume}
+            for (at, src, dst, status), (count, src_volume, dst_volume) in deltas.items()
+        ])
+        await self.session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.bucket, table.src_currency, table.dst_currency, table.status],
+            set_={
+                "count": table.count + stmt.excluded.count,
+                "src_volume": table.src_volume + stmt.excluded.src_volume,
+                "dst_volume": table.dst_volume + stmt.excluded.dst_volume,
+            },
+        ))
+
+    async def stats(
+        self,
+        granularity: str,
+        *,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        src_currency: str | None = None,
+        dst_currency: str | None = None,
+        status: str | None = None,
+        limit: int = 1000,
+    ) -> list[Rollup]:
+        table = ROLLUP_TABLES[granularity]
+        q = select(
+            table.bucket, table.src_currency, table.dst_currency, table.status,
+            table.count, table.src_volume, table.dst_volume,
+        ).where(table.count != 0)
+        if start: q = q.where(table.bucket >= start)
+        if end: q = q.where(table.bucket < end)
+        if src_currency: q = q.where(table.src_currency == src_currency)
+        if dst_currency: q = q.where(table.dst_currency == dst_currency)
+        if status: q = q.where(table.status == status)
+        q = q.order_by(table.bucket, table.src_currency, table.dst_currency, table.status).limit(limit)
+        res = await self.session.execute(q, bind_arguments={"replica": True})
+        return [
+            Rollup(
+                bucket=_aware(r.bucket), src_currency=r.src_currency, dst_currency=r.dst_currency, status=r.status,
+                count=r.count, src_volume=Decimal(str(r.src_volume)), dst_volume=Decimal(str(r.dst_volume)),
+            )
+            for r in res
+        ]
@@ -0,0 +1,10 @@
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+
+def dialect_insert(session: AsyncSession):
+    # INSERT .. ON CONFLICT is dialect-specific in SQLAlchemy; both backends we run on have it
+    return _INSERTS[session.bind.dialect.name]
@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+# settings are read at import time: point everything at a throwaway directory before src loads
+_TMP = tempfile.mkdtemp(prefix="payment-service-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_TMP}/payments.db"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["PAYMENTS_ARCHIVE_DIR"] = f"{_TMP}/archive"
+os.environ["FX_SNAPSHOT_DIR"] = f"{_TMP}/fx"
+os.environ["FX_HISTORY_PATH"] = f"{_TMP}/fx/history.fxh"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pytest
+from src.infrastructure.db_async import ASYNC_ENGINE, Base
+import src.infrastructure.balances.orm  # noqa: F401
+import src.infrastructure.outbox.orm  # noqa: F401
+import src.infrastructure.payments.orm  # noqa: F401
+import src.infrastructure.rollups.orm  # noqa: F401
+
+
+@pytest.fixture
+async def db():
+    async with ASYNC_ENGINE.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield ASYNC_ENGINE
+    finally:
+        async with ASYNC_ENGINE.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await ASYNC_ENGINE.dispose()
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+from sqlalchemy import func, select
+from src.domains.payments.model import Payment, Status
+from src.infrastructure.async_unit_of_work import AsyncUnitOfWork
+from src.infrastructure.balances.orm import BalanceORM
+from src.infrastructure.balances.rebuild import rebuild_balances
+from src.infrastructure.db_async import ASYNC_ENGINE
+from src.infrastructure.payments.archive import PaymentArchive, archive_payments
+from src.infrastructure.payments.orm import PaymentORM
+from src.infrastructure.rollups.orm import ROLLUP_TABLES
+from src.infrastructure.rollups.rebuild import rebuild_rollups
+
+
+async def _seed() -> None:
+    alice, bob, carol = uuid4(), uuid4(), uuid4()
+    created_at = datetime.now(timezone.utc) - timedelta(days=30)
+    async with AsyncUnitOfWork() as uow:
+        for i, (payer, payee, finish) in enumerate([
+            (alice, bob, Payment.complete), (bob, carol, Payment.complete),
+            (alice, carol, Payment.fail), (carol, alice, None),
+        ]):
+            payment = Payment(
+                payer_id=payer, payee_id=payee,
+                src_amount=Decimal("100.00") + i, src_currency="USD",
+                dst_amount=Decimal("92.00") + i, dst_currency="EUR",
+                fx_rate=Decimal("0.92"), fx_provider="test", fx_at=created_at,
+                created_at=created_at + timedelta(hours=i),
+            )
+            payment.mark_processing()
+            if finish is not None:
+                finish(payment)
+            await uow.payments.save(payment)
+
+
+async def _projections() -> tuple[set, dict]:
+    async with ASYNC_ENGINE.connect() as conn:
+        balances = set((await conn.execute(
+            select(BalanceORM.user_id, BalanceORM.currency, BalanceORM.available, BalanceORM.pending)
+        )).all())
+        rollups = {
+            granularity: set((await conn.execute(select(table))).all()) for granularity, table in ROLLUP_TABLES.items()
+        }
+    return balances, rollups
+
+
+async def test_rebuilds_count_archived_payments(db, tmp_path):
+    archive = PaymentArchive(tmp_path)
+    await _seed()
+    await rebuild_balances(archive=archive)
+    await rebuild_rollups(archive=archive)
+    before = await _projections()
+
+    archived, deleted, _ = await archive_payments(archive, older_than_days=7)
+    assert (archived, deleted) == (3, 3)
+    async with ASYNC_ENGINE.connect() as conn:
+        assert (await conn.execute(select(func.count()).select_from(PaymentORM))).scalar() == 1
+
+    await rebuild_balances(archive=archive)
+    await rebuild_rollups(archive=archive)
+    assert await _projections() == before
+
+
+async def test_rebuild_skips_archived_copies_of_hot_payments(db, tmp_path):
+    archive = PaymentArchive(tmp_path)
+    await _seed()
+    await rebuild_balances(archive=archive)
+    before = await _projections()
+
+    await archive_payments(archive, older_than_days=7)
+    # a refund brings the archived payment back into the hot table; only that copy counts
+    completed = next(row for row in await archive.list(limit=10) if row.status.value == Status.COMPLETED.value)
+    async with AsyncUnitOfWork() as uow:
+        uow.payments.archive = archive
+        payment = await uow.payments.get_async(completed.id)
+        payment.transition(Status.REFUNDED)
+        await uow.payments.save(payment)
+    async with ASYNC_ENGINE.connect() as conn:
+        assert (await conn.execute(select(func.count()).select_from(PaymentORM))).scalar() == 2
+
+    await rebuild_balances(archive=archive)
+    assert (await _projections())[0] == before[0]
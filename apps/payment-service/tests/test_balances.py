@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+from sqlalchemy import select
+from patterns.message_bus import AsyncMessageBus
+from patterns.outbox import OutboxRelay
+from src.domains.payments.model import Payment
+from src.dto.commands import PaymentCreated, PaymentStatusChanged
+from src.gateway.handlers.async_payment import on_payment_created, on_payment_status_changed
+from src.infrastructure.async_unit_of_work import AsyncUnitOfWork
+from src.infrastructure.balances.orm import BalanceORM
+from src.infrastructure.balances.rebuild import rebuild_balances
+from src.infrastructure.db_async import ASYNC_ENGINE
+
+
+async def _balances() -> dict:
+    async with ASYNC_ENGINE.connect() as conn:
+        rows = (await conn.execute(
+            select(BalanceORM.user_id, BalanceORM.currency, BalanceORM.available, BalanceORM.pending)
+        )).all()
+    return {(user_id, currency): (available, pending) for user_id, currency, available, pending in rows}
+
+
+async def test_rebuild_matches_incremental_balances(db):
+    alice, bob, carol = uuid4(), uuid4(), uuid4()
+    async with AsyncUnitOfWork() as uow:
+        for i, (payer, payee, steps) in enumerate([
+            (alice, bob, ("mark_processing", "complete")),
+            (bob, carol, ("mark_processing", "complete")),
+            (alice, carol, ("mark_processing", "fail")),
+            (carol, alice, ("mark_processing",)),
+            (bob, alice, ()),
+        ]):
+            payment = Payment.create_with_quote(
+                payer_id=payer, payee_id=payee,
+                src_amount=Decimal("100.00") + i, src_currency="USD",
+                dst_amount=Decimal("92.00") + i, dst_currency="EUR",
+                fx_rate=Decimal("0.92"), fx_provider="test", fx_at=datetime.now(timezone.utc),
+            )
+            for step in steps:
+                getattr(payment, step)()
+            await uow.payments.save(payment)
+
+    bus = AsyncMessageBus(
+        event_handlers={PaymentCreated: [on_payment_created], PaymentStatusChanged: [on_payment_status_changed]},
+        raise_on_error=True,
+    )
+    relay = OutboxRelay(uow_factory=AsyncUnitOfWork, bus=bus, poll_interval=0)
+    while await relay.run_once():
+        pass
+    incremental = await _balances()
+    assert incremental[(alice, "USD")] == (Decimal("-100.00"), Decimal("0.00"))
+    assert incremental[(alice, "EUR")] == (Decimal("0.00"), Decimal("191.00"))
+
+    await rebuild_balances()
+    assert await _balances() == incremental
@@ -0,0 +1,165 @@
+import asyncio
+
+import aiosqlite
+import pytest
+from sqlalchemy import Column, MetaData, String, Table, insert, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from src.infrastructure.db_routing import ReplicaPool, RoutingSession
+
+metadata = MetaData()
+node = Table("node", metadata, Column("name", String, nullable=False))
+
+# counts far enough that the query is still running when the test cancels it
+_SLOW = text("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 3000000) SELECT count(*) FROM n")
+
+
+class Databases:
+    # one primary and two replicas, each a SQLite file holding its own name in `node`
+    def __init__(self, tmp_path) -> None:
+        self.primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+        self.replicas = [
+            create_async_engine(f"sqlite+aiosqlite:///{tmp_path / f'replica{i}.db'}", connect_args={"async_creator_fn": self._connect(i)})
+            for i in range(2)
+        ]
+        self.down: set[int] = set()
+
+    def _connect(self, i: int):
+        # a replica in `down` refuses connections the way asyncpg does, with a bare OSError
+        async def connect(*args, **kwargs):
+            if i in self.down:
+                raise ConnectionRefusedError(f"replica{i} is unreachable")
+            return await aiosqlite.connect(*args, **kwargs)
+        return connect
+
+    async def start(self) -> None:
+        for name, engine in [("primary", self.primary), ("replica0", self.replicas[0]), ("replica1", self.replicas[1])]:
+            async with engine.begin() as conn:
+                await conn.run_sync(metadata.create_all)
+                await conn.execute(insert(node).values(name=name))
+            # start every test with empty pools, so the first read of each replica connects
+            await engine.dispose()
+
+    async def close(self) -> None:
+        for engine in [self.primary, *self.replicas]:
+            await engine.dispose()
+
+    def pool(self, replicas: int = 2, **kwargs) -> ReplicaPool:
+        return ReplicaPool(self.replicas[:replicas], **kwargs)
+
+    def sessions(self, pool: ReplicaPool, **kwargs) -> async_sessionmaker:
+        return async_sessionmaker(
+            bind=self.primary, expire_on_commit=False, class_=AsyncSession,
+            sync_session_class=RoutingSession, replicas=pool, **kwargs,
+        )
+
+    def engine(self, pool: ReplicaPool, i: int):
+        return pool.replicas[i].engine.sync_engine
+
+
+@pytest.fixture
+async def dbs(tmp_path):
+    databases = Databases(tmp_path)
+    await databases.start()
+    try:
+        yield databases
+    finally:
+        await databases.close()
+
+
+async def _names(session: AsyncSession, **bind_arguments) -> list[str]:
+    return list((await session.scalars(select(node.c.name).order_by(node.c.name), bind_arguments=bind_arguments)).all())
+
+
+async def test_replica_reads_go_to_a_replica(dbs):
+    pool = dbs.pool(replicas=1)
+    async with dbs.sessions(pool)() as session:
+        assert await _names(session) == ["primary"]
+        assert await _names(session, replica=True) == ["replica0"]
+    async with dbs.sessions(pool, replica=True)() as session:
+        assert await _names(session) == ["replica0"]
+        # a statement can still ask for the primary explicitly
+        assert await _names(session, replica=False) == ["primary"]
+
+
+async def test_session_pins_to_the_primary_after_a_write(dbs):
+    async with dbs.sessions(dbs.pool(replicas=1), replica=True)() as session:
+        assert await _names(session) == ["replica0"]
+        await session.execute(insert(node).values(name="written"))
+        assert session.sync_session.pinned
+        # reads its own write, which the replica does not have
+        assert await _names(session) == ["primary", "written"]
+        assert await _names(session, replica=True) == ["primary", "written"]
+
+
+async def test_round_robin_alternates_between_replicas(dbs):
+    pool = dbs.pool()
+    assert [pool.choose() for _ in range(4)] == [dbs.engine(pool, 0), dbs.engine(pool, 1)] * 2
+
+    async with dbs.sessions(pool, replica=True)() as session:
+        assert [await _names(session) for _ in range(2)] == [["replica0"], ["replica1"]]
+
+
+async def test_least_connections_picks_the_least_busy_replica(dbs):
+    pool = dbs.pool(strategy="least_connections")
+    assert pool.choose() is dbs.engine(pool, 0)
+    async with dbs.replicas[0].connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        assert pool.replicas[0].in_use == 1
+        assert [pool.choose() for _ in range(3)] == [dbs.engine(pool, 1)] * 3
+    assert pool.replicas[0].in_use == 0
+    assert pool.choose() is dbs.engine(pool, 0)
+
+
+def test_unknown_strategy_is_rejected(dbs):
+    with pytest.raises(ValueError, match="Unknown replica strategy"):
+        dbs.pool(strategy="random")
+
+
+async def test_unreachable_replica_is_ejected_and_readmitted(dbs):
+    pool = dbs.pool(eject_sec=0.3)
+    dbs.down.add(0)
+    async with dbs.sessions(pool, replica=True)() as session:
+        with pytest.raises(OSError, match="replica0 is unreachable"):
+            await _names(session)
+    assert not pool.replicas[0].healthy
+
+    # ejected: every read goes to the other replica while the window lasts
+    async with dbs.sessions(pool, replica=True)() as session:
+        assert [await _names(session) for _ in range(3)] == [["replica1"]] * 3
+
+    dbs.down.clear()
+    await asyncio.sleep(0.35)
+    assert pool.replicas[0].healthy
+    async with dbs.sessions(pool, replica=True)() as session:
+        assert sorted([(await _names(session))[0] for _ in range(2)]) == ["replica0", "replica1"]
+
+
+async def test_all_replicas_ejected_falls_back_to_the_primary(dbs):
+    pool = dbs.pool(replicas=1)
+    dbs.down.add(0)
+    async with dbs.sessions(pool, replica=True)() as session:
+        with pytest.raises(OSError):
+            await _names(session)
+    async with dbs.sessions(pool, replica=True)() as session:
+        assert await _names(session) == ["primary"]
+
+
+async def test_sql_error_does_not_eject(dbs):
+    pool = dbs.pool(replicas=1)
+    async with dbs.sessions(pool, replica=True)() as session:
+        with pytest.raises(OperationalError):
+            await session.execute(text("SELECT * FROM missing"))
+    assert pool.replicas[0].healthy
+
+
+async def test_cancelled_query_does_not_eject(dbs):
+    pool = dbs.pool(replicas=1)
+    async with dbs.sessions(pool, replica=True)() as session:
+        query = asyncio.create_task(session.execute(_SLOW))
+        await asyncio.sleep(0.1)
+        assert not query.done()
+        query.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await query
+    assert pool.replicas[0].healthy
@@ -0,0 +1,39 @@
+import threading
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from src.infrastructure.fx import history
+from src.infrastructure.fx.history import RateHistory
+from src.infrastructure.fx.rates import RateSnapshot
+
+
+def _snap(ts: int, usd: str) -> RateSnapshot:
+    return RateSnapshot.from_payload({"timestamp": ts, "rates": {"EUR": 1, "USD": usd, "KZT": 512}})
+
+
+def test_lookups_do_not_wait_for_an_append_to_reach_disk(tmp_path, monkeypatch):
+    h = RateHistory(tmp_path / "history.fxh")
+    assert h.append(_snap(1_700_000_000, "1.25"))
+
+    syncing, release = threading.Event(), threading.Event()
+    fsync = history.os.fsync
+
+    def slow_fsync(fd: int) -> None:
+        syncing.set()
+        release.wait(5)
+        fsync(fd)
+
+    monkeypatch.setattr(history.os, "fsync", slow_fsync)
+    writer = threading.Thread(target=h.append, args=(_snap(1_700_003_600, "2"),))
+    writer.start()
+    try:
+        assert syncing.wait(5)
+        # the new version is not published while its write is in flight
+        at = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        assert h.rate("EUR", "USD", at) == Decimal("1.25")
+        assert h.as_of(at).version == 1_700_000_000
+    finally:
+        release.set()
+        writer.join(5)
+    assert h.rate("EUR", "USD", at) == Decimal("2")
+    assert len(h) == len(RateHistory(tmp_path / "history.fxh")) == 2
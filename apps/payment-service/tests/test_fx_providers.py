@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.infrastructure.fx.providers import FixerProvider, HedgedFetcher, OpenExchangeRatesProvider
+
+FIXER, OXR = FixerProvider.name, OpenExchangeRatesProvider.name
+
+
+class StubProviders:
+    # fixer and openexchangerates behind one test server; each answers after `delay[name]`
+    # seconds, or with a 502 while `down[name]` is set
+    def __init__(self) -> None:
+        self.delay = {FIXER: 0.0, OXR: 0.0}
+        self.down = {FIXER: False, OXR: False}
+        self.hits = {FIXER: 0, OXR: 0}
+        self.app = web.Application()
+        self.app.router.add_get("/fixer/latest", self._fixer)
+        self.app.router.add_get("/oxr/latest.json", self._oxr)
+        self.server = TestServer(self.app)
+
+    async def _answer(self, name: str, payload: dict) -> web.Response:
+        self.hits[name] += 1
+        if self.down[name]:
+            return web.Response(status=502, text="bad gateway")
+        await asyncio.sleep(self.delay[name])
+        return web.json_response(payload)
+
+    async def _fixer(self, request: web.Request) -> web.Response:
+        return await self._answer(FIXER, {
+            "success": True, "timestamp": 1760659200, "base": "EUR", "rates": {"EUR": 1, "USD": 1.0712},
+        })
+
+    async def _oxr(self, request: web.Request) -> web.Response:
+        return await self._answer(OXR, {"timestamp": 1760659260, "base": "USD", "rates": {"USD": 1, "EUR": 0.9335}})
+
+    def fetcher(self, **kwargs) -> HedgedFetcher:
+        options = {"timeout_sec": 5, "min_delay_sec": 0.1, "max_delay_sec": 0.1, **kwargs}
+        return HedgedFetcher([
+            FixerProvider(str(self.server.make_url("/fixer")), "key"),
+            OpenExchangeRatesProvider(str(self.server.make_url("/oxr")), "app"),
+        ], **options)
+
+
+@pytest.fixture
+async def stub():
+    providers = StubProviders()
+    await providers.server.start_server()
+    try:
+        yield providers
+    finally:
+        await providers.server.close()
+
+
+async def _timed(fetcher: HedgedFetcher) -> tuple[dict, float]:
+    start = time.perf_counter()
+    payload = await fetcher.fetch()
+    return payload, time.perf_counter() - start
+
+
+async def test_fast_primary_is_not_hedged(stub):
+    payload, _ = await _timed(stub.fetcher())
+    assert payload["provider"] == FIXER
+    assert stub.hits == {FIXER: 1, OXR: 0}
+
+
+async def test_slow_primary_is_hedged_after_the_delay_and_cancelled(stub):
+    stub.delay[FIXER] = 2.0
+    fetcher = stub.fetcher()
+    payload, elapsed = await _timed(fetcher)
+    assert payload["provider"] == OXR
+    assert 0.1 <= elapsed < 1.0
+    assert stub.hits == {FIXER: 1, OXR: 1}
+    # the losing request was cancelled: no outcome, but its time so far counts as latency
+    fixer = fetcher.health[FIXER]
+    assert not fixer.outcomes and len(fixer.latencies) == 1
+
+
+async def test_hedge_delay_follows_the_primary_latency(stub):
+    stub.delay[FIXER] = 0.05
+    fetcher = stub.fetcher(min_delay_sec=0.01, max_delay_sec=1.0)
+    assert fetcher.hedge_delay(fetcher.providers[0]) == 1.0
+    for _ in range(5):
+        await fetcher.fetch()
+    assert 0.05 <= fetcher.hedge_delay(fetcher.providers[0]) < 0.5
+
+    # a primary slower than its usual latency is hedged after that latency, not max_delay
+    stub.delay[FIXER] = 2.0
+    payload, elapsed = await _timed(fetcher)
+    assert payload["provider"] == OXR
+    assert elapsed < 0.6
+
+
+async def test_failure_moves_to_the_next_provider_at_once(stub):
+    stub.down[FIXER] = True
+    payload, elapsed = await _timed(stub.fetcher(max_delay_sec=2.0))
+    assert payload["provider"] == OXR
+    assert elapsed < 1.0
+    assert stub.hits == {FIXER: 1, OXR: 1}
+
+
+async def test_failing_provider_is_ejected_and_readmitted(stub):
+    stub.down[FIXER] = True
+    fetcher = stub.fetcher(min_requests=2, max_error_rate=0.5, eject_sec=0.3)
+    for _ in range(2):
+        assert (await fetcher.fetch())["provider"] == OXR
+    assert fetcher.health[FIXER].ejected
+
+    # ejected: not asked at all while the window lasts
+    assert (await fetcher.fetch())["provider"] == OXR
+    assert stub.hits[FIXER] == 2
+
+    stub.down[FIXER] = False
+    await asyncio.sleep(0.35)
+    assert (await fetcher.fetch())["provider"] == FIXER
+    assert not fetcher.health[FIXER].ejected
+    assert stub.hits[FIXER] == 3
+
+
+async def test_all_providers_failing_raises(stub):
+    stub.down.update({FIXER: True, OXR: True})
+    with pytest.raises(RuntimeError, match="All FX providers failed") as info:
+        await stub.fetcher().fetch()
+    assert FIXER in str(info.value) and OXR in str(info.value)
@@ -0,0 +1,83 @@
+from uuid import UUID, uuid4
+
+from sqlalchemy import select
+from patterns.message_bus import AsyncMessageBus
+from patterns.outbox import OutboxRelay
+from src.dto.commands import PaymentStatusChanged
+from src.infrastructure.async_unit_of_work import AsyncUnitOfWork
+from src.infrastructure.outbox.orm import OutboxORM
+
+
+def _relay(handler, **kwargs) -> OutboxRelay:
+    bus = AsyncMessageBus(event_handlers={PaymentStatusChanged: [handler]}, raise_on_error=True)
+    return OutboxRelay(uow_factory=AsyncUnitOfWork, bus=bus, poll_interval=0, **kwargs)
+
+
+async def _enqueue(*events: PaymentStatusChanged) -> None:
+    async with AsyncUnitOfWork() as uow:
+        for event in events:
+            uow.outbox.add(str(event.payment_id), event)
+
+
+def _event(payment_id: UUID, new_status: str) -> PaymentStatusChanged:
+    return PaymentStatusChanged(payment_id=payment_id, old_status="PENDING", new_status=new_status)
+
+
+async def _rows() -> list[OutboxORM]:
+    async with AsyncUnitOfWork() as uow:
+        res = await uow.session.execute(select(OutboxORM).order_by(OutboxORM.id))
+        return list(res.scalars())
+
+
+async def test_poison_messages_are_dead_lettered_and_later_events_publish(db):
+    poison = {uuid4(), uuid4()}
+    delivered = []
+
+    async def handler(event: PaymentStatusChanged) -> None:
+        if event.payment_id in poison:
+            raise RuntimeError("handler always fails")
+        delivered.append(event.new_status)
+
+    # the poison messages fill a whole batch at the head of the queue
+    relay = _relay(handler, batch_size=2, max_attempts=3, retry_base_sec=0, retry_max_sec=0)
+    await _enqueue(*(_event(p, f"poison-{i}") for i, p in enumerate(sorted(poison))))
+    await _enqueue(*(_event(uuid4(), f"ok-{i}") for i in range(3)))
+
+    for _ in range(6):
+        await relay.run_once()
+
+    assert delivered == ["ok-0", "ok-1", "ok-2"]
+    for row in await _rows():
+        if row.payload["new_status"].startswith("poison"):
+            assert (row.published_at, row.attempts) == (None, 3)
+            assert row.dead_lettered_at is not None
+        else:
+            assert row.published_at is not None
+    async with AsyncUnitOfWork() as uow:
+        assert await uow.outbox.backlog() == (0, None)
+        assert await uow.outbox.fetch_pending(10) == []
+
+
+async def test_backing_off_message_holds_back_its_aggregate_only(db):
+    failing, other = uuid4(), uuid4()
+    delivered = []
+
+    async def handler(event: PaymentStatusChanged) -> None:
+        if event.new_status == "PROCESSING" and event.payment_id == failing:
+            raise RuntimeError("transient")
+        delivered.append((event.payment_id, event.new_status))
+
+    relay = _relay(handler, batch_size=10, max_attempts=5, retry_base_sec=60, retry_max_sec=60)
+    await _enqueue(_event(failing, "PROCESSING"), _event(failing, "COMPLETED"), _event(other, "PROCESSING"))
+
+    assert await relay.run_once() == 1
+    assert await relay.run_once() == 0
+    assert delivered == [(other, "PROCESSING")]
+    first, second, _ = await _rows()
+    assert (first.attempts, first.published_at, first.dead_lettered_at) == (1, None, None)
+    assert first.next_attempt_at is not None
+    assert (second.attempts, second.published_at) == (0, None)
+    async with AsyncUnitOfWork() as uow:
+        # neither the failed message nor the later one of the same payment is due yet
+        assert await uow.outbox.fetch_pending(10) == []
+        assert (await uow.outbox.backlog())[0] == 2
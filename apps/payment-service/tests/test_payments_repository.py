@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from src.domains.common.exceptions import DatabaseConflict
+from src.domains.payments.model import Payment, Status
+from src.infrastructure.async_unit_of_work import AsyncUnitOfWork
+from src.infrastructure.payments.ingest import id_clashes, ingest_payments, parse_record
+
+
+def _payment(**kwargs) -> Payment:
+    return Payment(
+        payer_id=uuid4(), payee_id=uuid4(),
+        src_amount=Decimal("100.00"), src_currency="USD",
+        dst_amount=Decimal("92.00"), dst_currency="EUR",
+        fx_rate=Decimal("0.92"), fx_provider="test", fx_at=datetime.now(timezone.utc),
+        **kwargs,
+    )
+
+
+def _record(payment_id, created_at: datetime) -> dict:
+    return {
+        "id": str(payment_id), "payer_id": str(uuid4()), "payee_id": str(uuid4()),
+        "src_amount": "10.00", "src_currency": "USD", "dst_amount": "9.20", "dst_currency": "EUR",
+        "fx_rate": "0.92", "fx_provider": "test", "status": "completed",
+        "created_at": created_at.isoformat(),
+    }
+
+
+async def test_save_updates_the_row_by_id_and_created_at(db):
+    payment = _payment()
+    async with AsyncUnitOfWork() as uow:
+        await uow.payments.save(payment)
+
+    async with AsyncUnitOfWork() as uow:
+        loaded = await uow.payments.get_async(payment.id)
+        loaded.mark_processing()
+        await uow.payments.save(loaded)
+
+    async with AsyncUnitOfWork() as uow:
+        assert (await uow.payments.get_async(payment.id)).status is Status.PROCESSING
+
+
+async def test_save_refuses_to_lose_an_update(db):
+    payment = _payment()
+    async with AsyncUnitOfWork() as uow:
+        await uow.payments.save(payment)
+
+    with pytest.raises(DatabaseConflict):
+        async with AsyncUnitOfWork() as uow:
+            loaded = await uow.payments.get_async(payment.id)
+            async with AsyncUnitOfWork() as other:
+                await other.payments.remove(payment.id)
+            loaded.mark_processing()
+            await uow.payments.save(loaded)
+
+
+def test_id_clashes_with_stored_and_batch_rows():
+    created_at = datetime(2025, 1, 10, tzinfo=timezone.utc)
+    stored_id, batch_id = uuid4(), uuid4()
+    rows = [
+        parse_record(_record(stored_id, created_at)),
+        parse_record(_record(stored_id, created_at + timedelta(days=40))),
+        parse_record(_record(batch_id, created_at)),
+        parse_record(_record(batch_id, created_at + timedelta(days=40))),
+        parse_record(_record(batch_id, created_at)),
+    ]
+    clashes = id_clashes(rows, {stored_id: created_at})
+    assert [i for i, _ in clashes] == [1, 3]
+
+
+async def test_ingest_rejects_an_id_reused_with_another_created_at(db):
+    created_at = datetime(2025, 1, 10, tzinfo=timezone.utc)
+    reused, other = uuid4(), uuid4()
+    rejected = []
+    records = enumerate(
+        [_record(reused, created_at), _record(reused, created_at + timedelta(days=40)), _record(other, created_at)],
+        start=1,
+    )
+    stats = await ingest_payments(
+        records, on_conflict="skip", max_errors=5, on_reject=lambda lineno, raw, reason: rejected.append(lineno),
+    )
+    assert (stats.read, stats.loaded, stats.skipped, stats.rejected) == (3, 2, 0, 1)
+    assert rejected == [2]
@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+from sqlalchemy import select
+from patterns.message_bus import AsyncMessageBus
+from patterns.outbox import OutboxRelay
+from src.domains.payments.model import Payment, Status
+from src.dto.commands import PaymentRefunded
+from src.gateway.handlers.async_payment import on_payment_refunded
+from src.infrastructure.async_unit_of_work import AsyncUnitOfWork
+from src.infrastructure.payments.orm import PaymentORM
+
+
+class _Fx:
+    async def historical_rate(self, *, base, quote, at):
+        return Decimal("0.5")
+
+
+def _relay(*handlers) -> OutboxRelay:
+    bus = AsyncMessageBus(event_handlers={PaymentRefunded: list(handlers)}, dependencies={"fx": _Fx()}, raise_on_error=True)
+    return OutboxRelay(uow_factory=AsyncUnitOfWork, bus=bus, poll_interval=0, retry_base_sec=0, retry_max_sec=0)
+
+
+async def _refunded_payment() -> Payment:
+    payment = Payment(
+        payer_id=uuid4(), payee_id=uuid4(),
+        src_amount=Decimal("100.00"), src_currency="USD",
+        dst_amount=Decimal("200.00"), dst_currency="EUR",
+        fx_rate=Decimal("2"), fx_provider="test", fx_at=datetime.now(timezone.utc),
+    )
+    payment.mark_processing()
+    payment.complete()
+    async with AsyncUnitOfWork() as uow:
+        await uow.payments.save(payment)
+    async with AsyncUnitOfWork() as uow:
+        payment = await uow.payments.get_async(payment.id)
+        payment.refund(original_payment_id=payment.id)
+        await uow.payments.save(payment)
+    return payment
+
+
+async def _reversals() -> list[PaymentORM]:
+    async with AsyncUnitOfWork() as uow:
+        res = await uow.session.execute(select(PaymentORM).where(PaymentORM.description.is_not(None)))
+        return list(res.scalars())
+
+
+async def test_reversal_is_committed_with_the_delivery(db):
+    async def fails_after(evt: PaymentRefunded) -> None:
+        raise RuntimeError("second handler fails")
+
+    payment = await _refunded_payment()
+    await _relay(on_payment_refunded, fails_after).run_once()
+    assert await _reversals() == []
+
+    await _relay(on_payment_refunded).run_once()
+    [reversal] = await _reversals()
+    assert (reversal.payer_id, reversal.payee_id, reversal.src_amount, reversal.fx_rate) == (
+        payment.payee_id, payment.payer_id, Decimal("200.00"), Decimal("0.5"),
+    )
+    async with AsyncUnitOfWork() as uow:
+        assert (await uow.payments.get_async(payment.id)).status is Status.REFUNDED
+
+
+async def test_redelivered_refund_creates_one_reversal(db):
+    payment = await _refunded_payment()
+    async with AsyncUnitOfWork() as uow:
+        uow.outbox.add(str(payment.id), PaymentRefunded(payment_id=payment.id, original_payment_id=payment.id))
+
+    await _relay(on_payment_refunded).run_once()
+    assert len(await _reversals()) == 1
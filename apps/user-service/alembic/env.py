@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config, AsyncEngine
 from alembic import context
 
 from src.infrastructure.users.orm import Base
+from src.infrastructure.outbox import orm as outbox_orm  # noqa: F401
 from src.config import settings
 
 config = context.config
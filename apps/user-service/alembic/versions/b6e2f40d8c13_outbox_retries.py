@@ -0,0 +1,39 @@
+"""outbox retries
+
+Revision ID: b6e2f40d8c13
+Revises: 2f3c225c59de
+Create Date: 2026-10-17 02:10:14.532907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2f40d8c13'
+down_revision: Union[str, None] = '2f3c225c59de'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OLD_PENDING = sa.text('published_at IS NULL')
+PENDING = sa.text('published_at IS NULL AND dead_lettered_at IS NULL')
+RETRYING = sa.text('published_at IS NULL AND dead_lettered_at IS NULL AND next_attempt_at IS NOT NULL')
+
+
+def upgrade() -> None:
+    op.add_column('outbox', sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('outbox', sa.Column('dead_lettered_at', sa.DateTime(timezone=True), nullable=True))
+    op.drop_index('ix_outbox_pending', table_name='outbox', postgresql_where=OLD_PENDING, sqlite_where=OLD_PENDING)
+    op.create_index('ix_outbox_pending', 'outbox', ['id'], unique=False, postgresql_where=PENDING, sqlite_where=PENDING)
+    op.create_index('ix_outbox_retrying', 'outbox', ['aggregate_id', 'id'], unique=False, postgresql_where=RETRYING, sqlite_where=RETRYING)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_retrying', table_name='outbox', postgresql_where=RETRYING, sqlite_where=RETRYING)
+    op.drop_index('ix_outbox_pending', table_name='outbox', postgresql_where=PENDING, sqlite_where=PENDING)
+    op.create_index('ix_outbox_pending', 'outbox', ['id'], unique=False, postgresql_where=OLD_PENDING, sqlite_where=OLD_PENDING)
+    with op.batch_alter_table('outbox') as batch_op:
+        batch_op.drop_column('dead_lettered_at')
+        batch_op.drop_column('next_attempt_at')
@@ -0,0 +1,43 @@
+# Per-call latency of the hot repository and outbox queries against a scratch SQLite database.
+# From apps/user-service:
+#   python -m benchmarks.statements [-n 3000]
+# Check out the previous revision of the repositories to get the number to compare against.
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+_TMP = tempfile.mkdtemp(prefix="user-service-bench-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_TMP}/bench.db"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+
+from src.infrastructure.async_unit_of_work import AsyncUnitOfWork  # noqa: E402
+from src.infrastructure.db_async import ASYNC_ENGINE, Base  # noqa: E402
+import src.infrastructure.outbox.orm  # noqa: E402,F401
+
+
+async def timed(label: str, call, n: int) -> None:
+    await call()
+    start = time.perf_counter()
+    for _ in range(n):
+        await call()
+    print(f"{label:<28} {(time.perf_counter() - start) / n * 1e6:8.1f} us/call")
+
+
+async def main(n: int) -> None:
+    async with ASYNC_ENGINE.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncUnitOfWork() as uow:
+        await timed("get_by_email", lambda: uow.users.get_by_email("nobody@example.com"), n)
+        await timed("get_by_username", lambda: uow.users.get_by_username("nobody"), n)
+        await timed("list_users", lambda: uow.users.list_users(limit=5), n)
+        await timed("outbox.fetch_pending", lambda: uow.outbox.fetch_pending(100), n)
+        await timed("outbox.backlog", uow.outbox.backlog, n)
+    await ASYNC_ENGINE.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hot query latency")
+    parser.add_argument("-n", type=int, default=3000, help="calls per query")
+    asyncio.run(main(parser.parse_args().n))
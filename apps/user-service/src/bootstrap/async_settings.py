@@ -1,8 +1,10 @@
 from typing import Mapping, Sequence, Type
 from patterns.message import Command, Event
 from patterns.message_bus import AsyncMessageBus
-from patterns.unit_of_work import AsyncAbstractUnitOfWork
-from patterns.observability import ObservabilityHook
+from patterns.observability import ObservabilityHook, OutboxHook
+from patterns.outbox import OutboxRelay
+from src.config import settings
+from src.infrastructure.async_unit_of_work import AsyncUnitOfWork
 from src.dto.commands import RegisterUser, UpdateUserProfile, ChangeUserPassword, ActivateUser, DeactivateUser, PromoteToAdmin
 from src.gateway.handlers.async_user import (
     handle_register_user, handle_update_user_profile, handle_change_user_password,
@@ -11,7 +13,7 @@ from src.gateway.handlers.async_user import (
 )
 from src.dto.commands import UserRegistered
 
-def bootstrap_async(uow: AsyncAbstractUnitOfWork, hook: ObservabilityHook | None = None, **deps) -> AsyncMessageBus:
+def bootstrap_async(hook: ObservabilityHook | None = None, **deps) -> AsyncMessageBus:
     event_handlers: Mapping[Type[Event], Sequence] = {
         UserRegistered: [on_user_registered],
     }
@@ -24,10 +26,22 @@ def bootstrap_async(uow: AsyncAbstractUnitOfWork, hook: ObservabilityHook | None
         PromoteToAdmin: handle_promote_to_admin,
     }
     return AsyncMessageBus(
-        uow=uow,
         event_handlers=event_handlers,
         command_handlers=command_handlers,
         dependencies=deps,
         raise_on_error=True,
         hook=hook
     )
+
+
+def bootstrap_outbox_relay(bus: AsyncMessageBus, hook: OutboxHook | None = None) -> OutboxRelay:
+    return OutboxRelay(
+        uow_factory=AsyncUnitOfWork,
+        bus=bus,
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        poll_interval=settings.OUTBOX_POLL_INTERVAL_SEC,
+        max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+        retry_base_sec=settings.OUTBOX_RETRY_BASE_SEC,
+        retry_max_sec=settings.OUTBOX_RETRY_MAX_SEC,
+        hook=hook,
+    )
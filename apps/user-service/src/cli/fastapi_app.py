@@ -1,22 +1,45 @@
+import asyncio
 import hashlib
+from contextlib import asynccontextmanager
 from typing import Annotated
 from uuid import UUID
 from fastapi import FastAPI, Depends, HTTPException, status, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from patterns.message_bus import AsyncMessageBus
+from patterns.pagination import Cursor
 from src.gateway.schemas.users import UserCreateDTO, UserReadDTO, UserUpdateDTO, PasswordChangeDTO
 from src.dto.commands import RegisterUser, UpdateUserProfile, ChangeUserPassword, ActivateUser, DeactivateUser, PromoteToAdmin
-from src.bootstrap.async_settings import bootstrap_async
-from src.infrastructure.async_unit_of_work import AsyncUnitOfWork
-from src.infrastructure.hooks import PromAuditHook
+from src.bootstrap.async_settings import bootstrap_async, bootstrap_outbox_relay
+from src.infrastructure.async_unit_of_work import AsyncUnitOfWork, ReadOnlyAsyncUnitOfWork
+from src.infrastructure.db_async import warm_up_pools
+from src.infrastructure.hooks import PromAuditHook, PromOutboxHook
 from src.infrastructure.middleware import IdempotencyMiddleware, MetricsMiddleware, prom_endpoint
 from src.cli.error import install_exception_handlers
 from src.config import settings
 
-app = FastAPI(title="User Service (async)")
+bus = bootstrap_async(hook=PromAuditHook())
+outbox_relay = bootstrap_outbox_relay(bus, hook=PromOutboxHook())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up_pools()
+    stop = asyncio.Event()
+    relay_task = asyncio.create_task(outbox_relay.run(stop)) if settings.OUTBOX_RELAY_ENABLED else None
+    try:
+        yield
+    finally:
+        stop.set()
+        if relay_task:
+            await relay_task
+
+
+app = FastAPI(title="User Service (async)", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 app.add_middleware(IdempotencyMiddleware)
 if settings.PROM_ENABLED:
@@ -27,6 +50,29 @@ async def get_uow():
     async with AsyncUnitOfWork() as uow:
         yield uow
 
+async def get_read_uow():
+    async with ReadOnlyAsyncUnitOfWork() as uow:
+        yield uow
+
+async def get_bus(uow: Annotated[AsyncUnitOfWork, Depends(get_uow)]) -> AsyncMessageBus:
+    return bus.scope(uow)
+
+def parse_cursor(cursor: str | None, skip: int) -> Cursor | None:
+    if cursor is None:
+        return None
+    if skip:
+        raise HTTPException(400, "cursor and skip cannot be combined")
+    try:
+        return Cursor.decode(cursor)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+
+def set_next_cursor(response: Response, items: list, limit: int) -> list:
+    if len(items) > limit:
+        items = items[:limit]
+        response.headers["X-Next-Cursor"] = Cursor.after(items[-1]).encode()
+    return items
+
 def hash_password(p: str) -> str:
     return hashlib.sha256(p.encode()).hexdigest()
 
@@ -39,11 +85,15 @@ def metrics():
 
 @app.get("/users", response_model=list[UserReadDTO])
 async def list_users(
-    uow: Annotated[AsyncUnitOfWork, Depends(get_uow)],
+    response: Response,
+    uow: Annotated[ReadOnlyAsyncUnitOfWork, Depends(get_read_uow)],
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None),
 ):
-    items = await uow.users.list_users(skip=skip, limit=limit)
+    after = parse_cursor(cursor, skip)
+    items = await uow.users.list_users(skip=skip, limit=limit + 1, after=after)
+    items = set_next_cursor(response, items, limit)
     return [
         UserReadDTO(
             id=u.id, email=u.email, username=u.username,
@@ -55,18 +105,12 @@ async def list_users(
 @app.post("/users", response_model=UserReadDTO, status_code=status.HTTP_201_CREATED)
 async def register_user(
     dto: UserCreateDTO,
-    uow: Annotated[AsyncUnitOfWork, Depends(get_uow)],
+    bus: Annotated[AsyncMessageBus, Depends(get_bus)],
 ):
-    hook = PromAuditHook()
-    bus = bootstrap_async(uow, hook=hook) 
-    results = await bus.handle(RegisterUser(
+    [user] = await bus.handle(RegisterUser(
         email=dto.email, username=dto.username,
         password_hash=hash_password(dto.password), locale=dto.locale
     ))
-    user_id = results[0]
-    user = await uow.users.get_async(user_id)
-    if not user:
-        raise HTTPException(status_code=500, detail="User not persisted")
     return UserReadDTO(
         id=user.id, email=user.email, username=user.username,
         role=user.role.value, locale=user.locale, is_active=user.is_active
@@ -75,7 +119,7 @@ async def register_user(
 @app.get("/users/{user_id}", response_model=UserReadDTO)
 async def get_user(
     user_id: UUID,
-    uow: Annotated[AsyncUnitOfWork, Depends(get_uow)],
+    uow: Annotated[ReadOnlyAsyncUnitOfWork, Depends(get_read_uow)],
 ):
     user = await uow.users.get_async(user_id)
     if not user:
@@ -89,14 +133,9 @@ async def get_user(
 async def update_user(
     user_id: UUID,
     dto: UserUpdateDTO,
-    uow: Annotated[AsyncUnitOfWork, Depends(get_uow)],
+    bus: Annotated[AsyncMessageBus, Depends(get_bus)],
 ):
-    hook = PromAuditHook()
-    bus = bootstrap_async(uow, hook=hook) 
-    await bus.handle(UpdateUserProfile(user_id=user_id, new_username=dto.username, new_locale=dto.locale))
-    user = await uow.users.get_async(user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    [user] = await bus.handle(UpdateUserProfile(user_id=user_id, new_username=dto.username, new_locale=dto.locale))
     return UserReadDTO(
         id=user.id, email=user.email, username=user.username,
         role=user.role.value, locale=user.locale, is_active=user.is_active
@@ -106,39 +145,31 @@ async def update_user(
 async def change_password(
     user_id: UUID,
     dto: PasswordChangeDTO,
-    uow: Annotated[AsyncUnitOfWork, Depends(get_uow)],
+    bus: Annotated[AsyncMessageBus, Depends(get_bus)],
 ):
-    hook = PromAuditHook()
-    bus = bootstrap_async(uow, hook=hook) 
     await bus.handle(ChangeUserPassword(user_id=user_id, new_password_hash=hash_password(dto.password)))
     return None
 
 @app.post("/users/{user_id}/activate", status_code=status.HTTP_204_NO_CONTENT)
 async def activate_user(
     user_id: UUID,
-    uow: Annotated[AsyncUnitOfWork, Depends(get_uow)],
+    bus: Annotated[AsyncMessageBus, Depends(get_bus)],
 ):
-    hook = PromAuditHook()
-    bus = bootstrap_async(uow, hook=hook) 
     await bus.handle(ActivateUser(user_id=user_id))
     return None
 
 @app.post("/users/{user_id}/deactivate", status_code=status.HTTP_204_NO_CONTENT)
 async def deactivate_user(
     user_id: UUID,
-    uow: Annotated[AsyncUnitOfWork, Depends(get_uow)],
+    bus: Annotated[AsyncMessageBus, Depends(get_bus)],
 ):
-    hook = PromAuditHook()
-    bus = bootstrap_async(uow, hook=hook) 
     await bus.handle(DeactivateUser(user_id=user_id))
     return None
 
 @app.post("/users/{user_id}/promote", status_code=status.HTTP_204_NO_CONTENT)
 async def promote_user(
     user_id: UUID,
-    uow: Annotated[AsyncUnitOfWork, Depends(get_uow)],
+    bus: Annotated[AsyncMessageBus, Depends(get_bus)],
 ):
-    hook = PromAuditHook()
-    bus = bootstrap_async(uow, hook=hook) 
     await bus.handle(PromoteToAdmin(user_id=user_id))
     return None
@@ -14,6 +14,15 @@ class Settings(BaseModel):
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./payment_service.db")
     DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
     DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+    DB_POOL_RECYCLE_SEC: int = int(os.getenv("DB_POOL_RECYCLE_SEC", "1800"))
+    DB_POOL_WARMUP: int = int(os.getenv("DB_POOL_WARMUP", os.getenv("DB_POOL_SIZE", "10")))
+    DB_QUERY_CACHE_SIZE: int = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "500"))
+    DATABASE_REPLICA_URLS: list[str] = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+    DB_REPLICA_STRATEGY: str = os.getenv("DB_REPLICA_STRATEGY", "round_robin")
+    DB_REPLICA_EJECT_SEC: float = float(os.getenv("DB_REPLICA_EJECT_SEC", "30"))
 
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOGSTASH_HOST: str | None = os.getenv("LOGSTASH_HOST")
@@ -25,6 +34,15 @@ class Settings(BaseModel):
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://redis:6379/0")
     IDEMPOTENCY_TTL_SEC: int = int(os.getenv("IDEMPOTENCY_TTL_SEC", "600"))
 
+    OUTBOX_RELAY_ENABLED: bool = os.getenv("OUTBOX_RELAY_ENABLED", "1") == "1"
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_POLL_INTERVAL_SEC: float = float(os.getenv("OUTBOX_POLL_INTERVAL_SEC", "1.0"))
+    # a failed event is retried after RETRY_BASE_SEC * 2^(attempts-1), at most RETRY_MAX_SEC,
+    # and dead-lettered after MAX_ATTEMPTS failures
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+    OUTBOX_RETRY_BASE_SEC: float = float(os.getenv("OUTBOX_RETRY_BASE_SEC", "1.0"))
+    OUTBOX_RETRY_MAX_SEC: float = float(os.getenv("OUTBOX_RETRY_MAX_SEC", "300"))
+
     TELEGRAM_BOT_TOKEN: str | None = os.getenv("TELEGRAM_BOT_TOKEN")
     TELEGRAM_CHAT_ID: str | None = os.getenv("TELEGRAM_CHAT_ID")
     EMAIL_SMTP_HOST: str | None = os.getenv("EMAIL_SMTP_HOST")
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional
+from patterns.pagination import Cursor
 from src.domains.users.model import User
 
 from uuid import UUID
@@ -27,5 +28,5 @@ class IUserRepository(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def list_users(self, skip: int = 0, limit: int = 50) -> List[User]:
+    async def list_users(self, skip: int = 0, limit: int = 50, after: Cursor | None = None) -> List[User]:
         raise NotImplementedError
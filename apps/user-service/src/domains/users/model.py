@@ -128,7 +128,7 @@ class User(AbstractAggregate):
         if new_username == self._username:
             return
         self._username = new_username
-        self._touch()
+        self._touch("username")
         self._record_event(UserProfileUpdated(user_id=self.id, changes={"username": new_username}))
 
     def change_locale(self, new_locale: str) -> None:
@@ -137,36 +137,37 @@ class User(AbstractAggregate):
         if new_locale == self._locale:
             return
         self._locale = new_locale
-        self._touch()
+        self._touch("locale")
         self._record_event(UserProfileUpdated(user_id=self.id, changes={"locale": new_locale}))
 
     def change_password_hash(self, new_password_hash: str) -> None:
         if not new_password_hash:
             raise ValueError("Password hash should be non-empty")
         self._password_hash = new_password_hash
-        self._touch()
+        self._touch("password_hash")
         self._record_event(UserPasswordChanged(user_id=self.id))
 
     def deactivate(self) -> None:
         if not self._is_active:
             return
         self._is_active = False
-        self._touch()
+        self._touch("is_active")
         self._record_event(UserDeactivated(user_id=self.id))
 
     def activate(self) -> None:
         if self._is_active:
             return
         self._is_active = True
-        self._touch()
+        self._touch("is_active")
         self._record_event(UserActivated(user_id=self.id))
 
     def promote_to_admin(self) -> None:
         if self._role == Role.ADMIN:
             return
         self._role = Role.ADMIN
-        self._touch()
+        self._touch("role")
         self._record_event(UserRoleChanged(user_id=self.id, new_role=self._role.value))
 
-    def _touch(self) -> None:
+    def _touch(self, *fields: str) -> None:
         self._updated_at = datetime.now(timezone.utc)
+        self._mark_dirty("updated_at", *fields)
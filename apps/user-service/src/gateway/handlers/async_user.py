@@ -11,7 +11,7 @@ class Notifier(Protocol):
 class Publisher(Protocol):
     async def publish(self, topic: str, payload: dict[str, Any]) -> None: ...
 
-async def handle_register_user(cmd: RegisterUser, uow: AsyncAbstractUnitOfWork) -> UUID:
+async def handle_register_user(cmd: RegisterUser, uow: AsyncAbstractUnitOfWork) -> User:
     if await uow.users.get_by_email(cmd.email):
         raise DuplicateEmail("Email already in use")
     if await uow.users.get_by_username(cmd.username):
@@ -20,9 +20,9 @@ async def handle_register_user(cmd: RegisterUser, uow: AsyncAbstractUnitOfWork)
     user = User.create(email=cmd.email, username=cmd.username, password_hash=cmd.password_hash, role=Role.USER, locale=cmd.locale)
     uow.users.add(user)
     await uow.commit()
-    return user.id
+    return user
 
-async def handle_update_user_profile(cmd: UpdateUserProfile, uow: AsyncAbstractUnitOfWork) -> None:
+async def handle_update_user_profile(cmd: UpdateUserProfile, uow: AsyncAbstractUnitOfWork) -> User:
     user = await uow.users.get_async(cmd.user_id)
     if not user:
         raise NotFound("User not found")
@@ -35,6 +35,7 @@ async def handle_update_user_profile(cmd: UpdateUserProfile, uow: AsyncAbstractU
         user.change_locale(cmd.new_locale)
     await uow.users.save(user)
     await uow.commit()
+    return user
 
 async def handle_change_user_password(cmd: ChangeUserPassword, uow: AsyncAbstractUnitOfWork) -> None:
     user = await uow.users.get_async(cmd.user_id)
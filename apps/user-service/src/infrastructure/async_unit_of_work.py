@@ -1,11 +1,13 @@
-from typing import Tuple
+from typing import Generator, Tuple
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from patterns.message import Event
 from patterns.repository import AbstractRepository
 from patterns.unit_of_work import AsyncAbstractUnitOfWork
 from patterns.observability import ObservabilityHook, NoopHook
-from src.infrastructure.db_async import AsyncSessionLocal
+from src.infrastructure.db_async import AsyncSessionLocal, ReadSessionLocal
 from src.repository.sqlalchemy_async import SqlAlchemyAsyncUserRepository
+from src.repository.sqlalchemy_outbox import SqlAlchemyAsyncOutbox
 from src.domains.common.exceptions import DuplicateEmail, DuplicateUsername, DatabaseConflict
 
 
@@ -18,6 +20,7 @@ class AsyncUnitOfWork(AsyncAbstractUnitOfWork):
     async def __aenter__(self) -> "AsyncUnitOfWork":
         self.session = self._session_factory()
         self.users = SqlAlchemyAsyncUserRepository(self.session)
+        self.outbox = SqlAlchemyAsyncOutbox(self.session)
         self.repositories: Tuple[AbstractRepository, ...] = (self.users,)
         return self
 
@@ -31,9 +34,15 @@ class AsyncUnitOfWork(AsyncAbstractUnitOfWork):
             if self.session:
                 await self.session.close()
 
+    def collect_new_events(self) -> Generator[Event, None, None]:
+        # events are not dispatched inline: _commit writes them to the outbox for the relay
+        yield from ()
+
     async def _commit(self) -> None:
         try:
             if self.session:
+                for agg, event in self._drain_events():
+                    self.outbox.add(str(agg.id), event)
                 await self.session.commit()
         except IntegrityError as e:
             raise DatabaseConflict("Database conflict")
@@ -41,3 +50,16 @@ class AsyncUnitOfWork(AsyncAbstractUnitOfWork):
     async def _rollback(self) -> None:
         if self.session:
             await self.session.rollback()
+
+
+class ReadOnlyAsyncUnitOfWork(AsyncUnitOfWork):
+    def __init__(self, session_factory=ReadSessionLocal) -> None:
+        super().__init__(session_factory)
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        # nothing to flush or commit: closing ends the read transaction and returns the connection
+        if self.session:
+            await self.session.close()
+
+    async def _commit(self) -> None:
+        raise RuntimeError("Read-only unit of work cannot commit")
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from typing import Any
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from src.config import settings
+
+log = logging.getLogger("db")
+
+POOL_SIZE = Gauge("db_pool_size", "Configured persistent connections", ["pool"])
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", ["pool"])
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond pool_size", ["pool"])
+POOL_CHECKOUT = Histogram(
+    "db_pool_checkout_seconds", "Time to get a connection from the pool, including waiting for one", ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_EVENTS = Counter("db_pool_connections_total", "DBAPI connections opened, closed and invalidated", ["pool", "event"])
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    # times the whole checkout: queue wait, a new connection when the pool is short, and pre-ping
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            POOL_CHECKOUT.labels(self.logging_name).observe(time.perf_counter() - start)
+
+
+def pool_kwargs(url: str, name: str) -> dict[str, Any]:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # in-memory sqlite lives and dies with its single connection; it cannot be pooled
+        return {"pool_logging_name": name}
+    return {
+        "poolclass": InstrumentedPool,
+        "pool_logging_name": name,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SEC,
+    }
+
+
+def instrument(engine: AsyncEngine, name: str) -> None:
+    sync_engine = engine.sync_engine
+
+    def sample(returning: int):
+        # checkin fires before the connection is back in the queue, hence the offset; connections
+        # beyond pool_size are discarded on return, so overflow is whatever is out past pool_size
+        def listener(*_: Any) -> None:
+            pool = sync_engine.pool
+            if isinstance(pool, AsyncAdaptedQueuePool):
+                checked_out = max(0, pool.checkedout() - returning)
+                POOL_CHECKED_OUT.labels(name).set(checked_out)
+                POOL_OVERFLOW.labels(name).set(max(0, checked_out - pool.size()))
+        return listener
+
+    def count(kind: str):
+        def listener(*_: Any) -> None:
+            POOL_EVENTS.labels(name, kind).inc()
+        return listener
+
+    if isinstance(sync_engine.pool, AsyncAdaptedQueuePool):
+        POOL_SIZE.labels(name).set(sync_engine.pool.size())
+    event.listen(sync_engine, "checkout", sample(0))
+    event.listen(sync_engine, "checkin", sample(1))
+    event.listen(sync_engine, "connect", count("connect"))
+    event.listen(sync_engine, "close", count("close"))
+    event.listen(sync_engine, "invalidate", count("invalidate"))
+
+
+async def warm_up(engine: AsyncEngine, size: int) -> int:
+    # connections are opened side by side, so they are distinct, then all returned to the pool
+    # where they stay idle until the first requests need them
+    conns = await asyncio.gather(*(engine.connect() for _ in range(size)), return_exceptions=True)
+    opened = [c for c in conns if not isinstance(c, BaseException)]
+    try:
+        for conn in opened:
+            await conn.exec_driver_sql("SELECT 1")
+    finally:
+        await asyncio.gather(*(conn.close() for conn in opened))
+    errors = [c for c in conns if isinstance(c, BaseException)]
+    if errors:
+        raise errors[0]
+    return len(opened)
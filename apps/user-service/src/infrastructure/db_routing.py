@@ -0,0 +1,115 @@
+import itertools
+import logging
+import time
+from typing import Any, Sequence
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+log = logging.getLogger("db")
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        self.in_use = 0
+        self.ejected_until = 0.0
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine.pool, "checkout", self._on_checkout)
+        event.listen(sync_engine.pool, "checkin", self._on_checkin)
+
+    def _on_checkout(self, dbapi_conn, record, proxy) -> None:
+        self.in_use += 1
+
+    def _on_checkin(self, dbapi_conn, record) -> None:
+        self.in_use = max(0, self.in_use - 1)
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until <= time.monotonic()
+
+
+def _unreachable(err: BaseException | None) -> bool:
+    # a socket-level failure (refused, reset, timed out), raised as is or wrapped by the driver
+    while err is not None:
+        if isinstance(err, OSError):
+            return True
+        err = err.__cause__
+    return False
+
+
+class ReplicaPool:
+    STRATEGIES = ("round_robin", "least_connections")
+
+    def __init__(self, engines: Sequence[AsyncEngine], *, strategy: str = "round_robin", eject_sec: float = 30.0) -> None:
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown replica strategy: {strategy}")
+        self.replicas = [Replica(engine) for engine in engines]
+        self.strategy = strategy
+        self.eject_sec = eject_sec
+        self._rr = itertools.count()
+        for replica in self.replicas:
+            event.listen(replica.engine.sync_engine, "do_connect", self._on_connect(replica))
+            event.listen(replica.engine.sync_engine, "handle_error", self._on_error(replica))
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Engine | None:
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            return None
+        if self.strategy == "least_connections":
+            replica = min(healthy, key=lambda r: r.in_use)
+        else:
+            replica = healthy[next(self._rr) % len(healthy)]
+        return replica.engine.sync_engine
+
+    def eject(self, replica: Replica) -> None:
+        replica.ejected_until = time.monotonic() + self.eject_sec
+        log.warning("db.replica.ejected", extra={"audit": {"type": "db.replica.ejected", "url": replica.engine.url.render_as_string(hide_password=True), "for_sec": self.eject_sec}})
+
+    def _on_connect(self, replica: Replica):
+        def do_connect(dialect, conn_rec, cargs, cparams):
+            # a refused or timed-out connect leaves the driver as a plain OSError, which never
+            # reaches handle_error (SQLAlchemy only reports DBAPI errors raised while connecting)
+            try:
+                return dialect.connect(*cargs, **cparams)
+            except Exception as e:
+                if _unreachable(e):
+                    self.eject(replica)
+                raise
+        return do_connect
+
+    def _on_error(self, replica: Replica):
+        def handle_error(ctx) -> None:
+            # only a replica that cannot be reached leaves the rotation. SQL errors, errors while
+            # processing results and cancelled requests (a client disconnect or timeout raises
+            # CancelledError mid-execute, which SQLAlchemy also reports as a disconnect) do not
+            if not isinstance(ctx.original_exception, Exception):
+                return
+            if ctx.is_disconnect or _unreachable(ctx.original_exception):
+                self.eject(replica)
+        return handle_error
+
+
+class RoutingSession(Session):
+    # statements executed with bind_arguments={"replica": True} (or every read, when the
+    # session is created with replica=True) go to a replica until the session writes;
+    # from then on it is pinned to the primary so it reads its own writes
+    def __init__(self, *args: Any, replicas: ReplicaPool | None = None, replica: bool = False, **kw: Any) -> None:
+        super().__init__(*args, **kw)
+        self.replicas = replicas
+        self.prefer_replica = replica
+        self.pinned = False
+
+    def get_bind(self, mapper=None, *, clause=None, replica: bool | None = None, **kw: Any):
+        if self._flushing or (clause is not None and clause.is_dml):
+            self.pinned = True
+        use_replica = self.prefer_replica if replica is None else replica
+        if use_replica and self.replicas and not self.pinned:
+            engine = self.replicas.choose()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper, clause=clause, **kw)
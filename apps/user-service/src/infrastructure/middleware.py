@@ -41,7 +41,7 @@ class CachedResponse:
 
 def make_key(request: Request) -> str:
     idem_hdr = request.headers.get("Idempotency-Key", "")
-    return f"idem:{request.method}:{request.url.path}:{idem_hdr}"
+    return f"idem:{request.method}:{request.url.path}?{request.url.query}:{idem_hdr}"
 
 class IdempotencyMiddleware(BaseHTTPMiddleware):
     def __init__(self, app):
@@ -0,0 +1,34 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, JSON, String, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from src.infrastructure.db_async import Base
+
+
+class OutboxORM(Base):
+    __tablename__ = "outbox"
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    aggregate_id = Column(String(64), nullable=False)
+    name = Column(String(128), nullable=False)
+    payload = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    occurred_at = Column(DateTime(timezone=True), nullable=False, server_default=func.current_timestamp())
+    published_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, server_default=text("0"))
+    last_error = Column(String(512), nullable=True)
+    # set after a failed delivery; the relay leaves the message (and the later messages of its
+    # aggregate) alone until then
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    # set once the message has failed OUTBOX_MAX_ATTEMPTS times; it is never delivered again
+    dead_lettered_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_outbox_pending", "id",
+            postgresql_where=text("published_at IS NULL AND dead_lettered_at IS NULL"),
+            sqlite_where=text("published_at IS NULL AND dead_lettered_at IS NULL"),
+        ),
+        Index(
+            "ix_outbox_retrying", "aggregate_id", "id",
+            postgresql_where=text("published_at IS NULL AND dead_lettered_at IS NULL AND next_attempt_at IS NOT NULL"),
+            sqlite_where=text("published_at IS NULL AND dead_lettered_at IS NULL AND next_attempt_at IS NOT NULL"),
+        ),
+    )
@@ -18,4 +18,5 @@ class InMemoryUnitOfWork(AbstractUnitOfWork):
         pass
 
     def _rollback(self) -> None:
-        self.users.seen.clear()
+        self.users.identity_map.clear()
+        self.journal.clear()
@@ -24,4 +24,5 @@ class UserORM(Base):
         CheckConstraint("length(username) >= 3", name="ck_users_username_len"),
         Index("ix_users_email", "email"),
         Index("ix_users_username", "username"),
+        Index("ix_users_created", "created_at", "id"),
     )
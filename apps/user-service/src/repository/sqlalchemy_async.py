@@ -1,69 +1,106 @@
 from typing import Optional, Sequence
 from uuid import UUID
-from sqlalchemy import select, delete
+from sqlalchemy import bindparam, select, delete, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from patterns.pagination import Cursor
 from patterns.repository import AbstractRepository
 from src.infrastructure.users.orm import UserORM
+from src.domains.common.exceptions import DatabaseConflict
 from src.domains.users.model import User, Role
-from datetime import datetime, timezone
+
+# statements are built once and executed with parameters, so a call only pays for the compiled
+# cache lookup. The SET clause of _UPDATE follows the keys of the parameters it is given; loaded
+# ORM rows are not synchronized because the repository identity map is what callers read.
+_UPDATE = (
+    update(UserORM)
+    .where(UserORM.id == bindparam("b_id"))
+    .execution_options(synchronize_session=False)
+)
+_BY_EMAIL = select(UserORM).where(UserORM.email == bindparam("email"))
+_BY_USERNAME = select(UserORM).where(UserORM.username == bindparam("username"))
+_LIST = (
+    select(UserORM)
+    .order_by(UserORM.created_at.desc(), UserORM.id.desc())
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+_LIST_AFTER = _LIST.where(tuple_(UserORM.created_at, UserORM.id) < tuple_(
+    bindparam("after_created_at", type_=UserORM.created_at.type),
+    bindparam("after_id", type_=UserORM.id.type),
+))
 
 
 class SqlAlchemyAsyncUserRepository(AbstractRepository[User]):
     def __init__(self, session: AsyncSession) -> None:
         super().__init__()
         self.session = session
+        self._pending: dict[UUID, UserORM] = {}
 
     def _add(self, aggregate: User) -> None:
-        self.session.add(self._to_orm(aggregate))
+        orm_obj = self._to_orm(aggregate)
+        self.session.add(orm_obj)
+        self._pending[aggregate.id] = orm_obj
 
     def _get(self, reference: UUID) -> Optional[User]:
         raise NotImplementedError("Use async method 'get_async'")
 
     async def save(self, aggregate: User) -> User:
-        now = datetime.now(timezone.utc)
-
-        orm_obj: Optional[UserORM] = await self.session.get(UserORM, aggregate.id)
-
-        if orm_obj is None:
-            orm_obj = self._to_orm(aggregate)
-            if orm_obj.created_at is None:
-                orm_obj.created_at = now
-            orm_obj.updated_at = now
-            self.session.add(orm_obj)
-        else:
-            orm_obj.email = aggregate.email
-            orm_obj.username = aggregate.username
-            orm_obj.password_hash = getattr(aggregate, "_password_hash")
-            orm_obj.role = aggregate.role.value if hasattr(aggregate.role, "value") else aggregate.role
-            orm_obj.locale = aggregate.locale
-            orm_obj.is_active = aggregate.is_active
-            orm_obj.updated_at = now
-
-        return self._to_domain(orm_obj)
+        if aggregate.id not in self.identity_map:
+            self._add(aggregate)
+        elif aggregate.dirty_fields:
+            values = self._changed_columns(aggregate)
+            orm_obj = self._pending.get(aggregate.id)
+            if orm_obj is not None:
+                for column, value in values.items():
+                    setattr(orm_obj, column, value)
+            else:
+                res = await self.session.execute(_UPDATE, {"b_id": aggregate.id, **values})
+                if res.rowcount != 1:
+                    raise DatabaseConflict(f"User {aggregate.id} was not updated")
+        aggregate.mark_clean()
+        return self._track(aggregate)
 
     async def get_async(self, user_id: UUID) -> Optional[User]:
-        row = await self.session.get(UserORM, user_id)
-        return self._to_domain(row) if row else None
+        user = self.identity_map.get(user_id)
+        if user is not None:
+            return user
+        return self._load(await self.session.get(UserORM, user_id))
 
+    # uniqueness checks before a write: these go to the primary, a lagging replica would let a
+    # duplicate through. In ReadOnlyAsyncUnitOfWork the session sends them to a replica anyway
     async def get_by_email(self, email: str) -> Optional[User]:
-        res = await self.session.execute(select(UserORM).where(UserORM.email == email))
-        row = res.scalar_one_or_none()
-        return self._to_domain(row) if row else None
+        res = await self.session.execute(_BY_EMAIL, {"email": email})
+        return self._load(res.scalar_one_or_none())
 
     async def get_by_username(self, username: str) -> Optional[User]:
-        res = await self.session.execute(select(UserORM).where(UserORM.username == username))
-        row = res.scalar_one_or_none()
-        return self._to_domain(row) if row else None
+        res = await self.session.execute(_BY_USERNAME, {"username": username})
+        return self._load(res.scalar_one_or_none())
 
-    async def list_users(self, skip: int = 0, limit: int = 50) -> list[User]:
-        res = await self.session.execute(
-            select(UserORM).order_by(UserORM.created_at.desc()).offset(skip).limit(limit)
-        )
+    async def list_users(self, skip: int = 0, limit: int = 50, after: Cursor | None = None) -> list[User]:
+        if after:
+            q, params = _LIST_AFTER, {"skip": skip, "limit": limit, "after_created_at": after.created_at, "after_id": after.id}
+        else:
+            q, params = _LIST, {"skip": skip, "limit": limit}
+        res = await self.session.execute(q, params, bind_arguments={"replica": True})
         rows: Sequence[UserORM] = res.scalars().all()
-        return [self._to_domain(r) for r in rows]
+        return [self._load(r) for r in rows]
 
     async def remove(self, user_id: UUID) -> None:
         await self.session.execute(delete(UserORM).where(UserORM.id == user_id))
+        self.identity_map.pop(user_id, None)
+        self._pending.pop(user_id, None)
+
+    @staticmethod
+    def _changed_columns(agg: User) -> dict:
+        values = {}
+        for field in agg.dirty_fields:
+            if field == "password_hash":
+                values[field] = getattr(agg, "_password_hash")
+            elif field == "role":
+                values[field] = agg.role.value
+            else:
+                values[field] = getattr(agg, field)
+        return values
 
     @staticmethod
     def _to_domain(row: UserORM) -> User:
@@ -1,6 +1,7 @@
 from typing import Optional, Dict
 from uuid import UUID
 
+from patterns.pagination import Cursor
 from patterns.repository import AbstractRepository
 from src.domains.users.model import User
 
@@ -22,8 +23,11 @@ class InMemoryUserRepository(AbstractRepository[User]):
     def get_by_username(self, username: str) -> Optional[User]:
         return next((u for u in self._store.values() if u.username == username), None)
 
-    def list_users(self, skip: int = 0, limit: int = 50) -> list[User]:
-        values = list(self._store.values())
+    def list_users(self, skip: int = 0, limit: int = 50, after: Cursor | None = None) -> list[User]:
+        # same order and cursor semantics as the SQL repository: newest first, (created_at, id) < after
+        values = sorted(self._store.values(), key=lambda u: (u.created_at, u.id), reverse=True)
+        if after:
+            values = [u for u in values if (u.created_at, u.id) < (after.created_at, after.id)]
         return values[skip : skip + limit]
 
     def remove(self, user_id: UUID) -> None:
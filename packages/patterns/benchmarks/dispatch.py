@@ -0,0 +1,71 @@
+# Per-dispatch cost of MessageBus.handle / AsyncMessageBus.handle: one command, a no-op handler
+# with a few injectable dependencies. From packages/patterns:
+#   python -m benchmarks.dispatch [-n 100000]
+# Check out the previous revision of patterns/message_bus.py to get the number to compare against.
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+
+from patterns.message import Command
+from patterns.message_bus import AsyncMessageBus, MessageBus
+from patterns.unit_of_work import AbstractUnitOfWork, AsyncAbstractUnitOfWork
+
+
+@dataclass(frozen=True, slots=True)
+class Ping(Command):
+    n: int
+
+
+class _UnitOfWork(AbstractUnitOfWork):
+    def _commit(self) -> None:
+        pass
+
+
+class _AsyncUnitOfWork(AsyncAbstractUnitOfWork):
+    async def _commit(self) -> None:
+        pass
+
+    async def _rollback(self) -> None:
+        pass
+
+
+def handle_ping(cmd: Ping, uow: AbstractUnitOfWork, fx=None) -> int:
+    return cmd.n
+
+
+async def handle_ping_async(cmd: Ping, uow: AsyncAbstractUnitOfWork, fx=None, users=None) -> int:
+    return cmd.n
+
+
+def _report(label: str, elapsed: float, n: int) -> None:
+    print(f"{label:<24} {elapsed / n * 1e6:8.2f} us/dispatch")
+
+
+async def main(n: int) -> None:
+    msg = Ping(1)
+    bus = AsyncMessageBus(
+        uow=_AsyncUnitOfWork(),
+        command_handlers={Ping: handle_ping_async},
+        dependencies={"fx": object(), "users": object()},
+    )
+    for _ in range(1000):
+        await bus.handle(msg)
+    start = time.perf_counter()
+    for _ in range(n):
+        await bus.handle(msg)
+    _report("AsyncMessageBus.handle", time.perf_counter() - start, n)
+
+    sync_bus = MessageBus(uow=_UnitOfWork(), command_handlers={Ping: handle_ping}, dependencies={"fx": object()})
+    for _ in range(1000):
+        sync_bus.handle(msg)
+    start = time.perf_counter()
+    for _ in range(n):
+        sync_bus.handle(msg)
+    _report("MessageBus.handle", time.perf_counter() - start, n)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Message bus dispatch overhead")
+    parser.add_argument("-n", type=int, default=100_000, help="dispatches per bus")
+    asyncio.run(main(parser.parse_args().n))
@@ -0,0 +1,86 @@
+# Cost of collecting new domain events from a unit of work that tracks many aggregates.
+# From packages/patterns:
+#   python -m benchmarks.journal [-n 10000]
+# Check out the previous revision of patterns/unit_of_work.py to get the number to compare against.
+import argparse
+import time
+from dataclasses import dataclass
+
+from patterns.aggregator import AbstractAggregate
+from patterns.message import Event
+from patterns.repository import AbstractRepository
+from patterns.unit_of_work import AbstractUnitOfWork
+
+
+@dataclass(frozen=True, slots=True)
+class Touched(Event):
+    n: int
+
+
+class Counter(AbstractAggregate):
+    def __init__(self, n: int) -> None:
+        super().__init__()
+        self.id = n
+
+    def touch(self) -> None:
+        self._record_event(Touched(self.id))
+
+
+class _Repository(AbstractRepository[Counter]):
+    def __init__(self) -> None:
+        super().__init__()
+        self.rows: dict[int, Counter] = {}
+
+    def _add(self, aggregate: Counter) -> None:
+        self.rows[aggregate.id] = aggregate
+
+    def _get(self, reference: int) -> Counter | None:
+        return self.rows.get(reference)
+
+
+class _UnitOfWork(AbstractUnitOfWork):
+    def __init__(self) -> None:
+        self.counters = _Repository()
+        self.repositories = (self.counters,)
+
+    def _commit(self) -> None:
+        pass
+
+
+def main(n: int, polls: int = 1000) -> None:
+    uow = _UnitOfWork()
+    counters = [Counter(i) for i in range(n)]
+    for counter in counters:
+        uow.counters.add(counter)
+        for _ in range(3):
+            counter.touch()
+
+    start = time.perf_counter()
+    drained = len(list(uow.collect_new_events()))
+    print(f"{f'drain {drained} events':<28} {(time.perf_counter() - start) * 1e3:8.2f} ms")
+
+    # what the bus does after every handled message that recorded nothing
+    start = time.perf_counter()
+    for _ in range(polls):
+        for _ in uow.collect_new_events():
+            pass
+    print(f"{'poll with no new events':<28} {(time.perf_counter() - start) / polls * 1e6:8.2f} us")
+
+    # bus loop: every handled event on an even counter records a follow-up on the next one
+    for counter in counters[:1000]:
+        counter.touch()
+    start = time.perf_counter()
+    queue, handled = list(uow.collect_new_events()), 0
+    while queue:
+        event = queue.pop(0)
+        handled += 1
+        if event.n % 2 == 0 and event.n + 1 < n and handled < 2000:
+            counters[event.n + 1].touch()
+        queue.extend(uow.collect_new_events())
+    print(f"{f'bus loop of {handled} messages':<28} {(time.perf_counter() - start) * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Event collection cost with many tracked aggregates")
+    parser.add_argument("-n", type=int, default=10_000, help="tracked aggregates, 3 events each")
+    main(parser.parse_args().n)
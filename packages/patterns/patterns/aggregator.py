@@ -1,14 +1,32 @@
 from abc import ABC
-from typing import List, Iterable
+from typing import TYPE_CHECKING, FrozenSet, List, Iterable, Optional, Set
 from .message import Event
 
+if TYPE_CHECKING:
+    from .unit_of_work import EventJournal
+
 
 class AbstractAggregate(ABC):
     def __init__(self) -> None:
         self.events: List[Event] = []
+        self._journal: Optional["EventJournal"] = None
+        self._dirty: Set[str] = set()
+
+    @property
+    def dirty_fields(self) -> FrozenSet[str]:
+        return frozenset(self._dirty)
+
+    def mark_clean(self) -> None:
+        self._dirty.clear()
+
+    def _mark_dirty(self, *fields: str) -> None:
+        self._dirty.update(fields)
 
     def _record_event(self, event: Event) -> None:
-        self.events.append(event)
+        if self._journal is not None:
+            self._journal.record(self, event)
+        else:
+            self.events.append(event)
 
     def pull_events(self) -> Iterable[Event]:
         event_tpl = tuple(self.events)
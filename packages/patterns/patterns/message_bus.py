@@ -1,5 +1,7 @@
+import asyncio
 import inspect
 from collections import deque
+from dataclasses import dataclass
 from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, MutableMapping, Sequence, Tuple, Type, Union
 
 from .message import MessageType, Command, Event
@@ -9,6 +11,62 @@ from .observability import ObservabilityHook, NoopHook
 EventHandler = Callable[..., Any]
 CommandHandler = Callable[..., Any]
 
+_VARIADIC = (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+
+
+def sequential(handler: EventHandler) -> EventHandler:
+    # keeps registration order for this handler when the bus fans events out concurrently
+    handler.__bus_sequential__ = True
+    return handler
+
+
+@dataclass(frozen=True, slots=True)
+class DispatchPlan:
+    handler: Callable[..., Any]
+    message_param: str
+    dependencies: Tuple[Tuple[str, bool], ...]  # (name, required)
+    is_coroutine: bool
+
+
+def compile_dispatch_plan(func: Callable[..., Any], message_type: Type[MessageType]) -> DispatchPlan:
+    sig = inspect.signature(func)
+    params = list(sig.parameters.values())
+
+    msg_param = None
+    for p in params:
+        ann = p.annotation
+        if ann is not inspect._empty:
+            try:
+                if issubclass(message_type, ann):
+                    msg_param = p
+                    break
+            except TypeError:
+                pass
+
+    if msg_param is None:
+        for candidate in ("event", "command", "message"):
+            p = sig.parameters.get(candidate)
+            if p is not None:
+                msg_param = p
+                break
+
+    if msg_param is None:
+        raise TypeError(
+            f"Handler {func.__name__} must have a parameter typed (or named) for {message_type.__name__}"
+        )
+
+    dependencies = tuple(
+        (p.name, p.default is inspect._empty)
+        for p in params
+        if p is not msg_param and p.kind not in _VARIADIC
+    )
+    return DispatchPlan(
+        handler=func,
+        message_param=msg_param.name,
+        dependencies=dependencies,
+        is_coroutine=inspect.iscoroutinefunction(func),
+    )
+
 
 class MessageBus:
     def __init__(
@@ -29,6 +87,7 @@ class MessageBus:
         }
         self.dependencies: Dict[str, Any] = {"uow": self.uow, **(dependencies or {})}
         self.raise_on_error = raise_on_error
+        self._param_names: Dict[Callable[..., Any], Tuple[str, ...]] = {}
 
     def register_event_handler(self, event_type: Type[Event], handler: EventHandler) -> None:
         self.event_handlers.setdefault(event_type, []).append(handler)
@@ -77,28 +136,28 @@ class MessageBus:
             return None
 
     def _build_kwargs(self, func: Callable[..., Any], message: MessageType) -> Dict[str, Any]:
-        sig = inspect.signature(func)
-        kwargs: Dict[str, Any] = {}
-        for name, param in sig.parameters.items():
-            if param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD):
-                continue
-            if name in self.dependencies:
-                kwargs[name] = self.dependencies[name]
-            else:
-                kwargs[name] = message
-        return kwargs
+        names = self._param_names.get(func)
+        if names is None:
+            names = tuple(
+                name for name, param in inspect.signature(func).parameters.items()
+                if param.kind not in _VARIADIC
+            )
+            self._param_names[func] = names
+        deps = self.dependencies
+        return {name: deps.get(name, message) for name in names}
 
 
 class AsyncMessageBus:
     def __init__(
         self,
         *,
-        uow: AsyncAbstractUnitOfWork,
+        uow: AsyncAbstractUnitOfWork | None = None,
         event_handlers: Mapping[Type[Event], Sequence[EventHandler]] | None = None,
         command_handlers: Mapping[Type[Command], CommandHandler] | None = None,
         dependencies: Mapping[str, Any] | None = None,
         raise_on_error: bool = False,
         hook: ObservabilityHook | None = None,
+        event_concurrency: int = 1,
     ) -> None:
         self.uow = uow
         self.event_handlers: Dict[Type[Event], List[EventHandler]] = {
@@ -110,6 +169,23 @@ class AsyncMessageBus:
         self.dependencies: Dict[str, Any] = {"uow": self.uow, **(dependencies or {})}
         self.raise_on_error = raise_on_error
         self.hook: ObservabilityHook = hook or NoopHook()
+        self.event_concurrency = max(1, event_concurrency)
+        self._plans: Dict[Tuple[Callable[..., Any], type], DispatchPlan] = {}
+
+    def register_event_handler(self, event_type: Type[Event], handler: EventHandler) -> None:
+        self.event_handlers.setdefault(event_type, []).append(handler)
+
+    def register_command_handler(self, command_type: Type[Command], handler: CommandHandler) -> None:
+        self.command_handlers[command_type] = handler
+
+    def scope(self, uow: AsyncAbstractUnitOfWork, **dependencies: Any) -> "AsyncMessageBus":
+        # handler registry, plans and hook are shared; only the uow and per-call deps are bound
+        bus = object.__new__(type(self))
+        bus.__dict__.update(self.__dict__)
+        bus.uow = uow
+        bus.dependencies = {**self.dependencies, "uow": uow, **dependencies}
+        uow.set_observability_hook(self.hook)
+        return bus
 
     async def handle(self, message: MessageType) -> List[Any]:
         results: List[Any] = []
@@ -137,63 +213,75 @@ class AsyncMessageBus:
 
         return results
 
-    async def _awaitable(self, func: Callable[..., Any], **kwargs):
-        val = func(**kwargs)
-        if inspect.isawaitable(val):
+    def _plan_for(self, func: Callable[..., Any], message: MessageType) -> DispatchPlan:
+        key = (func, type(message))
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = compile_dispatch_plan(func, type(message))
+        return plan
+
+    def _build_kwargs_for_message(self, plan: DispatchPlan, message: MessageType) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {plan.message_param: message}
+        deps = self.dependencies
+        for name, required in plan.dependencies:
+            if name in deps:
+                dep = deps[name]
+                kwargs[name] = dep() if callable(dep) and not inspect.isclass(dep) else dep
+            elif required:
+                raise TypeError(f"Cannot resolve dependency '{name}' for handler {plan.handler.__name__}")
+        return kwargs
+
+    async def _dispatch(self, plan: DispatchPlan, message: MessageType) -> Any:
+        val = plan.handler(**self._build_kwargs_for_message(plan, message))
+        if plan.is_coroutine or inspect.isawaitable(val):
             return await val
         return val
 
-    def _build_kwargs_for_message(self, func: Callable[..., Any], message: MessageType) -> Dict[str, Any]:
-        sig = inspect.signature(func)
-        params = list(sig.parameters.values())
-
-        msg_param = None
-        for p in params:
-            ann = p.annotation
-            if ann is not inspect._empty:
-                try:
-                    if issubclass(type(message), ann) or isinstance(message, ann):
-                        msg_param = p
-                        break
-                except TypeError:
-                    pass
-
-        if msg_param is None:
-            for candidate in ("event", "command", "message"):
-                p = sig.parameters.get(candidate)
-                if p is not None:
-                    msg_param = p
-                    break
+    async def _handle_event(self, event: Event) -> None:
+        handlers = self.event_handlers.get(type(event))
+        if not handlers:
+            return
+        await self.hook.on_event_start(event)
+        if self.event_concurrency > 1 and len(handlers) > 1:
+            await self._fan_out_event(event, handlers)
+            return
+        for handler in handlers:
+            err = await self._run_event_handler(handler, event)
+            if err is not None and self.raise_on_error:
+                raise err
 
-        if msg_param is None:
-            raise TypeError(
-                f"Handler {func.__name__} must have a parameter typed (or named) for {type(message).__name__}"
-            )
+    async def _fan_out_event(self, event: Event, handlers: Sequence[EventHandler]) -> None:
+        ordered = [h for h in handlers if getattr(h, "__bus_sequential__", False)]
+        chains = [[h] for h in handlers if not getattr(h, "__bus_sequential__", False)]
+        if ordered:
+            chains.insert(0, ordered)
+        limit = asyncio.Semaphore(self.event_concurrency)
 
-        kwargs: Dict[str, Any] = {msg_param.name: message}
+        async def run_chain(chain: List[EventHandler]) -> BaseException | None:
+            first_err = None
+            async with limit:
+                for handler in chain:
+                    err = await self._run_event_handler(handler, event)
+                    if err is not None and first_err is None:
+                        first_err = err
+                        if self.raise_on_error:
+                            break
+            return first_err
 
-        for p in params:
-            if p is msg_param or p.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD):
-                continue
-            if p.name in self.dependencies:
-                dep = self.dependencies[p.name]
-                kwargs[p.name] = dep() if callable(dep) and not inspect.isclass(dep) else dep
-            else:
-                if p.default is inspect._empty:
-                    raise TypeError(f"Cannot resolve dependency '{p.name}' for handler {func.__name__}")
-        return kwargs
+        errors = await asyncio.gather(*(run_chain(chain) for chain in chains))
+        if self.raise_on_error:
+            for err in errors:
+                if err is not None:
+                    raise err
 
-    async def _handle_event(self, event: Event) -> None:
-        await self.hook.on_event_start(event)
-        for handler in self.event_handlers.get(type(event), []):
-            try:
-                kwargs = self._build_kwargs_for_message(handler, event)
-                await self._awaitable(handler, **kwargs)
-                await self.hook.on_event_end(event)
-            except Exception as e:
-                await self.hook.on_event_error(event, e)
-                if self.raise_on_error:
-                    raise
+    async def _run_event_handler(self, handler: EventHandler, event: Event) -> BaseException | None:
+        try:
+            await self._dispatch(self._plan_for(handler, event), event)
+            await self.hook.on_event_end(event)
+        except Exception as e:
+            await self.hook.on_event_error(event, e)
+            return e
+        return None
 
     async def _handle_command(self, command: Command) -> Any:
         await self.hook.on_command_start(command)
@@ -205,8 +293,7 @@ class AsyncMessageBus:
                 raise err
             return None
         try:
-            kwargs = self._build_kwargs_for_message(handler, command)
-            res = await self._awaitable(handler, **kwargs)
+            res = await self._dispatch(self._plan_for(handler, command), command)
             await self.hook.on_command_end(command, res)
             return res
         except Exception as e:
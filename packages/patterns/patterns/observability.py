@@ -1,6 +1,9 @@
-from typing import Protocol, Any
+from typing import TYPE_CHECKING, Protocol, Any
 from .message import Command, Event
 
+if TYPE_CHECKING:
+    from .outbox import OutboxMessage
+
 class ObservabilityHook(Protocol):
     async def on_command_start(self, cmd: Command) -> None: ...
     async def on_command_end(self, cmd: Command, result: Any | None) -> None: ...
@@ -46,3 +49,14 @@ class CompositeHook:
     async def on_uow_rollback(self) -> None:
         for h in self._hooks: await h.on_uow_rollback()
 
+class OutboxHook(Protocol):
+    async def on_outbox_delivered(self, msg: "OutboxMessage") -> None: ...
+    async def on_outbox_failed(self, msg: "OutboxMessage | None", err: BaseException) -> None: ...
+    async def on_outbox_dead_lettered(self, msg: "OutboxMessage", err: BaseException) -> None: ...
+    async def on_outbox_backlog(self, pending: int, oldest_age_sec: float) -> None: ...
+
+class NoopOutboxHook:
+    async def on_outbox_delivered(self, msg: "OutboxMessage") -> None: ...
+    async def on_outbox_failed(self, msg: "OutboxMessage | None", err: BaseException) -> None: ...
+    async def on_outbox_dead_lettered(self, msg: "OutboxMessage", err: BaseException) -> None: ...
+    async def on_outbox_backlog(self, pending: int, oldest_age_sec: float) -> None: ...
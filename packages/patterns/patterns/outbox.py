@@ -0,0 +1,190 @@
+import asyncio
+import dataclasses
+import typing
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple, Type
+from uuid import UUID
+
+from .message import Event
+from .message_bus import AsyncMessageBus
+from .observability import NoopOutboxHook, OutboxHook
+from .unit_of_work import AsyncAbstractUnitOfWork
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class OutboxMessage:
+    id: int
+    aggregate_id: str
+    name: str
+    payload: Dict[str, Any]
+    occurred_at: datetime
+    attempts: int = 0
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class EventCodec:
+    def __init__(self, event_types: Iterable[Type[Event]] = ()) -> None:
+        self._types: Dict[str, Type[Event]] = {}
+        self._fields: Dict[str, Tuple[Tuple[str, Any], ...]] = {}
+        for event_type in event_types:
+            self.register(event_type)
+
+    def register(self, event_type: Type[Event]) -> None:
+        hints = typing.get_type_hints(event_type)
+        self._types[event_type.__name__] = event_type
+        self._fields[event_type.__name__] = tuple(
+            (f.name, hints.get(f.name)) for f in dataclasses.fields(event_type)
+        )
+
+    @staticmethod
+    def encode(event: Event) -> Tuple[str, Dict[str, Any]]:
+        payload = {f.name: _to_json(getattr(event, f.name)) for f in dataclasses.fields(event)}
+        return type(event).__name__, payload
+
+    def decode(self, name: str, payload: Dict[str, Any]) -> Event | None:
+        event_type = self._types.get(name)
+        if event_type is None:
+            return None
+        kwargs: Dict[str, Any] = {}
+        for field_name, tp in self._fields[name]:
+            value = payload.get(field_name)
+            if value is not None and isinstance(tp, type) and typing.get_origin(tp) is None and not isinstance(value, tp):
+                value = datetime.fromisoformat(value) if tp is datetime else tp(value)
+            kwargs[field_name] = value
+        return event_type(**kwargs)
+
+
+class AbstractOutbox(ABC):
+    @abstractmethod
+    def add(self, aggregate_id: str, event: Event) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def fetch_pending(self, limit: int) -> List[OutboxMessage]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def claim(self, message_id: int) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def mark_published(self, message_id: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def mark_failed(self, message_id: int, error: str, retry_at: datetime) -> None:
+        # the message is not fetched again, nor are later messages of its aggregate, before retry_at
+        raise NotImplementedError
+
+    @abstractmethod
+    async def mark_dead(self, message_id: int, error: str) -> None:
+        # dead-lettered: never fetched again; later messages of its aggregate go ahead
+        raise NotImplementedError
+
+    @abstractmethod
+    async def backlog(self) -> Tuple[int, datetime | None]:
+        raise NotImplementedError
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        *,
+        uow_factory: Callable[[], AsyncAbstractUnitOfWork],
+        bus: AsyncMessageBus,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        max_attempts: int = 10,
+        retry_base_sec: float = 1.0,
+        retry_max_sec: float = 300.0,
+        hook: OutboxHook | None = None,
+    ) -> None:
+        self._uow_factory = uow_factory
+        self.bus = bus
+        self.codec = EventCodec(bus.event_handlers)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max(max_attempts, 1)
+        self.retry_base_sec = retry_base_sec
+        self.retry_max_sec = retry_max_sec
+        self.hook: OutboxHook = hook or NoopOutboxHook()
+
+    async def run(self, stop: asyncio.Event | None = None) -> None:
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                delivered = await self.run_once()
+            except Exception as e:
+                await self.hook.on_outbox_failed(None, e)
+                delivered = 0
+            if delivered < self.batch_size:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_once(self) -> int:
+        async with self._uow_factory() as uow:
+            batch = await uow.outbox.fetch_pending(self.batch_size)
+
+        # an aggregate whose event failed or is held by another relay is skipped for
+        # the rest of the batch, so its later events are never delivered out of order
+        blocked: Set[str] = set()
+        delivered = 0
+        for msg in batch:
+            if msg.aggregate_id in blocked:
+                continue
+            try:
+                async with self._uow_factory() as uow:
+                    if not await uow.outbox.claim(msg.id):
+                        blocked.add(msg.aggregate_id)
+                        continue
+                    event = self.codec.decode(msg.name, msg.payload)
+                    if event is not None:
+                        await self.bus.scope(uow).handle(event)
+                    await uow.outbox.mark_published(msg.id)
+                    await uow.commit()
+            except Exception as e:
+                blocked.add(msg.aggregate_id)
+                await self._record_failure(msg, e)
+                continue
+            delivered += 1
+            await self.hook.on_outbox_delivered(msg)
+
+        async with self._uow_factory() as uow:
+            pending, oldest = await uow.outbox.backlog()
+        age = (datetime.now(timezone.utc) - oldest).total_seconds() if oldest else 0.0
+        await self.hook.on_outbox_backlog(pending, age)
+        return delivered
+
+    def retry_delay(self, attempts: int) -> float:
+        # exponential backoff after the attempts-th failure
+        return min(self.retry_base_sec * 2 ** (attempts - 1), self.retry_max_sec)
+
+    async def _record_failure(self, msg: OutboxMessage, err: BaseException) -> None:
+        # a message failing max_attempts times is dead-lettered, so it cannot hold the head of
+        # the queue (or its aggregate) forever; before that it backs off exponentially
+        await self.hook.on_outbox_failed(msg, err)
+        attempts = msg.attempts + 1
+        try:
+            async with self._uow_factory() as uow:
+                if attempts >= self.max_attempts:
+                    await uow.outbox.mark_dead(msg.id, repr(err))
+                else:
+                    retry_at = datetime.now(timezone.utc) + timedelta(seconds=self.retry_delay(attempts))
+                    await uow.outbox.mark_failed(msg.id, repr(err), retry_at)
+                await uow.commit()
+        except Exception as e:
+            await self.hook.on_outbox_failed(msg, e)
+            return
+        if attempts >= self.max_attempts:
+            await self.hook.on_outbox_dead_lettered(msg, err)
@@ -0,0 +1,27 @@
+import base64
+import dataclasses
+from datetime import datetime
+from uuid import UUID
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Cursor:
+    created_at: datetime
+    id: UUID
+
+    @classmethod
+    def after(cls, item) -> "Cursor":
+        return cls(created_at=item.created_at, id=item.id)
+
+    def encode(self) -> str:
+        raw = f"{self.created_at.isoformat()}|{self.id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+            created_at, ident = raw.split("|")
+            return cls(created_at=datetime.fromisoformat(created_at), id=UUID(ident))
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError("Invalid cursor") from e
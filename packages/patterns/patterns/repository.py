@@ -1,25 +1,54 @@
 from abc import ABC, abstractmethod
-from typing import Generic, Optional, Set, TypeVar, Any
+from typing import TYPE_CHECKING, Any, Dict, Generic, Iterable, Optional, TypeVar
 
 from .aggregator import AbstractAggregate
 
+if TYPE_CHECKING:
+    from .unit_of_work import EventJournal
+
 T = TypeVar("T", bound=AbstractAggregate)
 
 
 class AbstractRepository(Generic[T], ABC):
     def __init__(self) -> None:
-        self.seen: Set[T] = set()
+        self.identity_map: Dict[Any, T] = {}
+        self.journal: Optional["EventJournal"] = None
+
+    @property
+    def seen(self) -> Iterable[T]:
+        return self.identity_map.values()
 
     def add(self, aggregate: T) -> None:
         self._add(aggregate)
-        self.seen.add(aggregate)
+        self._track(aggregate)
 
     def get(self, reference: Any) -> Optional[T]:
-        agg = self._get(reference)
-        if agg:
-            self.seen.add(agg)
+        agg = self.identity_map.get(reference)
+        if agg is None:
+            agg = self._get(reference)
+            if agg:
+                self._track(agg)
+        return agg
+
+    def _track(self, aggregate: T) -> T:
+        self.identity_map[aggregate.id] = aggregate
+        if self.journal is not None:
+            self.journal.attach(aggregate)
+        return aggregate
+
+    def _load(self, row: Any) -> Optional[T]:
+        # rows read inside the unit of work resolve to the instance already tracked for
+        # their id, so an aggregate is restored from storage at most once
+        if row is None:
+            return None
+        agg = self.identity_map.get(row.id)
+        if agg is None:
+            agg = self._track(self._to_domain(row))
         return agg
 
+    def _to_domain(self, row: Any) -> T:
+        raise NotImplementedError
+
     @abstractmethod
     def _add(self, aggregate: T) -> None:
         raise NotImplementedError
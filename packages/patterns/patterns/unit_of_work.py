@@ -1,15 +1,69 @@
 from abc import ABC, abstractmethod
+from collections import deque
 from contextlib import AbstractContextManager, AbstractAsyncContextManager
-from typing import Generator, Iterable, Tuple
+from typing import Deque, Generator, Iterable, Tuple
 
+from .aggregator import AbstractAggregate
 from .message import Event
 from .repository import AbstractRepository
 from .observability import ObservabilityHook, NoopHook
 
 
-class AbstractUnitOfWork(AbstractContextManager["AbstractUnitOfWork"]):
-    repositories: Tuple[AbstractRepository, ...] = ()
+class EventJournal:
+    def __init__(self) -> None:
+        self._entries: Deque[Tuple[AbstractAggregate, Event]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def attach(self, agg: AbstractAggregate) -> None:
+        if agg._journal is self:
+            return
+        agg._journal = self
+        for event in agg.pull_events():
+            self.record(agg, event)
+
+    def record(self, agg: AbstractAggregate, event: Event) -> None:
+        self._entries.append((agg, event))
+
+    def drain(self) -> Generator[Tuple[AbstractAggregate, Event], None, None]:
+        while self._entries:
+            yield self._entries.popleft()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
 
+class _JournalMixin:
+    _journal: EventJournal | None = None
+    _repositories: Tuple[AbstractRepository, ...] = ()
+
+    @property
+    def journal(self) -> EventJournal:
+        if self._journal is None:
+            self._journal = EventJournal()
+        return self._journal
+
+    @property
+    def repositories(self) -> Tuple[AbstractRepository, ...]:
+        return self._repositories
+
+    @repositories.setter
+    def repositories(self, repositories: Iterable[AbstractRepository]) -> None:
+        # a new set of repositories starts a new journal; aggregates the repositories
+        # already track are attached to it and push their events there from now on
+        self._journal = EventJournal()
+        self._repositories = tuple(repositories)
+        for repo in self._repositories:
+            repo.journal = self._journal
+            for agg in repo.seen:
+                self._journal.attach(agg)
+
+    def _drain_events(self) -> Generator[Tuple[AbstractAggregate, Event], None, None]:
+        return self.journal.drain()
+
+
+class AbstractUnitOfWork(_JournalMixin, AbstractContextManager["AbstractUnitOfWork"]):
     def __enter__(self) -> "AbstractUnitOfWork":
         return self
 
@@ -30,15 +84,11 @@ class AbstractUnitOfWork(AbstractContextManager["AbstractUnitOfWork"]):
         pass
 
     def collect_new_events(self) -> Generator[Event, None, None]:
-        for repo in self.repositories:
-            for agg in list(repo.seen):
-                while agg.events:
-                    yield agg.events.pop(0)
-
+        for _, event in self._drain_events():
+            yield event
 
-class AsyncAbstractUnitOfWork(AbstractAsyncContextManager["AsyncAbstractUnitOfWork"]):
-    repositories: Tuple[AbstractRepository, ...] = ()
 
+class AsyncAbstractUnitOfWork(_JournalMixin, AbstractAsyncContextManager["AsyncAbstractUnitOfWork"]):
     def __init__(self) -> None:
         self._hook: ObservabilityHook = NoopHook()
 
@@ -68,8 +118,6 @@ class AsyncAbstractUnitOfWork(AbstractAsyncContextManager["AsyncAbstractUnitOfWo
         await self._hook.on_uow_rollback()
     
     def collect_new_events(self) -> Generator[Event, None, None]:
-        for repo in self.repositories:
-            for agg in list(repo.seen):
-                while agg.events:
-                    yield agg.events.pop(0)
+        for _, event in self._drain_events():
+            yield event
 